@@ -0,0 +1,212 @@
+"""
+Benchmarks for the Person/Simulation hot paths
+Times the Person methods and full FL / NFL runs at several population sizes for every engine:
+- scalar: one Simulation(Person) per person, month loops
+- scalar_closed_form: same with the closed-form yearly steps
+- vectorized: BatchSimulation (NumPy), month loops
+- vectorized_closed_form: BatchSimulation with the closed-form yearly steps
+
+Results are written as JSON so two versions can be compared:
+    python benchmark.py --output before.json
+    (make changes)
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import timeit
+
+import numpy as np
+
+from main import INITIAL_DEBT, BatchSimulation, Person, PersonArray, Simulation, memory_per_person
+
+ENGINES = ["scalar", "scalar_closed_form", "vectorized", "vectorized_closed_form"]
+POPULATION_SIZES = [1, 1000, 100000, 1000000]
+# The scalar engines take minutes past this many people, bigger populations are skipped for them
+SCALAR_LIMIT = 10000
+# A timing this much slower than the previous results is reported as a regression
+REGRESSION_THRESHOLD = 1.10
+
+# Person methods: (name, statement). The statements reset the state they change, so every call does the same work
+METHODS = [
+    ("add_income", "p.add_income()"),
+    ("update_savings", "p.update_savings()"),
+    ("update_debt", "p.debt = INITIAL_DEBT; p.update_debt()"),
+    ("update_debt_closed_form", "p.debt = INITIAL_DEBT; p.update_debt_closed_form()"),
+    ("pay_rent", "p.checking = 20000.0; p.pay_rent()"),
+    ("update_mortgage", "p.loan = 140000.0; p.update_mortgage()"),
+    ("update_mortgage_closed_form", "p.loan = 140000.0; p.update_mortgage_closed_form()"),
+    ("get_wealth", "p.get_wealth()"),
+]
+
+
+def _best_time(function, repeat: int):
+    """
+    Returns the fastest of repeat runs of function, in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_engine(engine: str, population: int, is_financially_literate: bool):
+    """
+    Runs the 40-year simulation for a population with one of the engines
+    """
+    if engine.startswith("scalar"):
+        closed_form = engine == "scalar_closed_form"
+        for _ in range(population):
+            Simulation(Person(is_financially_literate), closed_form=closed_form).run_simulation()
+    else:
+        closed_form = engine == "vectorized_closed_form"
+        BatchSimulation(np.full(population, is_financially_literate), closed_form=closed_form).run_simulation()
+
+
+def benchmark_methods(repeat: int):
+    """
+    Times every Person method (scalar) and its PersonArray version on 100,000 people (vectorized)
+
+    Returns:
+        list[dict]: one result per engine and method
+    """
+    results = []
+    for name, statement in METHODS:
+        calls = 20000
+        times = timeit.repeat(statement, globals={"p": Person(True), "INITIAL_DEBT": INITIAL_DEBT},
+                              number=calls, repeat=repeat)
+        results.append({"engine": "scalar", "method": name, "seconds_per_call": min(times) / calls})
+
+    people = PersonArray(np.arange(100000) % 2 == 0)
+    owners = np.ones(len(people), dtype=bool)
+    array_methods = [
+        ("add_income", people.add_income),
+        ("update_savings", people.update_savings),
+        ("update_debt", people.update_debt),
+        ("update_debt_closed_form", people.update_debt_closed_form),
+        ("pay_rent", lambda: people.pay_rent(owners)),
+        ("update_mortgage", lambda: people.update_mortgage(owners)),
+        ("update_mortgage_closed_form", lambda: people.update_mortgage_closed_form(owners)),
+        ("get_wealth", people.get_wealth),
+    ]
+    for name, method in array_methods:
+        people.debt[:] = INITIAL_DEBT
+        people.loan[:] = 140000.0
+        seconds = _best_time(method, repeat)
+        results.append({"engine": "vectorized", "method": name, "population": len(people),
+                        "seconds_per_call": seconds, "seconds_per_person": seconds / len(people)})
+    return results
+
+
+def benchmark_runs(sizes, repeat: int, scalar_limit: int = SCALAR_LIMIT):
+    """
+    Times full FL and NFL runs for every engine and population size
+
+    Returns:
+        list[dict]: one result per engine, population size and case
+    """
+    results = []
+    for population in sizes:
+        for engine in ENGINES:
+            for case, is_fl in [("FL", True), ("NFL", False)]:
+                result = {"engine": engine, "population": population, "case": case}
+                if engine.startswith("scalar") and population > scalar_limit:
+                    result["skipped"] = f"more than {scalar_limit} people for a scalar engine"
+                else:
+                    # big populations take seconds, one run is enough
+                    runs = repeat if population <= 100000 else 1
+                    seconds = _best_time(lambda: run_engine(engine, population, is_fl), runs)
+                    result["seconds"] = seconds
+                    result["people_per_second"] = population / seconds
+                results.append(result)
+                print(_describe(result), flush=True)
+    return results
+
+
+def _describe(result):
+    """
+    One line summary of a benchmark result
+    """
+    name = result.get("method") or f"{result['case']} x {result['population']:,}"
+    if "skipped" in result:
+        return f"{result['engine']:<24} {name:<28} skipped"
+    seconds = result.get("seconds", result.get("seconds_per_call"))
+    return f"{result['engine']:<24} {name:<28} {seconds * 1e3:12.4f} ms"
+
+
+def _key(result):
+    return (result["engine"], result.get("method"), result.get("population"), result.get("case"))
+
+
+def compare(current, previous, threshold: float = REGRESSION_THRESHOLD):
+    """
+    Compares two benchmark results (as written by main) and returns the slower timings
+
+    Returns:
+        list[tuple]: (description, previous seconds, current seconds) for every regression
+    """
+    def timings(report):
+        return {_key(result): result.get("seconds", result.get("seconds_per_call"))
+                for result in report["methods"] + report["runs"] if "skipped" not in result}
+
+    before = timings(previous)
+    regressions = []
+    for key, seconds in timings(current).items():
+        if key in before and seconds > before[key] * threshold:
+            regressions.append((" ".join(str(part) for part in key if part is not None), before[key], seconds))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the Person/Simulation hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=POPULATION_SIZES, help="population sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (the fastest is kept)")
+    parser.add_argument("--scalar-limit", type=int, default=SCALAR_LIMIT,
+                        help="largest population timed with the scalar engines")
+    parser.add_argument("--output", default="benchmark.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="previous JSON results to check for regressions")
+    args = parser.parse_args(argv)
+
+    memory = memory_per_person()
+    print(f"Memory per person: Person {memory['Person']:.1f} bytes, PersonArray {memory['PersonArray']:.1f} bytes")
+    methods = benchmark_methods(args.repeat)
+    for result in methods:
+        print(_describe(result))
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "memory_per_person": memory,
+        "methods": methods,
+        "runs": benchmark_runs(args.sizes, args.repeat, args.scalar_limit),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(report, previous)
+        for description, before, after in regressions:
+            print(f"REGRESSION {description}: {before * 1e3:.4f} ms -> {after * 1e3:.4f} ms")
+        if not regressions:
+            print(f"No regressions compared to {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Population-scale cohort simulator
+Reads person profiles (income, debt, house cost, ...) from a CSV in chunks, runs every chunk through
+BatchSimulation and keeps only per-cohort aggregates, so millions of rows never become Person objects
+and the memory used doesn't grow with the file.
+
+CSV columns (header row required):
+    is_financially_literate  1/0, true/false, yes/no or fl/nfl (required)
+    cohort                   any label (optional, everyone is in "all" without it)
+    income, initial_savings, initial_debt, house_cost, monthly_rent, fl_savings_rate, ...
+                             optional (any of the PROFILE_COLUMNS in main.py),
+                             an empty cell or a missing column means the SimulationConfig value
+
+This file contains:
+- iter_profile_chunks function (streams the CSV as column arrays)
+- CohortAggregate class (count, mean, std, min, max and percentiles of the wealth per year)
+- run_cohorts function
+- write_cohort_curves function
+
+Command line:
+    python cohort.py profiles.csv --output cohort_curves.csv
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+from main import DEFAULT_CONFIG, PROFILE_COLUMNS, BatchSimulation, SimulationConfig
+from montecarlo import QuantileSketch
+
+# Rows simulated at once
+CHUNK_SIZE = 100000
+DEFAULT_COHORT = "all"
+TRUE_VALUES = {"1", "true", "yes", "y", "fl", "t"}
+FALSE_VALUES = {"0", "false", "no", "n", "nfl", "f"}
+
+
+def _parse_flag(value: str):
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"Can't read {value!r} as is_financially_literate")
+
+
+def iter_profile_chunks(path: str, chunk_size: int = CHUNK_SIZE, config: SimulationConfig = DEFAULT_CONFIG):
+    """
+    Streams the profiles CSV chunk by chunk
+
+    Yields:
+        (cohorts, is_financially_literate, profiles): the cohort label of each row, the fl flags,
+        and a dict of per-person arrays for the PROFILE_COLUMNS present in the file
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        if "is_financially_literate" not in header:
+            raise ValueError(f"{path} has no is_financially_literate column")
+        flag_index = header.index("is_financially_literate")
+        cohort_index = header.index("cohort") if "cohort" in header else None
+        profile_indexes = {name: header.index(name) for name in PROFILE_COLUMNS if name in header}
+
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield _columns(rows, flag_index, cohort_index, profile_indexes, config)
+                rows = []
+        if rows:
+            yield _columns(rows, flag_index, cohort_index, profile_indexes, config)
+
+
+def _columns(rows, flag_index, cohort_index, profile_indexes, config):
+    """
+    Turns a chunk of CSV rows into column arrays
+    """
+    flags = np.array([_parse_flag(row[flag_index]) for row in rows], dtype=bool)
+    if cohort_index is None:
+        cohorts = np.full(len(rows), DEFAULT_COHORT, dtype=object)
+    else:
+        cohorts = np.array([row[cohort_index] for row in rows], dtype=object)
+    profiles = {}
+    for name, index in profile_indexes.items():
+        values = np.array([row[index].strip() or "nan" for row in rows], dtype=float)
+        # empty cells take the config value
+        values[np.isnan(values)] = getattr(config, name)
+        profiles[name] = values
+    return cohorts, flags, profiles
+
+
+class CohortAggregate:
+    """
+    Running aggregates of the wealth curves of one cohort (one value per year)
+    """
+    def __init__(self, years: int, sketch_k: int = 1024):
+        self.count = 0
+        self.fl_count = 0
+        self.total = np.zeros(years)
+        self.total_squares = np.zeros(years)
+        self.minimum = np.full(years, np.inf)
+        self.maximum = np.full(years, -np.inf)
+        self.sketch = QuantileSketch(years, sketch_k)
+
+    def update(self, wealth_history, is_financially_literate):
+        """
+        Adds the (n, years) wealth histories of n people of the cohort
+        """
+        wealth = wealth_history.astype(float)
+        self.count += wealth.shape[0]
+        self.fl_count += int(np.count_nonzero(is_financially_literate))
+        self.total += wealth.sum(axis=0)
+        self.total_squares += (wealth ** 2).sum(axis=0)
+        self.minimum = np.minimum(self.minimum, wealth.min(axis=0))
+        self.maximum = np.maximum(self.maximum, wealth.max(axis=0))
+        self.sketch.update(wealth)
+
+    def mean(self):
+        return self.total / self.count
+
+    def std(self):
+        variance = self.total_squares / self.count - self.mean() ** 2
+        return np.sqrt(np.maximum(variance, 0))
+
+    def curves(self, quantiles=(0.1, 0.5, 0.9)):
+        """
+        Returns the aggregate wealth curves as {statistic name: array with one value per year}
+        """
+        curves = {"mean": self.mean(), "std": self.std(), "min": self.minimum, "max": self.maximum}
+        for q, values in zip(quantiles, self.sketch.quantiles(quantiles)):
+            curves[f"p{round(q * 100)}"] = values
+        return curves
+
+
+def run_cohorts(path: str, chunk_size: int = CHUNK_SIZE, config: SimulationConfig = DEFAULT_CONFIG,
+                closed_form: bool = True):
+    """
+    Simulates every profile of the CSV and aggregates the wealth curves per cohort
+
+    Returns:
+        dict: cohort label -> CohortAggregate
+    """
+    aggregates = {}
+    for cohorts, flags, profiles in iter_profile_chunks(path, chunk_size, config):
+        sim = BatchSimulation(flags, closed_form=closed_form, config=config, profiles=profiles)
+        wealth_history = sim.run_simulation()
+        labels, inverse = np.unique(cohorts.astype(str), return_inverse=True)
+        for group, label in enumerate(labels):
+            members = inverse == group
+            if label not in aggregates:
+                aggregates[label] = CohortAggregate(config.total_years + 1)
+            aggregates[label].update(wealth_history[members], flags[members])
+    return aggregates
+
+
+def write_cohort_curves(path: str, aggregates, quantiles=(0.1, 0.5, 0.9)):
+    """
+    Writes one row per cohort and statistic: cohort, statistic, count, wealth in year 0 ... year 40
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        years = len(next(iter(aggregates.values())).total) if aggregates else 0
+        writer.writerow(["cohort", "statistic", "count"] + [f"year_{year}" for year in range(years)])
+        for label in sorted(aggregates):
+            aggregate = aggregates[label]
+            for statistic, values in aggregate.curves(quantiles).items():
+                writer.writerow([label, statistic, aggregate.count] + [f"{value:.2f}" for value in values])
+
+
+def run_tests():
+    """
+    Runs test cases for the cohort simulator
+    """
+    import os
+    import tempfile
+
+    from main import Person, Simulation
+
+    rows = [
+        ["young", "1", "40000", "", "20000", "150000"],
+        ["young", "nfl", "45000", "1000", "", "150000"],
+        ["senior", "yes", "90000", "50000", "0", "400000"],
+        ["senior", "0", "", "", "10000", ""],
+        ["young", "true", "59000", "5000", "30100", "175000"],
+    ]
+    header = ["cohort", "is_financially_literate", "income", "initial_savings", "initial_debt", "house_cost"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "profiles.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+        aggregates = run_cohorts(path, chunk_size=2)
+        assert sorted(aggregates) == ["senior", "young"], "There should be one aggregate per cohort"
+        assert aggregates["young"].count == 3 and aggregates["young"].fl_count == 2, "Cohort counts should be right"
+
+        # Mean curve of "young" against one Person per row
+        histories = []
+        for row in rows:
+            if row[0] != "young":
+                continue
+            values = {name: float(value) for name, value in zip(header[2:], row[2:]) if value}
+            person = Person(_parse_flag(row[1]), SimulationConfig(**values))
+            histories.append(Simulation(person, closed_form=True).run_simulation())
+        expected_mean = np.mean(histories, axis=0)
+        assert np.allclose(aggregates["young"].mean(), expected_mean), "Cohort mean should match Person/Simulation"
+        assert np.array_equal(aggregates["young"].maximum, np.max(histories, axis=0)), "Cohort max should match"
+        print("run_cohorts test passed!")
+
+        one_chunk = run_cohorts(path, chunk_size=100)
+        assert np.allclose(one_chunk["senior"].total, aggregates["senior"].total), "Chunk size should not change the results"
+        print("chunked loading test passed!")
+
+        output = os.path.join(directory, "curves.csv")
+        write_cohort_curves(output, aggregates)
+        with open(output) as f:
+            lines = list(csv.reader(f))
+        assert len(lines) == 1 + 2 * 7, "There should be 7 curves per cohort"
+        assert lines[0][-1] == "year_40", "Columns should go up to year 40"
+        print("write_cohort_curves test passed!")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-cohort wealth curves for a CSV of person profiles")
+    parser.add_argument("profiles", help="CSV of person profiles")
+    parser.add_argument("--output", default="cohort_curves.csv", help="where to write the curves")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="profiles simulated at once")
+    args = parser.parse_args(argv)
+    aggregates = run_cohorts(args.profiles, args.chunk_size)
+    write_cohort_curves(args.output, aggregates)
+    for label in sorted(aggregates):
+        aggregate = aggregates[label]
+        print(f"{label}: {aggregate.count:,} people, mean wealth after {len(aggregate.total) - 1} years ${aggregate.mean()[-1]:,.0f}")
+    print(f"Curves written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
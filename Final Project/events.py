@@ -0,0 +1,332 @@
+"""
+Event-driven, month-resolution version of the simulation
+Instead of the fixed income -> savings -> debt -> housing order of Simulation.run_simulation,
+every step is an event in a priority queue, handled by the functions registered for it.
+New life events (job loss, refinancing, a second house, ...) are new handlers, not a rewrite of the loop.
+
+Monthly debt and mortgage payments are not events: they are flows that run between events.
+When nothing happens for k months, the flows are fast-forwarded with the closed-form formulas
+(see Person.update_debt_closed_form / mortgage_factors in main.py), so a 480-month horizon
+only costs a few array operations per event, for any number of people.
+
+This file contains:
+- Event dataclass
+- EventSimulation class (scheduler, flows and the default yearly calendar)
+- job_loss, refinance, second_house handlers (examples of pluggable life events)
+"""
+
+import heapq
+import itertools
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from main import DEBT_MINIMUM_RATE, MONTHS_IN_YEAR, PersonArray, mortgage_factors
+
+# Order of the events that happen in the same month (lowest first)
+# Year end events come before the next year's start events
+PRIORITIES = {
+    "debt_interest": 0,
+    "year_end": 1,
+    "housing": 2,
+    "record_wealth": 3,
+    "income": 10,
+    "savings_interest": 11,
+    "reamortize": 12,
+}
+DEFAULT_PRIORITY = 20
+
+
+@dataclass
+class Event:
+    """
+    Something that happens at a given month
+    mask selects the people it applies to (None means everyone), data holds the event's parameters
+    """
+    name: str
+    month: int
+    mask: np.ndarray = None
+    data: dict = field(default_factory=dict)
+
+
+class EventSimulation:
+    """
+    Runs a PersonArray month by month from a priority queue of events
+    The default calendar reproduces Simulation.run_simulation (with the closed-form steps):
+        start of every year: income, savings_interest, reamortize (mortgage payment for the year)
+        end of every year: debt_interest, year_end (stats), housing (buy or rent), record_wealth
+    """
+    def __init__(self, people: PersonArray):
+        self.people = people
+        self.config = people.config
+        self.horizon = self.config.total_years * MONTHS_IN_YEAR
+        self.month = 0
+        self.handlers = {}
+        self.queue = []
+        # set by schedule_years, so run() adds the default calendar once even if other events were scheduled
+        self.calendar_scheduled = False
+        self._order = itertools.count()
+        n = len(people)
+        # mortgage payment of every owner, set by the reamortize events
+        self.monthly_payment = np.zeros(n)
+        # scales the next income event (a job loss lowers it)
+        self.income_factor = np.ones(n)
+        self.debt_paid_this_year = np.zeros(n)
+        # Stats tracked by Simulation, one per person
+        self.years_in_debt = np.zeros(n, dtype=np.int64)
+        self.rented_years = np.zeros(n, dtype=np.int64)
+        self.total_debt_paid = np.zeros(n)
+        self.wealth_history = []
+        # The Person policies are the default handlers
+        self.register("income", _income)
+        self.register("savings_interest", lambda sim, event: sim.people.update_savings())
+        self.register("reamortize", _reamortize)
+        self.register("debt_interest", _debt_interest)
+        self.register("year_end", _year_end)
+        self.register("housing", _housing)
+        self.register("record_wealth", lambda sim, event: sim.wealth_history.append(sim.people.get_wealth()))
+        self.register("job_loss", job_loss)
+        self.register("refinance", refinance)
+        self.register("second_house", second_house)
+
+    def register(self, name: str, handler, replace: bool = False):
+        """
+        Registers handler(sim, event) for the events called name
+        Handlers run in registration order; replace=True drops the ones already registered
+        """
+        if replace or name not in self.handlers:
+            self.handlers[name] = []
+        self.handlers[name].append(handler)
+
+    def schedule(self, name: str, month: int, mask=None, **data):
+        """
+        Schedules an event; month is counted from the start of the simulation (12 is the end of year 1)
+        """
+        if month < self.month:
+            raise ValueError(f"Can't schedule {name!r} at month {month}, the simulation is at month {self.month}")
+        event = Event(name, month, None if mask is None else np.asarray(mask, dtype=bool), data)
+        heapq.heappush(self.queue, (month, PRIORITIES.get(name, DEFAULT_PRIORITY), next(self._order), event))
+        return event
+
+    def schedule_years(self):
+        """
+        Schedules the default yearly calendar for the whole horizon (run() calls it if it wasn't called yet)
+        """
+        if self.calendar_scheduled:
+            return
+        self.calendar_scheduled = True
+        self.schedule("record_wealth", 0)
+        for year in range(1, self.config.total_years + 1):
+            start = (year - 1) * MONTHS_IN_YEAR
+            for name in ["income", "savings_interest", "reamortize"]:
+                self.schedule(name, start)
+            for name in ["debt_interest", "year_end", "housing", "record_wealth"]:
+                self.schedule(name, year * MONTHS_IN_YEAR)
+
+    def run(self):
+        """
+        Processes every event in order, fast-forwarding the payments between them
+
+        Returns:
+            wealth_history [np.ndarray]: (N, number of record_wealth events) matrix, (N, 41) with the default calendar
+        """
+        self.schedule_years()
+        while self.queue:
+            month, _, _, event = heapq.heappop(self.queue)
+            if month > self.horizon:
+                break
+            self.fast_forward(month - self.month)
+            self.month = month
+            for handler in self.handlers.get(event.name, []):
+                handler(self, event)
+        self.fast_forward(self.horizon - self.month)
+        self.month = self.horizon
+        return np.stack(self.wealth_history, axis=1)
+
+    def fast_forward(self, months: int):
+        """
+        Makes months of debt and mortgage payments at once (closed form, no month loop)
+        """
+        if months <= 0:
+            return
+        people = self.people
+        # Debt: debt = 0.97 * debt - extra every month, cleared debts are paid in full
+        in_debt = people.debt > 0
+        if in_debt.any():
+            factor = (1 - DEBT_MINIMUM_RATE) ** months
+            remaining = people.debt * factor - people.extra_debt_payment * ((1 - factor) / DEBT_MINIMUM_RATE)
+            cleared = in_debt & (remaining <= 0)
+            still_owed = in_debt & (remaining > 0)
+            self.debt_paid_this_year += np.where(cleared, people.debt, 0.0)
+            self.debt_paid_this_year[still_owed] += people.debt[still_owed] - remaining[still_owed]
+            people.debt[:] = np.where(still_owed, remaining, 0.0)
+        # Mortgage: loan = (1 + r) * loan - payment every month
+        paying = (people.loan > 0) & (self.monthly_payment > 0)
+        if paying.any():
+            loan = people.loan[paying]
+            payment = self.monthly_payment[paying]
+            monthly_interest = people.mortgage_rate[paying] / 12
+            growth = (1 + monthly_interest) ** months
+            remaining = loan * growth - payment * (growth - 1) / monthly_interest
+            # loans paid off before the end of the span: count only the months until then
+            with np.errstate(divide="ignore", invalid="ignore"):
+                months_to_clear = np.ceil(np.log(payment / (payment - monthly_interest * loan)) / np.log1p(monthly_interest))
+            months_paid = np.where(remaining > 0, months, np.minimum(months_to_clear, months))
+            people.checking[paying] -= payment * months_paid
+            people.loan[paying] = np.maximum(remaining, 0.0)
+            self.monthly_payment[paying] = np.where(remaining > 0, payment, 0.0)
+
+    def everyone(self, event: Event):
+        """
+        Returns the mask of the people an event applies to
+        """
+        return np.ones(len(self.people), dtype=bool) if event.mask is None else event.mask
+
+
+def _income(sim: EventSimulation, event: Event):
+    """
+    Person.add_income, scaled down for the people that lost their job this year
+    """
+    people = sim.people
+    if np.all(sim.income_factor == 1):
+        people.add_income()
+        return
+    people.savings += people.savings_deposit * sim.income_factor
+    people.checking += people.checking_deposit * sim.income_factor
+    sim.income_factor[:] = 1
+
+
+def _reamortize(sim: EventSimulation, event: Event):
+    """
+    Sets this year's mortgage payment: the loan over 360 months at the current rate (as in Person.update_mortgage)
+    """
+    people = sim.people
+    owners = sim.everyone(event) & people.has_house & (people.loan > 0)
+    sim.monthly_payment[:] = 0
+    for rate in np.unique(people.mortgage_rate[owners]):
+        group = owners & (people.mortgage_rate == rate)
+        discount_factor, _, _ = mortgage_factors(float(rate))
+        sim.monthly_payment[group] = people.loan[group] / discount_factor
+
+
+def _debt_interest(sim: EventSimulation, event: Event):
+    """
+    20% annual interest on the remaining debt
+    """
+    people = sim.people
+    people.debt[people.debt > 0] *= 1.2
+
+
+def _year_end(sim: EventSimulation, event: Event):
+    """
+    Yearly stats, counted like Simulation.run_simulation
+    """
+    people = sim.people
+    sim.total_debt_paid += sim.debt_paid_this_year
+    sim.debt_paid_this_year[:] = 0
+    sim.years_in_debt += (people.debt > 0) | (people.loan > 0)
+
+
+def _housing(sim: EventSimulation, event: Event):
+    """
+    People without a house buy one if they can afford the down payment, otherwise they pay the year's rent
+    """
+    people = sim.people
+    looking = sim.everyone(event) & ~people.has_house
+    renting = looking & (people.checking < people.down_payment)
+    people.purchase_house(looking)
+    people.pay_rent(renting)
+    sim.rented_years += renting
+
+
+def job_loss(sim: EventSimulation, event: Event):
+    """
+    No income for event.data["months"] months: the next yearly income is reduced accordingly
+    """
+    mask = sim.everyone(event)
+    sim.income_factor[mask] = np.maximum(sim.income_factor[mask] - event.data["months"] / MONTHS_IN_YEAR, 0)
+
+
+def refinance(sim: EventSimulation, event: Event):
+    """
+    Owners switch to event.data["rate"] and their payment is recomputed over a new 360-month term
+    """
+    people = sim.people
+    owners = sim.everyone(event) & (people.loan > 0)
+    rate = event.data["rate"]
+    people.mortgage_rate[owners] = rate
+    discount_factor, _, _ = mortgage_factors(float(rate))
+    sim.monthly_payment[owners] = people.loan[owners] / discount_factor
+
+
+def second_house(sim: EventSimulation, event: Event):
+    """
+    Buys another house of event.data["cost"] with event.data["down_payment_share"] down, if checking allows it
+    The new loan is added to the mortgage and the payment is recomputed
+    """
+    people = sim.people
+    cost = event.data["cost"]
+    down_payment = event.data.get("down_payment_share", 0.20) * cost
+    buyers = sim.everyone(event) & (people.checking >= down_payment)
+    people.checking[buyers] -= down_payment
+    people.loan[buyers] += cost - down_payment
+    people.has_house |= buyers
+    for rate in np.unique(people.mortgage_rate[buyers]):
+        group = buyers & (people.mortgage_rate == rate)
+        discount_factor, _, _ = mortgage_factors(float(rate))
+        sim.monthly_payment[group] = people.loan[group] / discount_factor
+
+
+def run_tests():
+    """
+    Runs test cases for the event-driven simulation
+    """
+    from main import Person, Simulation
+
+    # The default calendar reproduces Simulation
+    sim = EventSimulation(PersonArray([True, False]))
+    history = sim.run()
+    assert history.shape == (2, 41), "Wealth history should be (N, 41)"
+    for i, is_fl in enumerate([True, False]):
+        expected = Simulation(Person(is_fl))
+        assert list(history[i]) == expected.run_simulation(), "Event engine should match Simulation"
+        assert sim.rented_years[i] == expected.rented_years, "Rented years should match Simulation"
+        assert sim.years_in_debt[i] == expected.years_in_debt, "Years in debt should match Simulation"
+        assert abs(sim.total_debt_paid[i] - expected.total_debt_paid) < 1e-6, "Total debt paid should match Simulation"
+    print("EventSimulation default calendar test passed!")
+
+    # Life events only change the people they apply to
+    baseline = history
+    sim = EventSimulation(PersonArray([True, True, False, False]))
+    sim.schedule_years()
+    sim.schedule("job_loss", 60, mask=[True, False, False, False], months=6)
+    sim.schedule("refinance", 125, mask=[False, False, True, False], rate=0.03)
+    history = sim.run()
+    assert history[0, -1] < baseline[0, -1], "A job loss should lower the final wealth"
+    assert history[1, -1] == baseline[0, -1], "People without events should not change"
+    assert history[2, -1] > baseline[1, -1], "Refinancing at a lower rate should raise the final wealth"
+    assert sim.people.mortgage_rate[2] == 0.03, "Refinance should change the mortgage rate"
+    # The calendar is added by run() even when events were scheduled first, and only once
+    sim = EventSimulation(PersonArray([True, True, False, False]))
+    sim.schedule("job_loss", 60, mask=[True, False, False, False], months=6)
+    sim.schedule("refinance", 125, mask=[False, False, True, False], rate=0.03)
+    sim.schedule_years()
+    assert (sim.run() == history).all(), "Events scheduled before the calendar should give the same history"
+    sim = EventSimulation(PersonArray([True, True, False, False]))
+    sim.schedule("job_loss", 60, mask=[True, False, False, False], months=6)
+    sim.schedule("refinance", 125, mask=[False, False, True, False], rate=0.03)
+    assert (sim.run() == history).all(), "run() should add the default calendar to the scheduled events"
+    print("job_loss and refinance test passed!")
+
+    sim = EventSimulation(PersonArray([True]))
+    sim.schedule_years()
+    sim.schedule("second_house", 240, cost=200000.0)
+    loans = []
+    sim.register("record_wealth", lambda sim, event: loans.append(sim.people.loan[0]))
+    sim.run()
+    assert loans[21] > loans[20] + 100000, "A second house should add to the mortgage"
+    print("second_house test passed!")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,273 @@
+"""
+Goal seek for the financial literacy model
+Finds the parameter value that makes a result hit a target, e.g.
+    what NFL savings rate makes NFL match FL wealth at year 40?  Goal("nfl_savings_rate", "wealth_gap", 0.0, 0.2)
+    what house cost delays the FL purchase past year 10?        Goal("house_cost", "fl_purchase_year", 1e5, 1e6, target=10.5)
+
+Every goal is solved by bracketing and secant steps (regula falsi with the Illinois fix, falling back to
+bisection when the bracket stops shrinking), so it also works on step functions like the purchase year.
+All the goals are solved together: every iteration evaluates the next guess of every unfinished goal
+as people of one BatchSimulation. Evaluations are kept in an EvaluationCache, so the bracket ends and
+repeated or overlapping goals are never simulated twice.
+
+This file contains:
+- Goal / GoalResult dataclasses
+- EvaluationCache class
+- goal_seek function
+"""
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+
+from main import DEFAULT_CONFIG, PROFILE_COLUMNS, BatchSimulation, SimulationConfig
+
+METRICS = ["fl_wealth", "nfl_wealth", "wealth_gap", "fl_purchase_year", "nfl_purchase_year"]
+# Relative width of the bracket a goal stops at
+XTOL = 1e-9
+MAX_ITERATIONS = 100
+
+
+@dataclass(frozen=True)
+class Goal:
+    """
+    Find the value of parameter in [low, high] where metric (at the given year, the last one by default) equals target
+    metric: fl_wealth, nfl_wealth, wealth_gap (fl - nfl), fl_purchase_year or nfl_purchase_year
+        (the year a house is bought, total_years + 1 if never)
+    """
+    parameter: str
+    metric: str
+    low: float
+    high: float
+    target: float = 0.0
+    year: int = None
+
+    def __post_init__(self):
+        if self.parameter not in PROFILE_COLUMNS:
+            raise ValueError(f"Unknown parameter {self.parameter!r}, expected one of {PROFILE_COLUMNS}")
+        if self.metric not in METRICS:
+            raise ValueError(f"Unknown metric {self.metric!r}, expected one of {METRICS}")
+        if not self.low < self.high:
+            raise ValueError("low should be less than high")
+
+
+@dataclass(frozen=True)
+class GoalResult:
+    """
+    Solution of a Goal: value of the parameter, metric - target there, and whether the bracket converged
+    """
+    goal: Goal
+    value: float
+    residual: float
+    iterations: int
+    converged: bool
+
+
+class EvaluationCache:
+    """
+    Results of the simulations already run, keyed by (config, parameter, value)
+    Each entry is the FL and NFL wealth histories and purchase years for one parameter value
+    """
+    def __init__(self):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, config: SimulationConfig, parameters, values):
+        """
+        Returns the results for every (parameter, value) pair, simulating the missing ones in one batch
+
+        Returns:
+            list[tuple]: (fl_history, nfl_history, fl_purchase_year, nfl_purchase_year) per pair
+        """
+        keys = [(config, name, float(value)) for name, value in zip(parameters, values)]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.results))
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self._simulate(config, missing)
+        return [self.results[key] for key in keys]
+
+    def _simulate(self, config, keys):
+        # Two people per key (FL then NFL), each with the parameter of their key set, everything else from config
+        n = len(keys)
+        profiles = {}
+        for i, (_, name, value) in enumerate(keys):
+            if name not in profiles:
+                profiles[name] = np.full(2 * n, getattr(config, name), dtype=float)
+            profiles[name][2 * i:2 * i + 2] = value
+        sim = BatchSimulation(np.tile([True, False], n), closed_form=True, config=config, profiles=profiles)
+        history = sim.run_simulation()
+        # nobody rents after buying, so the purchase year is the years of rent + 1
+        purchase_year = np.where(sim.has_house, sim.rented_years + 1, config.total_years + 1)
+        for i, key in enumerate(keys):
+            self.results[key] = (history[2 * i], history[2 * i + 1], purchase_year[2 * i], purchase_year[2 * i + 1])
+
+    def clear(self):
+        self.results.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _residuals(goals, results):
+    """
+    metric - target of every goal for its simulation results
+    """
+    residuals = np.empty(len(goals))
+    for i, (goal, (fl, nfl, fl_purchase, nfl_purchase)) in enumerate(zip(goals, results)):
+        year = -1 if goal.year is None else goal.year
+        metric = {
+            "fl_wealth": lambda: fl[year],
+            "nfl_wealth": lambda: nfl[year],
+            "wealth_gap": lambda: fl[year] - nfl[year],
+            "fl_purchase_year": lambda: fl_purchase,
+            "nfl_purchase_year": lambda: nfl_purchase,
+        }[goal.metric]()
+        residuals[i] = float(metric) - goal.target
+    return residuals
+
+
+def goal_seek(goals, config: SimulationConfig = DEFAULT_CONFIG, xtol: float = XTOL,
+              max_iterations: int = MAX_ITERATIONS, cache: EvaluationCache = None):
+    """
+    Solves every goal at once
+
+    goals: list of Goal
+    config: the values of the parameters that are not solved for
+    xtol: a goal is done when its bracket is narrower than xtol * max(|low|, |high|)
+    cache: EvaluationCache to reuse between calls (a new one by default)
+
+    Returns:
+        list[GoalResult]: one per goal, in the same order. Goals whose metric - target has the same sign
+        at low and high are not bracketed: their value is nan and converged is False
+    """
+    cache = cache if cache is not None else EvaluationCache()
+    parameters = [goal.parameter for goal in goals]
+    a = np.array([goal.low for goal in goals], dtype=float)
+    b = np.array([goal.high for goal in goals], dtype=float)
+    ends = cache.evaluate(config, parameters * 2, np.concatenate([a, b]))
+    fa = _residuals(goals, ends[:len(goals)])
+    fb = _residuals(goals, ends[len(goals):])
+    tolerance = xtol * np.maximum(np.abs(a), np.abs(b))
+
+    bracketed = np.sign(fa) != np.sign(fb)
+    # an end that hits the target exactly is the answer
+    exact = (fa == 0) | (fb == 0)
+    b = np.where(fb == 0, b, np.where(fa == 0, a, b))
+    fb = np.where(exact, 0.0, fb)
+    active = bracketed & ~exact
+    iterations = np.zeros(len(goals), dtype=int)
+    # Illinois: the weight of the end that was kept last time, and the bracket width for the bisection fallback
+    last_kept = np.zeros(len(goals), dtype=int)
+    width = np.full(len(goals), np.inf)
+
+    for _ in range(max_iterations):
+        active &= np.abs(b - a) > tolerance
+        if not active.any():
+            break
+        index = np.flatnonzero(active)
+        ai, bi, fai, fbi = a[index], b[index], fa[index], fb[index]
+        c = (ai * fbi - bi * fai) / (fbi - fai)
+        # bisect if the secant point is outside the bracket or the bracket shrank by less than half last time
+        slow = np.abs(bi - ai) > 0.5 * width[index]
+        bisect = slow | ~(np.minimum(ai, bi) < c) | ~(c < np.maximum(ai, bi))
+        c = np.where(bisect, (ai + bi) / 2, c)
+        width[index] = np.abs(bi - ai)
+        fc = _residuals([goals[i] for i in index], cache.evaluate(config, [parameters[i] for i in index], c))
+        iterations[index] += 1
+
+        # keep the end with the opposite sign to c
+        replace_a = np.sign(fc) == np.sign(fai)
+        done = fc == 0
+        new_a = np.where(replace_a, c, ai)
+        new_b = np.where(replace_a, bi, c)
+        new_fa = np.where(replace_a, fc, fai)
+        new_fb = np.where(replace_a, fbi, fc)
+        # Illinois fix: halve the weight of an end kept twice in a row, so the secant doesn't stall on one side
+        kept = np.where(replace_a, 2, 1)
+        new_fb = np.where(replace_a & (last_kept[index] == 2), new_fb / 2, new_fb)
+        new_fa = np.where(~replace_a & (last_kept[index] == 1), new_fa / 2, new_fa)
+        last_kept[index] = kept
+        a[index], b[index], fa[index], fb[index] = new_a, new_b, new_fa, new_fb
+        b[index[done]] = c[done]
+        fb[index[done]] = 0.0
+        active[index[done]] = False
+
+    # The answer is the end of the final bracket with the smallest residual (re-read from the cache, fa/fb are weighted)
+    values = np.where(np.abs(fa) < np.abs(fb), a, b)
+    values = np.where(bracketed | exact, values, np.nan)
+    residuals = np.full(len(goals), np.nan)
+    solved = np.flatnonzero(bracketed | exact)
+    if solved.size:
+        residuals[solved] = _residuals([goals[i] for i in solved],
+                                       cache.evaluate(config, [parameters[i] for i in solved], values[solved]))
+    converged = (bracketed | exact) & ((np.abs(b - a) <= tolerance) | (residuals == 0))
+    return [GoalResult(goals[i], float(values[i]), float(residuals[i]), int(iterations[i]), bool(converged[i]))
+            for i in range(len(goals))]
+
+
+def run_tests():
+    """
+    Runs test cases for the goal seek
+    """
+    from dataclasses import replace
+
+    from main import Person, Simulation
+
+    # NFL savings rate that closes the gap at year 40
+    cache = EvaluationCache()
+    [result] = goal_seek([Goal("nfl_savings_rate", "wealth_gap", 0.0, 0.2)], cache=cache)
+    assert result.converged, "The wealth gap goal should converge"
+    config = replace(DEFAULT_CONFIG, nfl_savings_rate=result.value)
+    fl = Simulation(Person(True, config), closed_form=True).run_simulation()[-1]
+    nfl = Simulation(Person(False, config), closed_form=True).run_simulation()[-1]
+    assert abs(fl - nfl) <= 1, "At the solution NFL should match FL wealth"
+    assert 0.07 < result.value < 0.08, "NFL needs a bit more than the FL return to make up for the pricier mortgage"
+    print(f"goal_seek wealth gap test passed! (NFL savings rate {result.value:.4%} in {result.iterations} iterations)")
+
+    # House cost that pushes the FL purchase past year 10 (a step function)
+    [result] = goal_seek([Goal("house_cost", "fl_purchase_year", 100000.0, 2000000.0, target=10.5)])
+    assert result.converged, "The purchase year goal should converge"
+    def purchase_year(house_cost):
+        sim = Simulation(Person(True, replace(DEFAULT_CONFIG, house_cost=house_cost)), closed_form=True)
+        sim.run_simulation()
+        return sim.rented_years + 1
+    assert purchase_year(result.value * (1 - 1e-6)) <= 10 < purchase_year(result.value * (1 + 1e-6)), "Should find the threshold"
+    print(f"goal_seek purchase year test passed! (house cost ${result.value:,.0f})")
+
+    # Many targets at once give the same answers as one at a time, and the cache is reused
+    targets = [1e6, 2e6, 3e6]
+    goals = [Goal("income", "fl_wealth", 10000.0, 200000.0, target=target) for target in targets]
+    together = goal_seek(goals, cache=cache)
+    for goal, result in zip(goals, together):
+        [alone] = goal_seek([goal])
+        assert result.converged and abs(result.value - alone.value) <= 1e-6 * alone.value, "Batched goals should match"
+        assert abs(result.residual) <= 1, "Wealth should hit the target"
+    misses = cache.misses
+    goal_seek(goals, cache=cache)
+    assert cache.misses == misses and cache.hits > 0, "Solving the same goals again should only use the cache"
+    print("goal_seek batch and cache test passed!")
+
+    [result] = goal_seek([Goal("income", "fl_wealth", 10000.0, 20000.0, target=1e9)])
+    assert not result.converged and np.isnan(result.value), "A target outside the bracket should not converge"
+    print("goal_seek bracket test passed!")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Finds the parameter value that makes a metric hit a target")
+    parser.add_argument("parameter", choices=PROFILE_COLUMNS)
+    parser.add_argument("metric", choices=METRICS)
+    parser.add_argument("low", type=float)
+    parser.add_argument("high", type=float)
+    parser.add_argument("--target", type=float, nargs="+", default=[0.0], help="one goal per target")
+    parser.add_argument("--year", type=int, help="year the wealth metrics are read at (last year by default)")
+    args = parser.parse_args(argv)
+    goals = [Goal(args.parameter, args.metric, args.low, args.high, target, args.year) for target in args.target]
+    for result in goal_seek(goals):
+        status = "" if result.converged else " (not bracketed or did not converge)"
+        print(f"{args.metric} = {result.goal.target:,g}: {args.parameter} = {result.value:.6g}{status}")
+
+
+if __name__ == "__main__":
+    main()
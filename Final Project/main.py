@@ -3,15 +3,31 @@ CS 150 Final Project: 40-year Simulation in financial literacy
 Author: Aya Ben Saghroune
 Edit Date: Thursday, March 20th, 2025
 This file contains:
+- SimulationConfig dataclass (all the model parameters, defaults are the constants below)
 - Person class
 - Simulation class
+- SimulationTrace class (opt-in per-year columns of a Simulation, saved as .npy/.npz/Parquet)
+- PersonArray / PersonView classes (struct-of-arrays version of Person, with memory_per_person to compare)
+- BatchSimulation class (NumPy version of Simulation for many people at once)
+- closed-form yearly debt and mortgage steps (no month loop)
+- AmortizationCache class (LRU cache of mortgage schedules, shared by people with the same loan and rate)
 - run_tests function
-- Main program
+- Main program (command line: python main.py --help)
 
 A UML diagram and a FinancialLiteracyResponses.txt file for responses are submitted separately
 
 """
 
+import argparse
+import csv
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+
+import numpy as np
+
 # Constants
 INITIAL_SAVINGS = 5000.0
 INITIAL_DEBT = 30100.0
@@ -29,33 +45,195 @@ MORTGAGE_RATE_FL = 0.045  # 4.5% annual for fl
 MORTGAGE_RATE_NFL = 0.05  # 5% annual for nfl (including PMI)
 MONTHS_IN_YEAR = 12
 TOTAL_YEARS = 40
+MORTGAGE_TERM_MONTHS = 360  # 30-year mortgage
+DEBT_MINIMUM_RATE = 0.03  # minimum monthly debt payment: 3% of the remaining debt
+
+# Closed-form debt step: paying 3% + extra every month for a year is a geometric series
+#   debt after 12 months = debt * 0.97**12 - extra * (1 - 0.97**12) / 0.03
+DEBT_YEAR_FACTOR = (1 - DEBT_MINIMUM_RATE) ** MONTHS_IN_YEAR
+DEBT_YEAR_ANNUITY = (1 - DEBT_YEAR_FACTOR) / DEBT_MINIMUM_RATE
+# The closed-form steps only differ from the month loops by floating point rounding
+# Accounts stay within this relative tolerance of the loop over a full 40-year run
+CLOSED_FORM_TOLERANCE = 1e-9
+
+
+@lru_cache(maxsize=None)
+def mortgage_factors(rate: float):
+    """
+    Returns the yearly amortization factors for an annual mortgage rate (cached per rate)
+
+    The monthly payment is loan / discount_factor, and after 12 payments:
+        loan = loan * growth - monthly_payment * (growth - 1) / monthly_interest
+    where growth = (1 + monthly_interest)**12
+
+    Returns:
+        (discount_factor, yearly_payment_factor, yearly_balance_factor):
+            12 monthly payments = loan * yearly_payment_factor
+            loan after a year   = loan * yearly_balance_factor
+    """
+    monthly_interest = rate / 12
+    compounded = (1 + monthly_interest) ** MORTGAGE_TERM_MONTHS
+    discount_factor = (compounded - 1) / (monthly_interest * compounded)
+    growth = (1 + monthly_interest) ** MONTHS_IN_YEAR
+    yearly_payment_factor = MONTHS_IN_YEAR / discount_factor
+    yearly_balance_factor = growth - (growth - 1) / (monthly_interest * discount_factor)
+    return discount_factor, yearly_payment_factor, yearly_balance_factor
+
+
+@dataclass(frozen=True)
+class AmortizationSchedule:
+    """
+    One year of mortgage payments for a (principal, rate, term), computed with the same month loop as update_mortgage
+    balances: loan balance after each payment made (fewer than 12 if the loan was cleared)
+    final_balance: loan balance at the end of the year
+    """
+    monthly_payment: float
+    balances: tuple
+    final_balance: float
+
+
+class AmortizationCache:
+    """
+    Bounded LRU cache of amortization schedules keyed by (principal, rate, term)
+    People with the same loan and rate (e.g. everyone who bought the same house in the same year) share
+    one schedule, so after the first of them a year of mortgage payments is a table lookup.
+    hits and misses count the lookups, to check that the cache pays off for a workload.
+    """
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.schedules = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, principal: float, rate: float, term: int = MORTGAGE_TERM_MONTHS):
+        """
+        Returns the AmortizationSchedule of a loan, computing it on a miss
+        """
+        key = (principal, rate, term)
+        schedule = self.schedules.get(key)
+        if schedule is not None:
+            self.hits += 1
+            self.schedules.move_to_end(key)
+            return schedule
+        self.misses += 1
+        schedule = amortization_schedule(principal, rate, term)
+        self.schedules[key] = schedule
+        if len(self.schedules) > self.maxsize:
+            # drop the least recently used schedule
+            self.schedules.popitem(last=False)
+        return schedule
+
+    def hit_rate(self):
+        """
+        Returns the share of lookups that were hits (0 if there weren't any)
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.schedules.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def amortization_schedule(principal: float, rate: float, term: int = MORTGAGE_TERM_MONTHS):
+    """
+    Computes one year of payments of a loan over term months, exactly like Person.update_mortgage
+    """
+    monthly_interest = rate / 12
+    discount_factor = ((1 + monthly_interest) ** term - 1) / (monthly_interest * ((1 + monthly_interest) ** term))
+    monthly_payment = principal / discount_factor
+    loan = principal
+    balances = []
+    for _ in range(MONTHS_IN_YEAR):
+        if loan <= 0:
+            loan = 0
+            break
+        interest_payment = loan * monthly_interest
+        principal_payment = monthly_payment - interest_payment
+        loan -= principal_payment
+        balances.append(loan)
+    return AmortizationSchedule(monthly_payment, tuple(balances), loan)
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """
+    All the parameters of the model in one place, so scenarios don't require editing the constants
+    The defaults are the constants above (the assignment's scenario)
+    Derived values (yearly rent, deposits, down payments) are computed from the fields
+    """
+    initial_savings: float = INITIAL_SAVINGS
+    initial_debt: float = INITIAL_DEBT
+    house_cost: float = HOUSE_COST
+    monthly_rent: float = MONTHLY_RENT
+    income: float = INCOME
+    savings_share: float = 0.20  # share of income deposited into savings
+    checking_share: float = 0.30  # share of income deposited into checking
+    fl_savings_rate: float = FL_SAVINGS_RATE
+    nfl_savings_rate: float = NFL_SAVINGS_RATE
+    down_payment_share_fl: float = 0.20
+    down_payment_share_nfl: float = 0.05
+    mortgage_rate_fl: float = MORTGAGE_RATE_FL
+    mortgage_rate_nfl: float = MORTGAGE_RATE_NFL
+    total_years: int = TOTAL_YEARS
+    rent_per_year: float = field(init=False)
+    savings_deposit: float = field(init=False)
+    checking_deposit: float = field(init=False)
+    house_down_payment_fl: float = field(init=False)
+    house_down_payment_nfl: float = field(init=False)
+
+    def __post_init__(self):
+        # frozen dataclass: derived fields have to be set through object.__setattr__
+        object.__setattr__(self, "rent_per_year", self.monthly_rent * 12)
+        object.__setattr__(self, "savings_deposit", self.income * self.savings_share)
+        object.__setattr__(self, "checking_deposit", self.income * self.checking_share)
+        object.__setattr__(self, "house_down_payment_fl", self.down_payment_share_fl * self.house_cost)
+        object.__setattr__(self, "house_down_payment_nfl", self.down_payment_share_nfl * self.house_cost)
+
+
+DEFAULT_CONFIG = SimulationConfig()
+
+# Parameters that can differ from one person to the next in a PersonArray (see the profiles argument)
+# Every float parameter of SimulationConfig; only total_years has to be shared
+PROFILE_COLUMNS = [
+    "income", "initial_savings", "initial_debt", "house_cost", "monthly_rent",
+    "savings_share", "checking_share", "fl_savings_rate", "nfl_savings_rate",
+    "down_payment_share_fl", "down_payment_share_nfl", "mortgage_rate_fl", "mortgage_rate_nfl",
+]
+
 
 class Person:
     """
     Represents a person with financial attributes and methods to update their accounts.
     """
-    def __init__(self, is_financially_literate: bool):
+    # No per-instance __dict__: saves memory when holding many people
+    __slots__ = ("is_financially_literate", "config", "savings", "checking", "debt", "loan", "has_house", "mortgage_rate")
+
+    def __init__(self, is_financially_literate: bool, config: SimulationConfig = DEFAULT_CONFIG):
         """
         Initializes the person
         
         is_financially_literate: True if the person is fl, False otherwise (nfl)
+        config: the model parameters (defaults to the assignment's constants)
         """
         self.is_financially_literate = is_financially_literate
-        self.savings = INITIAL_SAVINGS
+        self.config = config
+        self.savings = config.initial_savings
         self.checking = 0.0
-        self.debt = INITIAL_DEBT
+        self.debt = config.initial_debt
         self.loan = 0.0
         self.has_house = False
         # Set the appropriate mortgage rate
-        self.mortgage_rate = MORTGAGE_RATE_FL if is_financially_literate else MORTGAGE_RATE_NFL
+        self.mortgage_rate = config.mortgage_rate_fl if is_financially_literate else config.mortgage_rate_nfl
 
     def add_income(self):
         """
         Adds the annual income in savings and checking
         $11,800 goes to savings and $17,700 goes to checking
         """
-        self.savings += SAVINGS_DEPOSIT
-        self.checking += CHECKING_DEPOSIT
+        self.savings += self.config.savings_deposit
+        self.checking += self.config.checking_deposit
 
     def update_savings(self):
         """
@@ -64,7 +242,7 @@ class Person:
         nfl uses a simple savings account of 1% return
         """
         # assign interest rate depending on financial_literacy status
-        rate = FL_SAVINGS_RATE if self.is_financially_literate else NFL_SAVINGS_RATE
+        rate = self.config.fl_savings_rate if self.is_financially_literate else self.config.nfl_savings_rate
         # savings increase by interest_rate after one year 
         self.savings *= (1 + rate)
 
@@ -86,7 +264,7 @@ class Person:
                 self.debt = 0
                 # debt is paid off, move on
                 break 
-            monthly_minimum = self.debt * 0.03
+            monthly_minimum = self.debt * DEBT_MINIMUM_RATE
             #extra $15 for fl, extra $1 for nfl
             additional = 15 if self.is_financially_literate else 1 
             payment = monthly_minimum + additional
@@ -106,11 +284,12 @@ class Person:
         """
         # check if rent amount is available in checking account
             # -> avoid a negative checking balance 
-        if self.checking > RENT_PER_YEAR:
-            self.checking -= RENT_PER_YEAR
+        rent = self.config.rent_per_year
+        if self.checking > rent:
+            self.checking -= rent
         # if not, take the remaining amount from savings balance 
         else:
-            self.savings -= (RENT_PER_YEAR - self.checking)
+            self.savings -= (rent - self.checking)
             self.checking = 0
 
     def purchase_house(self):
@@ -127,23 +306,31 @@ class Person:
         I created a separate method to update mortgage loan balance with applied interest every year
         """
         if self.is_financially_literate:
-            down_payment = HOUSE_DOWN_PAYMENT_FL
+            down_payment = self.config.house_down_payment_fl
         else:
-            down_payment = HOUSE_DOWN_PAYMENT_NFL
+            down_payment = self.config.house_down_payment_nfl
         if self.checking >= down_payment:
             self.checking -= down_payment
-            self.loan = HOUSE_COST - down_payment
+            self.loan = self.config.house_cost - down_payment
             self.has_house = True
 
-    def update_mortgage(self):
+    def update_mortgage(self, cache=None):
         """
         Update mortgage loan balance with applied interest every year
         The monthly payment is calculated based on a 30-year term (360 months) and the applicable mortgage rate based on fl status
         Eveery month, the payment reduces the loan balance and is deducted from the checking account.
+
+        cache: optional AmortizationCache, the year's payments are then looked up instead of computed (same result)
         """
         if self.loan <= 0:
             return
-        N = 360  # total number of payments (30 years -> 360 months)
+        if cache is not None:
+            schedule = cache.get(self.loan, self.mortgage_rate)
+            for _ in schedule.balances:
+                self.checking -= schedule.monthly_payment
+            self.loan = schedule.final_balance
+            return
+        N = MORTGAGE_TERM_MONTHS  # total number of payments (30 years -> 360 months)
         monthly_interest = self.mortgage_rate / 12 
         # Calculate the discount factor
         discount_factor = ((1 + monthly_interest) ** N - 1) / (monthly_interest * ((1 + monthly_interest) ** N))
@@ -157,6 +344,44 @@ class Person:
             self.loan -= principal_payment
             self.checking -= monthly_payment
 
+    def update_debt_closed_form(self):
+        """
+        Same result as update_debt, computed with the geometric series instead of the 12-month loop
+
+        While the payment is smaller than the debt, every month is debt = 0.97 * debt - additional
+        If the series goes to zero or below during the year, the debt was cleared and everything was paid
+
+        Returns:
+            total_payment: Total debt payment made during the year
+        """
+        if self.debt <= 0:
+            self.debt = 0
+            return 0.0
+        additional = 15 if self.is_financially_literate else 1
+        remaining = self.debt * DEBT_YEAR_FACTOR - additional * DEBT_YEAR_ANNUITY
+        if remaining <= 0:
+            # debt cleared this year: the whole balance was paid
+            total_payment = self.debt
+            self.debt = 0
+            return total_payment
+        total_payment = self.debt - remaining
+        # 20% annual interest on the remaining debt
+        self.debt = remaining * 1.2
+        return total_payment
+
+    def update_mortgage_closed_form(self):
+        """
+        Same result as update_mortgage, using the cached yearly amortization factors for the mortgage rate
+
+        The payment is re-amortized over 360 months every year, so the loan never clears within a year
+        and all 12 payments are always made
+        """
+        if self.loan <= 0:
+            return
+        _, yearly_payment_factor, yearly_balance_factor = mortgage_factors(self.mortgage_rate)
+        self.checking -= self.loan * yearly_payment_factor
+        self.loan *= yearly_balance_factor
+
     def get_wealth(self):
         """
         Returns the Person's wealth, qhich is:
@@ -176,8 +401,17 @@ class Simulation:
     Simulates 40 years of financial decisions for a Person instance
     Tracks the number of years in debt, years spent renting, and total debt paid.
     """
-    def __init__(self, person: Person):
+    def __init__(self, person: Person, closed_form: bool = False, mortgage_cache=None, trace: bool = False):
+        """
+        person: the Person to simulate
+        closed_form: True to use the closed-form yearly debt and mortgage steps instead of the month loops
+        mortgage_cache: optional AmortizationCache for the mortgage payments (can be shared between simulations)
+        trace: True to record the accounts and payments of every year in self.trace (a SimulationTrace)
+        """
         self.person = person
+        self.closed_form = closed_form
+        self.mortgage_cache = mortgage_cache
+        self.trace = SimulationTrace(person.config.total_years) if trace else None
         self.years_in_debt = 0
         self.rented_years = 0
         self.total_debt_paid = 0.0
@@ -200,7 +434,12 @@ class Simulation:
         # Record initial wealth (should be -25100 for 5000 - 30100 = -25100)
         wealth_history.append(self.person.get_wealth())
         
-        for _ in range(1, TOTAL_YEARS + 1):
+        config = self.person.config
+        # one check per year when tracing is off
+        trace = self.trace
+        if trace is not None:
+            trace.record(0, self.person)
+        for year in range(1, config.total_years + 1):
 
             # Add annual income
             self.person.add_income()
@@ -210,7 +449,10 @@ class Simulation:
 
             # Update debt with monthly payments and annual interest
 
-            debt_payment = self.person.update_debt() #Note: all corresponding interest rates are taken into account in
+            if self.closed_form:
+                debt_payment = self.person.update_debt_closed_form()
+            else:
+                debt_payment = self.person.update_debt() #Note: all corresponding interest rates are taken into account in
             self.total_debt_paid += debt_payment
 
             # Count year as in debt if any debt or mortgage remains
@@ -218,8 +460,10 @@ class Simulation:
                 self.years_in_debt += 1
             
             # Housing: if no house has been purchased, check if down payment can be made
+            if trace is not None:
+                trace.checking_before_housing = self.person.checking
             if not self.person.has_house:
-                threshold = HOUSE_DOWN_PAYMENT_FL if self.person.is_financially_literate else HOUSE_DOWN_PAYMENT_NFL
+                threshold = config.house_down_payment_fl if self.person.is_financially_literate else config.house_down_payment_nfl
                 if self.person.checking >= threshold:
                     self.person.purchase_house()
                 else:
@@ -227,9 +471,425 @@ class Simulation:
                     self.rented_years += 1
             else:
                 # If a house has been purchased, make monthly mortgage payments
-                self.person.update_mortgage()
+                if self.closed_form:
+                    self.person.update_mortgage_closed_form()
+                else:
+                    self.person.update_mortgage(self.mortgage_cache)
             
             wealth_history.append(self.person.get_wealth())
+            if trace is not None:
+                trace.record(year, self.person, debt_payment)
+        return wealth_history
+
+
+class SimulationTrace:
+    """
+    Per-year record of a Simulation, one preallocated NumPy column per quantity (row = year, row 0 is the start)
+    Only created with Simulation(..., trace=True), so normal runs don't pay for it.
+    """
+    COLUMNS = ["savings", "checking", "debt", "loan", "wealth", "rent_paid", "mortgage_paid", "debt_paid", "has_house"]
+
+    def __init__(self, total_years: int):
+        self.year = np.arange(total_years + 1)
+        self.columns = {name: np.zeros(total_years + 1) for name in self.COLUMNS}
+        self.columns["has_house"] = np.zeros(total_years + 1, dtype=bool)
+        # set by Simulation before the housing step, the mortgage payments are what left checking after it
+        self.checking_before_housing = 0.0
+
+    def record(self, year: int, person: Person, debt_paid: float = 0.0):
+        """
+        Fills the row of a year from the person's accounts at the end of the year and the debt paid during it
+        """
+        columns = self.columns
+        rent_paid = mortgage_paid = 0.0
+        if year > 0 and columns["has_house"][year - 1]:
+            mortgage_paid = self.checking_before_housing - person.checking
+        elif year > 0 and not person.has_house:
+            rent_paid = person.config.rent_per_year
+        columns["savings"][year] = person.savings
+        columns["checking"][year] = person.checking
+        columns["debt"][year] = person.debt
+        columns["loan"][year] = person.loan
+        columns["wealth"][year] = person.savings + person.checking - person.debt - person.loan
+        columns["rent_paid"][year] = rent_paid
+        columns["mortgage_paid"][year] = mortgage_paid
+        columns["debt_paid"][year] = debt_paid
+        columns["has_house"][year] = person.has_house
+
+    def __getitem__(self, name):
+        return self.year if name == "year" else self.columns[name]
+
+    def as_dict(self):
+        """
+        Returns every column (year first) as {name: array}
+        """
+        return {"year": self.year, **self.columns}
+
+    def save(self, path: str):
+        """
+        Saves the columns
+            path ending in .npz: one .npz file with an array per column
+            path ending in .parquet: a Parquet file (needs pyarrow, only imported here)
+            anything else: a directory with one .npy file per column (np.load(..., mmap_mode="r") reads them lazily)
+        """
+        columns = self.as_dict()
+        if path.endswith(".npz"):
+            with open(path, "wb") as f:
+                np.savez(f, **columns)
+        elif path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.table(columns), path)
+        else:
+            os.makedirs(path, exist_ok=True)
+            for name, column in columns.items():
+                np.save(os.path.join(path, f"{name}.npy"), column)
+
+class PersonArray:
+    """
+    Struct-of-arrays version of Person: one NumPy column per attribute, one entry per person
+    Holds millions of people in a few bytes each, and has the same methods as Person working on everyone at once.
+    people[i] is a PersonView of person i that reads and writes the columns.
+    """
+    def __init__(self, is_financially_literate, config: SimulationConfig = DEFAULT_CONFIG, profiles=None):
+        """
+        Initializes N people
+
+        is_financially_literate: sequence of bools, one per person (True for fl, False for nfl)
+        config: the model parameters, shared by everyone
+        profiles: optional dict of per-person values for the PROFILE_COLUMNS (e.g. {"income": [...]})
+            the parameters that are not in it come from config
+        """
+        self.config = config
+        self.is_financially_literate = np.asarray(is_financially_literate, dtype=bool)
+        n = self.is_financially_literate.shape[0]
+        profiles = profiles or {}
+        for name in profiles:
+            if name not in PROFILE_COLUMNS:
+                raise ValueError(f"Unknown profile column {name!r}, expected one of {PROFILE_COLUMNS}")
+        self.profiles = {name: np.asarray(values, dtype=float) for name, values in profiles.items()}
+        # Shared parameters stay plain floats (no memory per person), per-person ones are arrays
+        p = {name: self.profiles.get(name, getattr(config, name)) for name in PROFILE_COLUMNS}
+        self.income = p["income"]
+        self.savings_deposit = p["income"] * p["savings_share"]
+        self.checking_deposit = p["income"] * p["checking_share"]
+        self.rent_per_year = p["monthly_rent"] * 12
+        self.house_cost = p["house_cost"]
+        self.savings = np.array(np.broadcast_to(p["initial_savings"], n), dtype=float)
+        self.checking = np.zeros(n)
+        self.debt = np.array(np.broadcast_to(p["initial_debt"], n), dtype=float)
+        self.loan = np.zeros(n)
+        self.has_house = np.zeros(n, dtype=bool)
+        # Per-person rates and thresholds, picked once instead of every year
+        fl = self.is_financially_literate
+        self.mortgage_rate = np.where(fl, p["mortgage_rate_fl"], p["mortgage_rate_nfl"])
+        self.savings_growth = np.where(fl, 1 + p["fl_savings_rate"], 1 + p["nfl_savings_rate"])
+        self.extra_debt_payment = np.where(fl, 15.0, 1.0)
+        self.down_payment = np.where(fl, p["down_payment_share_fl"] * p["house_cost"],
+                                     p["down_payment_share_nfl"] * p["house_cost"])
+
+    def __len__(self):
+        return self.is_financially_literate.shape[0]
+
+    def __getitem__(self, index):
+        """
+        Returns a PersonView of one person (negative indexes count from the end)
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError("person index out of range")
+        return PersonView(self, index % len(self))
+
+    def _everyone(self, mask):
+        return np.ones(len(self), dtype=bool) if mask is None else mask
+
+    def person_config(self, index: int):
+        """
+        Returns the SimulationConfig of one person (the shared config with their profile values)
+        """
+        if not self.profiles:
+            return self.config
+        return replace(self.config, **{name: values[index].item() for name, values in self.profiles.items()})
+
+    def add_income(self):
+        """
+        Adds the annual income in savings and checking for everyone
+        """
+        self.savings += self.savings_deposit
+        self.checking += self.checking_deposit
+
+    def update_savings(self):
+        """
+        Applies the yearly savings interest (7% fl, 1% nfl)
+        """
+        self.savings *= self.savings_growth
+
+    def update_debt(self):
+        """
+        Same monthly debt payments as Person.update_debt, with a mask for the people still in debt
+
+        Returns:
+            total_payment: array of the debt paid by each person during the year
+        """
+        total_payment = np.zeros_like(self.debt)
+        for _ in range(MONTHS_IN_YEAR):
+            active = self.debt > 0
+            if not active.any():
+                break
+            # Person.update_debt sets a cleared (or negative) debt to exactly zero
+            self.debt[~active] = 0
+            payment = self.debt * DEBT_MINIMUM_RATE + self.extra_debt_payment
+            payment = np.minimum(payment, self.debt)
+            self.debt -= np.where(active, payment, 0.0)
+            total_payment += np.where(active, payment, 0.0)
+        # 20% annual interest if debt remains
+        remaining = self.debt > 0
+        self.debt[remaining] *= 1.2
+        return total_payment
+
+    def update_debt_closed_form(self):
+        """
+        Array version of Person.update_debt_closed_form
+
+        Returns:
+            total_payment: array of the debt paid by each person during the year
+        """
+        active = self.debt > 0
+        remaining = self.debt * DEBT_YEAR_FACTOR - self.extra_debt_payment * DEBT_YEAR_ANNUITY
+        cleared = active & (remaining <= 0)
+        still_owed = active & (remaining > 0)
+        total_payment = np.where(cleared, self.debt, 0.0)
+        total_payment[still_owed] = self.debt[still_owed] - remaining[still_owed]
+        self.debt[:] = np.where(still_owed, remaining * 1.2, 0.0)
+        return total_payment
+
+    def pay_rent(self, mask=None):
+        """
+        Subtracts the annual rent for the people in mask (everyone by default),
+        taking from savings whatever checking can't cover
+        """
+        mask = self._everyone(mask)
+        rent = self.rent_per_year
+        covered = mask & (self.checking > rent)
+        short = mask & ~covered
+        self.checking[covered] -= _select(rent, covered)
+        self.savings[short] -= (_select(rent, short) - self.checking[short])
+        self.checking[short] = 0
+
+    def purchase_house(self, mask=None):
+        """
+        Purchases a house for the people in mask (everyone by default) that have the down payment in checking
+        """
+        buyers = self._everyone(mask) & (self.checking >= self.down_payment)
+        self.checking[buyers] -= self.down_payment[buyers]
+        self.loan[buyers] = _select(self.house_cost, buyers) - self.down_payment[buyers]
+        self.has_house |= buyers
+
+    def update_mortgage(self, mask=None, cache=None):
+        """
+        Same monthly mortgage payments as Person.update_mortgage for the people in mask (everyone by default)
+
+        cache: optional AmortizationCache, one lookup per distinct (loan, rate) pair instead of computing everyone
+        """
+        owners = self._everyone(mask) & (self.loan > 0)
+        if not owners.any():
+            return
+        if cache is not None:
+            self._update_mortgage_cached(owners, cache)
+            return
+        N = MORTGAGE_TERM_MONTHS
+        monthly_interest = self.mortgage_rate[owners] / 12
+        discount_factor = ((1 + monthly_interest) ** N - 1) / (monthly_interest * ((1 + monthly_interest) ** N))
+        loan = self.loan[owners]
+        checking = self.checking[owners]
+        monthly_payment = loan / discount_factor
+        for _ in range(MONTHS_IN_YEAR):
+            paying = loan > 0
+            if not paying.all():
+                loan[~paying] = 0
+                if not paying.any():
+                    break
+            interest_payment = loan * monthly_interest
+            principal_payment = monthly_payment - interest_payment
+            loan = np.where(paying, loan - principal_payment, loan)
+            checking = np.where(paying, checking - monthly_payment, checking)
+        self.loan[owners] = loan
+        self.checking[owners] = checking
+
+    def _update_mortgage_cached(self, owners, cache):
+        pairs, inverse = np.unique(np.stack([self.loan[owners], self.mortgage_rate[owners]], axis=1),
+                                   axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        schedules = [cache.get(float(loan), float(rate)) for loan, rate in pairs]
+        monthly_payment = np.array([schedule.monthly_payment for schedule in schedules])[inverse]
+        payments = np.array([len(schedule.balances) for schedule in schedules])[inverse]
+        checking = self.checking[owners]
+        for month in range(MONTHS_IN_YEAR):
+            paying = payments > month
+            if not paying.any():
+                break
+            checking = np.where(paying, checking - monthly_payment, checking)
+        self.checking[owners] = checking
+        self.loan[owners] = np.array([schedule.final_balance for schedule in schedules])[inverse]
+
+    def update_mortgage_closed_form(self, mask=None):
+        """
+        Array version of Person.update_mortgage_closed_form, one group per mortgage rate
+        """
+        owners = self._everyone(mask) & (self.loan > 0)
+        if not owners.any():
+            return
+        for rate in np.unique(self.mortgage_rate[owners]):
+            group = owners & (self.mortgage_rate == rate)
+            _, yearly_payment_factor, yearly_balance_factor = mortgage_factors(float(rate))
+            self.checking[group] -= self.loan[group] * yearly_payment_factor
+            self.loan[group] *= yearly_balance_factor
+
+    def get_wealth(self):
+        """
+        Returns everyone's wealth (savings + checking - debt - loan) rounded to the nearest integer
+        """
+        return np.rint(self.savings + self.checking - self.debt - self.loan).astype(np.int64)
+
+
+def _select(value, mask):
+    """
+    Entries of a per-person array for mask, or the value itself if it's shared by everyone
+    """
+    return value[mask] if np.ndim(value) else value
+
+
+def _column_property(name):
+    """
+    Property of PersonView that reads and writes one entry of a PersonArray column
+    """
+    def get(self):
+        # .item() gives back a Python float/bool, so the Person methods do the exact same arithmetic
+        return getattr(self.people, name)[self.index].item()
+
+    def set(self, value):
+        getattr(self.people, name)[self.index] = value
+
+    return property(get, set)
+
+
+class PersonView:
+    """
+    One person of a PersonArray, with the same attributes and methods as Person
+    Nothing is copied: the attributes are read from and written to the PersonArray columns
+    """
+    __slots__ = ("people", "index")
+
+    def __init__(self, people: PersonArray, index: int):
+        self.people = people
+        self.index = index
+
+    is_financially_literate = _column_property("is_financially_literate")
+    savings = _column_property("savings")
+    checking = _column_property("checking")
+    debt = _column_property("debt")
+    loan = _column_property("loan")
+    has_house = _column_property("has_house")
+    mortgage_rate = _column_property("mortgage_rate")
+
+    @property
+    def config(self):
+        return self.people.person_config(self.index)
+
+    # The Person methods only use the attributes above, so they work on a view as is
+    add_income = Person.add_income
+    update_savings = Person.update_savings
+    update_debt = Person.update_debt
+    update_debt_closed_form = Person.update_debt_closed_form
+    pay_rent = Person.pay_rent
+    purchase_house = Person.purchase_house
+    update_mortgage = Person.update_mortgage
+    update_mortgage_closed_form = Person.update_mortgage_closed_form
+    get_wealth = Person.get_wealth
+    __str__ = Person.__str__
+
+
+def memory_per_person(n: int = 100000):
+    """
+    Measures the memory used per person by Person objects and by a PersonArray (with tracemalloc)
+
+    Returns:
+        dict: bytes per person for "Person" and "PersonArray"
+    """
+    import tracemalloc
+
+    flags = [i % 2 == 0 for i in range(n)]
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    people = [Person(is_fl) for is_fl in flags]
+    objects = tracemalloc.get_traced_memory()[0] - start
+    start = tracemalloc.get_traced_memory()[0]
+    arrays = PersonArray(flags)
+    columns = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del people, arrays
+    # the list holding the Person objects is counted too: that's what holding them costs
+    return {"Person": objects / n, "PersonArray": columns / n}
+
+
+class BatchSimulation(PersonArray):
+    """
+    Simulates 40 years for N people at once
+    Every account is a NumPy array with one entry per person (see PersonArray), so each yearly step is a handful
+    of array operations instead of N Person method calls. The results match Person/Simulation exactly.
+    """
+    def __init__(self, is_financially_literate, closed_form: bool = False, config: SimulationConfig = DEFAULT_CONFIG,
+                 mortgage_cache=None, profiles=None):
+        """
+        Initializes N people
+
+        is_financially_literate: sequence of bools, one per person (True for fl, False for nfl)
+        closed_form: True to use the closed-form yearly debt and mortgage steps instead of the month loops
+        config: the model parameters, shared by everyone in the batch
+        mortgage_cache: optional AmortizationCache for the mortgage payments (month loops only)
+        profiles: optional per-person incomes, debts, house costs, ... (see PersonArray)
+        """
+        super().__init__(is_financially_literate, config, profiles)
+        self.closed_form = closed_form
+        self.mortgage_cache = mortgage_cache
+        # Stats tracked by Simulation, one per person
+        n = len(self)
+        self.years_in_debt = np.zeros(n, dtype=np.int64)
+        self.rented_years = np.zeros(n, dtype=np.int64)
+        self.total_debt_paid = np.zeros(n)
+
+    def run_simulation(self):
+        """
+        Runs the 40-year simulation for everyone, same yearly order as Simulation.run_simulation
+
+        Returns:
+            wealth_history [np.ndarray]: (N, 41) matrix, row i is the wealth history of person i
+        """
+        total_years = self.config.total_years
+        wealth_history = np.empty((len(self), total_years + 1), dtype=np.int64)
+        wealth_history[:, 0] = self.get_wealth()
+
+        for year in range(1, total_years + 1):
+            self.add_income()
+            self.update_savings()
+            if self.closed_form:
+                self.total_debt_paid += self.update_debt_closed_form()
+            else:
+                self.total_debt_paid += self.update_debt()
+            self.years_in_debt += (self.debt > 0) | (self.loan > 0)
+
+            # Housing: people that already owned a house at the start of the year pay the mortgage
+            owned = self.has_house.copy()
+            renting = ~owned & (self.checking < self.down_payment)
+            self.purchase_house(~owned)
+            self.pay_rent(renting)
+            self.rented_years += renting
+            if self.closed_form:
+                self.update_mortgage_closed_form(owned)
+            else:
+                self.update_mortgage(owned, self.mortgage_cache)
+
+            wealth_history[:, year] = self.get_wealth()
         return wealth_history
 
 def run_tests():
@@ -330,78 +990,270 @@ def run_tests():
     wealth_history = sim.run_simulation()
     assert len(wealth_history) == TOTAL_YEARS + 1, "Wealth history should have 41 entries (initial wealth + 40 years)"
     print(f"run_simulation test passed!")
-    
+
+    # Test the trace: same results, and the columns add up to the wealth history
+    assert sim.trace is None, "Tracing should be off by default"
+    traced = Simulation(Person(False), trace=True)
+    traced_history = traced.run_simulation()
+    assert traced_history == Simulation(Person(False)).run_simulation(), "Tracing should not change the results"
+    trace = traced.trace
+    assert list(np.rint(trace["wealth"]).astype(int)) == traced_history, "Trace wealth should match the wealth history"
+    assert np.count_nonzero(trace["rent_paid"]) == traced.rented_years, "Rent should be paid in every rented year"
+    assert abs(trace["debt_paid"].sum() - traced.total_debt_paid) < 1e-6, "Trace debt payments should add up"
+    owned_before = trace["has_house"][:-1]
+    assert np.all(trace["mortgage_paid"][1:][owned_before] > 0) and np.all(trace["mortgage_paid"][1:][~owned_before] == 0), "Mortgage is paid in the years a house is owned"
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        trace.save(os.path.join(directory, "nfl"))
+        assert np.array_equal(np.load(os.path.join(directory, "nfl", "loan.npy")), trace["loan"]), "Saved .npy columns should match"
+        trace.save(os.path.join(directory, "nfl.npz"))
+        with np.load(os.path.join(directory, "nfl.npz")) as saved:
+            assert np.array_equal(saved["year"], np.arange(TOTAL_YEARS + 1)), "Saved .npz should have the year column"
+    print(f"SimulationTrace test passed!")
+
+    # Test BatchSimulation against Simulation for fl and nfl (should match exactly)
+    batch = BatchSimulation([True, False, True])
+    batch_history = batch.run_simulation()
+    assert batch_history.shape == (3, TOTAL_YEARS + 1), "Batch wealth history should be (N, 41)"
+    for i, is_fl in enumerate([True, False]):
+        sim_check = Simulation(Person(is_fl))
+        assert list(batch_history[i]) == sim_check.run_simulation(), "Batch wealth history should match Simulation"
+        assert batch.total_debt_paid[i] == sim_check.total_debt_paid, "Batch total debt paid should match Simulation"
+        assert batch.rented_years[i] == sim_check.rented_years, "Batch rented years should match Simulation"
+        assert batch.years_in_debt[i] == sim_check.years_in_debt, "Batch years in debt should match Simulation"
+    assert list(batch_history[0]) == list(batch_history[2]), "Identical people should have identical histories"
+    print(f"BatchSimulation test passed!")
+
+    # Test the closed-form debt and mortgage steps against the month loops
+    p_loop = Person(False)
+    p_closed = Person(False)
+    p_closed.debt = p_loop.debt = 10
+    assert abs(p_closed.update_debt_closed_form() - p_loop.update_debt()) < 1e-9, "Closed-form payment should match when debt clears"
+    assert p_closed.debt == 0, "Debt should be zero if fully paid off"
+    for is_fl in [True, False]:
+        sim_loop = Simulation(Person(is_fl))
+        sim_closed = Simulation(Person(is_fl), closed_form=True)
+        assert sim_loop.run_simulation() == sim_closed.run_simulation(), "Closed-form wealth history should match the month loops"
+        assert sim_loop.years_in_debt == sim_closed.years_in_debt, "Closed-form years in debt should match"
+        for account in ["savings", "checking", "debt", "loan"]:
+            loop_value = getattr(sim_loop.person, account)
+            closed_value = getattr(sim_closed.person, account)
+            assert abs(loop_value - closed_value) <= CLOSED_FORM_TOLERANCE * max(abs(loop_value), 1), f"Closed-form {account} should match the month loop"
+    batch_closed = BatchSimulation([True, False], closed_form=True)
+    assert (batch_closed.run_simulation() == batch_history[:2]).all(), "Closed-form BatchSimulation should match"
+    print(f"closed-form update_debt and update_mortgage tests passed!")
+
+    # Test PersonArray and its views against Person
+    people = PersonArray([True, False])
+    view = people[1]
+    assert view.savings == INITIAL_SAVINGS and not view.is_financially_literate, "View should read the columns"
+    view.checking = 20000
+    view.pay_rent()
+    assert people.checking[1] == 20000 - RENT_PER_YEAR, "View methods should write to the columns"
+    p_compare = Person(False)
+    p_compare.checking = 20000
+    p_compare.pay_rent()
+    for year in range(3):
+        for person in [view, p_compare]:
+            person.add_income()
+            person.update_savings()
+            person.update_debt()
+    assert view.get_wealth() == p_compare.get_wealth(), "A view should behave exactly like a Person"
+    people.add_income()
+    assert people[0].savings == INITIAL_SAVINGS + SAVINGS_DEPOSIT, "Array methods should update everyone"
+    assert not hasattr(p_compare, "__dict__"), "Person should use __slots__"
+    memory = memory_per_person(10000)
+    assert memory["PersonArray"] < memory["Person"], "PersonArray should use less memory per person"
+    # Test the amortization schedule cache: same results, and shared by identical people
+    cache = AmortizationCache(maxsize=100)
+    cached_sims = [Simulation(Person(is_fl), mortgage_cache=cache) for is_fl in [True, False, True]]
+    cached_histories = [sim_cached.run_simulation() for sim_cached in cached_sims]
+    for is_fl, cached_history in zip([True, False, True], cached_histories):
+        assert cached_history == Simulation(Person(is_fl)).run_simulation(), "Cached mortgage should match update_mortgage"
+    owned_years = TOTAL_YEARS - cached_sims[0].rented_years - 1
+    assert cache.hits >= owned_years, "The second identical fl person should only hit the cache"
+    assert cached_sims[2].person.checking == cached_sims[0].person.checking, "Identical people should end identical"
+    batch_cached = BatchSimulation([True, False, True], mortgage_cache=cache)
+    assert (batch_cached.run_simulation() == batch_history).all(), "Cached BatchSimulation should match"
+    small_cache = AmortizationCache(maxsize=2)
+    for principal in [1000.0, 2000.0, 3000.0, 1000.0]:
+        small_cache.get(principal, 0.05)
+    assert len(small_cache.schedules) == 2 and small_cache.misses == 4, "Cache should drop the least recently used schedule"
+    print(f"AmortizationCache test passed! (hit rate {cache.hit_rate():.0%})")
+
+    # Test per-person profiles: each person should match a Person built with their own config
+    incomes = [40000.0, 59000.0, 80000.0]
+    house_costs = [120000.0, 175000.0, 300000.0]
+    profiled = BatchSimulation([True, False, True], profiles={"income": incomes, "house_cost": house_costs})
+    profiled_history = profiled.run_simulation()
+    for i, is_fl in enumerate([True, False, True]):
+        own_config = SimulationConfig(income=incomes[i], house_cost=house_costs[i])
+        assert profiled.person_config(i) == own_config, "person_config should hold the profile values"
+        assert list(profiled_history[i]) == Simulation(Person(is_fl, own_config)).run_simulation(), "Profiles should match Person with the same config"
+    assert (profiled_history[1] == batch_history[1]).all(), "Default profile values should not change the results"
+    rates = {"fl_savings_rate": [0.05, 0.07, 0.09], "mortgage_rate_fl": [0.03, 0.045, 0.06], "savings_share": [0.1, 0.2, 0.3]}
+    profiled = BatchSimulation([True, True, True], closed_form=True, profiles=rates)
+    profiled_history = profiled.run_simulation()
+    for i in range(3):
+        own_config = SimulationConfig(**{name: values[i] for name, values in rates.items()})
+        assert list(profiled_history[i]) == Simulation(Person(True, own_config), closed_form=True).run_simulation(), "Per-person rates should match Person"
+    print(f"PersonArray profiles test passed!")
+
+    print(f"PersonArray test passed! (bytes per person: Person {memory['Person']:.0f}, PersonArray {memory['PersonArray']:.0f})")
+
     print("All tests passed!")
 
+def write_wealth_histories(path: str, wealth_history_fl, wealth_history_nfl, output_format: str = ""):
+    """
+    Writes the yearly wealth of fl and nfl to a file
+
+    path: the output file
+    output_format: "csv", "json" or "npz" (binary, one array per column)
+        defaults to the extension of path
+    """
+    output_format = output_format or os.path.splitext(path)[1].lstrip(".").lower()
+    columns = {
+        "year": list(range(len(wealth_history_fl))),
+        "fl_wealth": list(wealth_history_fl),
+        "nfl_wealth": list(wealth_history_nfl),
+    }
+    if output_format == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+    elif output_format == "json":
+        with open(path, "w") as f:
+            json.dump({name: [int(value) for value in column] for name, column in columns.items()}, f)
+    elif output_format == "npz":
+        # np.savez adds .npz to the name if it's missing, open the file ourselves to keep the path as given
+        with open(path, "wb") as f:
+            np.savez(f, **{name: np.asarray(column, dtype=np.int64) for name, column in columns.items()})
+    else:
+        raise ValueError(f"Unknown output format {output_format!r}, expected csv, json or npz")
+
+
+def plot_wealth_histories(wealth_history_fl, wealth_history_nfl):
+    """
+    My touch: visualize the evolution of wealth over 40 years for FL and NFL
+    matplotlib is only imported here, so running headless (or importing this file) doesn't pay for it
+    """
+    import matplotlib.pyplot as plt
+
+    years = list(range(len(wealth_history_fl)))
+    plt.figure()
+    plt.plot(years, wealth_history_fl, label="FL Person")
+    plt.plot(years, wealth_history_nfl, label="NFL Person")
+    plt.xlabel("Years")
+    plt.ylabel("Wealth ($)")
+    plt.title("Wealth Evolution over 40 years")
+    plt.grid(True)
+    plt.legend()
+    plt.show()
+
+
+def write_responses(path: str, sim_fl: Simulation, sim_nfl: Simulation):
+    """
+    Creates FinancialLiteracyResponses.txt from the results of the fl and nfl simulations
+    """
+    fl_person = sim_fl.person
+    nfl_person = sim_nfl.person
+    with open(path, "w") as f:
+        # Answer to question #1
+        f.write("Answer to question #1\n")
+        f.write("I learned that how much of a difference a house down payment makes\n")
+        f.write("I also realized the power of paying just a few more dollars in debt per month, and how it accumulates over the years because of interest\n")
+        
+        # Answer to question #2
+        f.write("\nAnswer to question #2\n")
+        difference_in_paid_debt = sim_nfl.total_debt_paid - sim_fl.total_debt_paid
+        f.write(f"nfl ended up paying ${difference_in_paid_debt:.3f} more in debt than fl\n")
+
+        # Answer to question 3
+        f.write("\nAnswer to question #3\n")
+        f.write("fl and nfl were in debt for the same number of years per instructions\n")
+
+        # answer to question #4
+        f.write("\nAnswer to question #4\n")
+        f.write(f"FL has ${fl_person.get_wealth()-nfl_person.get_wealth()} more in wealth than NFL after 40 years\n")
+
+        # Answer to question #5
+        f.write("\nAnswer to question #5\n")
+        f.write("I think the biggest thing is investing in a high-yields savings account\n")
+        f.write("While nfl was losing an average of 1% per year on their money due to inflation after the 1% simple interest\n")
+        f.write("FL was investing with a 7% yearly return, which compouds to millions of dollars over time\n")
+        f.write("The power of compound growth should not be underestimated\n")
+
+
+def main(argv=None):
+    """
+    Main program: runs the fl and nfl simulations, prints the results,
+    and depending on the options runs the tests, saves the results, plots them and writes the responses
+    """
+    parser = argparse.ArgumentParser(description="40-year simulation in financial literacy")
+    parser.add_argument("--tests", action="store_true", help="run the test cases first")
+    parser.add_argument("--no-plot", action="store_true", help="don't import matplotlib or show the plot")
+    parser.add_argument("--output", help="save the wealth histories to a .csv, .json or .npz file")
+    parser.add_argument("--format", choices=["csv", "json", "npz"], default="",
+                        help="format of --output (defaults to its extension)")
+    parser.add_argument("--trace", help="save the per-year accounts and payments of fl and nfl "
+                                        "(a directory of .npy files, or a .npz / .parquet path prefix)")
+    parser.add_argument("--responses", default="FinancialLiteracyResponses.txt",
+                        help="where to write the responses to the questions")
+    parser.add_argument("--no-responses", action="store_true", help="don't write the responses file")
+    args = parser.parse_args(argv)
+
+    if args.tests:
+        run_tests()
+
+    # Create two persons for simulation:
+    # fl: financially literate
+    fl_person = Person(True)
+    # nfl: not financially literate
+    nfl_person = Person(False)
+
+    # Create simulations for both persons
+    sim_fl = Simulation(fl_person, trace=bool(args.trace))
+    sim_nfl = Simulation(nfl_person, trace=bool(args.trace))
+
+    # Run the 40-year simulation for both
+    wealth_history_fl = sim_fl.run_simulation()
+    wealth_history_nfl = sim_nfl.run_simulation()
+
+    # Print simulation results
+    print("\nFinancially Literate Person Wealth Over 40 Years:")
+    print(wealth_history_fl)
+
+    print("\nNon-Financially Literate Person Wealth Over 40 Years:")
+    print(wealth_history_nfl)
+
+    # Print Stats for Fl and Nfl
+    print("\nAdditional Metrics:")
+    print(f"Financially Literate: Years in debt = {sim_fl.years_in_debt}, Rented years = {sim_fl.rented_years}, Total debt paid = ${sim_fl.total_debt_paid:.2f}, Total Wealth = {fl_person.get_wealth()}")
+    print(f"Non-Financially Literate: Years in debt = {sim_nfl.years_in_debt}, Rented years = {sim_nfl.rented_years}, Total debt paid = ${sim_nfl.total_debt_paid:.2f}, Total Wealth = {nfl_person.get_wealth()}")
+    print(f"FL has ${fl_person.get_wealth()-nfl_person.get_wealth()} more in wealth than NFL after 40 years")
+
+    if args.output:
+        write_wealth_histories(args.output, wealth_history_fl, wealth_history_nfl, args.format)
+
+    if args.trace:
+        # --trace run/ -> run/fl and run/nfl, --trace run.parquet -> run_fl.parquet and run_nfl.parquet
+        root, extension = os.path.splitext(args.trace)
+        if extension in (".npz", ".parquet"):
+            sim_fl.trace.save(f"{root}_fl{extension}")
+            sim_nfl.trace.save(f"{root}_nfl{extension}")
+        else:
+            sim_fl.trace.save(os.path.join(args.trace, "fl"))
+            sim_nfl.trace.save(os.path.join(args.trace, "nfl"))
+
+    if not args.no_plot:
+        plot_wealth_histories(wealth_history_fl, wealth_history_nfl)
+
+    if not args.no_responses:
+        write_responses(args.responses, sim_fl, sim_nfl)
+
+
 # Main Program
-# Run tests first
-run_tests()
-
-# Create two persons for simulation:
-# fl: financially literate
-fl_person = Person(True)
-# nfl: not financially literate
-nfl_person = Person(False)
-
-# Create simulations for both persons
-sim_fl = Simulation(fl_person)
-sim_nfl = Simulation(nfl_person)
-
-# Run the 40-year simulation for both
-wealth_history_fl = sim_fl.run_simulation()
-wealth_history_nfl = sim_nfl.run_simulation()
-
-# Print simulation results
-print("\nFinancially Literate Person Wealth Over 40 Years:")
-print(wealth_history_fl)
-
-print("\nNon-Financially Literate Person Wealth Over 40 Years:")
-print(wealth_history_nfl)
-
-# Print Stats for Fl and Nfl
-print("\nAdditional Metrics:")
-print(f"Financially Literate: Years in debt = {sim_fl.years_in_debt}, Rented years = {sim_fl.rented_years}, Total debt paid = ${sim_fl.total_debt_paid:.2f}, Total Wealth = {fl_person.get_wealth()}")
-print(f"Non-Financially Literate: Years in debt = {sim_nfl.years_in_debt}, Rented years = {sim_nfl.rented_years}, Total debt paid = ${sim_nfl.total_debt_paid:.2f}, Total Wealth = {nfl_person.get_wealth()}")
-print(f"FL has ${fl_person.get_wealth()-nfl_person.get_wealth()} more in wealth than NFL after 40 years")
-
-# My touch:  visualize the evolution of wealth over 40 years for FL and NFL
-# Create a graph to compare their wealtj
-import matplotlib.pyplot as plt
-
-years = list(range(TOTAL_YEARS+1))
-plt.figure()
-plt.plot(years, wealth_history_fl, label="FL Person")
-plt.plot(years, wealth_history_nfl, label="NFL Person")
-plt.xlabel("Years")
-plt.ylabel("Wealth ($)")
-plt.title("Wealth Evolution over 40 years")
-plt.grid(True)
-plt.legend()
-plt.show()
-
-# Create FinancialLiteracyResponses.txt
-with open("FinancialLiteracyResponses.txt", "w") as f:
-    # Answer to question #1
-    f.write("Answer to question #1\n")
-    f.write("I learned that how much of a difference a house down payment makes\n")
-    f.write("I also realized the power of paying just a few more dollars in debt per month, and how it accumulates over the years because of interest\n")
-    
-    # Answer to question #2
-    f.write("\nAnswer to question #2\n")
-    difference_in_paid_debt = sim_nfl.total_debt_paid - sim_fl.total_debt_paid
-    f.write(f"nfl ended up paying ${difference_in_paid_debt:.3f} more in debt than fl\n")
-
-    # Answer to question 3
-    f.write("\nAnswer to question #3\n")
-    f.write("fl and nfl were in debt for the same number of years per instructions\n")
-
-    # answer to question #4
-    f.write("\nAnswer to question #4\n")
-    f.write(f"FL has ${fl_person.get_wealth()-nfl_person.get_wealth()} more in wealth than NFL after 40 years\n")
-
-    # Answer to question #5
-    f.write("\nAnswer to question #5\n")
-    f.write("I think the biggest thing is investing in a high-yields savings account\n")
-    f.write("While nfl was losing an average of 1% per year on their money due to inflation after the 1% simple interest\n")
-    f.write("FL was investing with a 7% yearly return, which compouds to millions of dollars over time\n")
-    f.write("The power of compound growth should not be underestimated\n")
\ No newline at end of file
+# Nothing runs on import, so worker processes (see sweep.py) can use this file as a library
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Monte Carlo mode for the financial literacy model
+Savings returns (and optionally income) are drawn at random every year instead of the fixed 7% / 1%
+
+This file contains:
+- ReturnModel dataclass (distribution of the yearly returns and income shocks)
+- MonteCarloSimulation class (BatchSimulation with random returns and income)
+- QuantileSketch class (streaming, mergeable per-year percentiles)
+- run_monte_carlo function (runs the trials in chunks across a process pool)
+
+Every chunk of trials gets its own random stream spawned from one seed, so the results
+only depend on the seed and the chunk size, not on the number of workers.
+Paths are never stored: each batch is folded into the sketch and dropped, so memory stays flat.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from main import DEFAULT_CONFIG, BatchSimulation, SimulationConfig
+
+DISTRIBUTIONS = ["normal", "lognormal", "student_t"]
+
+# Trials simulated at once inside a worker (bounds the memory of one batch)
+BATCH_SIZE = 10000
+# Trials per work unit sent to the pool
+CHUNK_SIZE = 100000
+
+
+@dataclass(frozen=True)
+class ReturnModel:
+    """
+    Distribution of the yearly savings returns and income
+    The means are the fl / nfl savings rates of the SimulationConfig, only the spread is set here
+    """
+    distribution: str = "normal"
+    fl_volatility: float = 0.15  # standard deviation of the yearly mutual fund return
+    nfl_volatility: float = 0.0  # the savings account pays a fixed rate
+    income_volatility: float = 0.0  # standard deviation of the yearly income (relative to the income)
+    degrees_of_freedom: float = 5.0  # only used by student_t
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {self.distribution!r}, expected one of {DISTRIBUTIONS}")
+        if self.distribution == "student_t" and self.degrees_of_freedom <= 2:
+            raise ValueError("student_t needs more than 2 degrees of freedom to have a finite variance")
+
+    def draw_returns(self, rng, mean, volatility):
+        """
+        Draws one yearly return per person with the given means and standard deviations (arrays)
+        """
+        size = mean.shape[0]
+        if self.distribution == "normal":
+            return mean + volatility * rng.standard_normal(size)
+        if self.distribution == "student_t":
+            df = self.degrees_of_freedom
+            return mean + volatility * rng.standard_t(df, size) * np.sqrt((df - 2) / df)
+        # lognormal growth factor with the requested mean and standard deviation
+        sigma2 = np.log1p((volatility / (1 + mean)) ** 2)
+        mu = np.log1p(mean) - sigma2 / 2
+        return np.exp(mu + np.sqrt(sigma2) * rng.standard_normal(size)) - 1
+
+
+class MonteCarloSimulation(BatchSimulation):
+    """
+    BatchSimulation where every person is one random trial
+    Income and savings returns are drawn every year, everything else follows Person/Simulation
+    """
+    def __init__(self, is_financially_literate, rng, model: ReturnModel = ReturnModel(),
+                 config: SimulationConfig = DEFAULT_CONFIG, closed_form: bool = True):
+        """
+        is_financially_literate: sequence of bools, one per trial
+        rng: numpy Generator the draws come from
+        model: the distribution of returns and income
+        """
+        super().__init__(is_financially_literate, closed_form=closed_form, config=config)
+        self.rng = rng
+        self.model = model
+        fl = self.is_financially_literate
+        self.mean_return = np.where(fl, config.fl_savings_rate, config.nfl_savings_rate)
+        self.return_volatility = np.where(fl, model.fl_volatility, model.nfl_volatility)
+
+    def add_income(self):
+        """
+        Adds a random yearly income (mean is each person's income), split 20% savings / 30% checking
+        """
+        if self.model.income_volatility == 0:
+            super().add_income()
+            return
+        # lognormal shock with mean 1, so incomes stay positive
+        sigma2 = np.log1p(self.model.income_volatility ** 2)
+        shock = np.exp(np.sqrt(sigma2) * self.rng.standard_normal(self.savings.shape[0]) - sigma2 / 2)
+        income = self.income * shock
+        self.savings += income * self.config.savings_share
+        self.checking += income * self.config.checking_share
+
+    def update_savings(self):
+        """
+        Applies a random yearly return to the savings
+        """
+        self.savings *= 1 + self.model.draw_returns(self.rng, self.mean_return, self.return_volatility)
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch for several columns at once (one column per year)
+
+    Compactor levels as in the KLL sketch: level h holds values of weight 2**h.
+    When a level reaches k values it is sorted and every other value (random offset) moves up a level.
+    Memory is about k values per level per column and there are log2(n / k) levels.
+    Sketches built on separate chunks can be merged.
+    """
+    def __init__(self, width: int, k: int = 2048, seed: int = 0):
+        """
+        width: number of columns (years)
+        k: compactor capacity, the rank error is roughly 1 / k
+        seed: seed for the compaction offsets
+        """
+        self.width = width
+        self.k = k
+        self.count = 0
+        self.levels = []
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Adds a batch of rows, values has shape (n, width)
+        """
+        values = np.asarray(values, dtype=float)
+        self._add(0, values.T)
+        self.count += values.shape[0]
+
+    def merge(self, other):
+        """
+        Adds everything from another sketch with the same width
+        """
+        if other.width != self.width:
+            raise ValueError("Can only merge sketches with the same width")
+        for level, values in enumerate(other.levels):
+            self._add(level, values)
+        self.count += other.count
+
+    def _add(self, level, values):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty((self.width, 0)))
+        self.levels[level] = np.concatenate([self.levels[level], values], axis=1)
+        # compact from the bottom up while a level is full
+        while level < len(self.levels):
+            buffer = self.levels[level]
+            if buffer.shape[1] < self.k:
+                break
+            buffer = np.sort(buffer, axis=1)
+            # an odd value out stays on this level so the total weight is preserved
+            keep = buffer.shape[1] % 2
+            self.levels[level] = buffer[:, :keep]
+            promoted = buffer[:, keep + self.rng.integers(2)::2]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty((self.width, 0)))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted], axis=1)
+            level += 1
+
+    def quantiles(self, qs):
+        """
+        Returns the estimated quantiles of every column
+
+        qs: quantiles between 0 and 1
+        Returns:
+            np.ndarray: shape (len(qs), width)
+        """
+        if self.count == 0:
+            raise ValueError("The sketch is empty")
+        values = np.concatenate(self.levels, axis=1)
+        weights = np.concatenate([np.full(level.shape[1], 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, axis=1, kind="stable")
+        sorted_values = np.take_along_axis(values, order, axis=1)
+        cumulative = np.cumsum(weights[order], axis=1)
+        result = np.empty((len(qs), self.width))
+        for column in range(self.width):
+            total = cumulative[column, -1]
+            ranks = np.searchsorted(cumulative[column], np.asarray(qs) * total, side="left")
+            result[:, column] = sorted_values[column, np.minimum(ranks, sorted_values.shape[1] - 1)]
+        return result
+
+
+def _run_chunk(seed_sequence, n_trials, is_financially_literate, model, config, sketch_k):
+    """
+    Worker entry point: runs n_trials in batches and returns their sketch
+    """
+    rng = np.random.default_rng(seed_sequence)
+    sketch = QuantileSketch(config.total_years + 1, sketch_k, seed=int(rng.integers(2 ** 32)))
+    for start in range(0, n_trials, BATCH_SIZE):
+        size = min(BATCH_SIZE, n_trials - start)
+        sim = MonteCarloSimulation(np.full(size, is_financially_literate), rng, model, config)
+        sketch.update(sim.run_simulation())
+    return sketch
+
+
+def run_monte_carlo(n_trials: int, is_financially_literate: bool, model: ReturnModel = ReturnModel(),
+                    config: SimulationConfig = DEFAULT_CONFIG, seed: int = 0, max_workers=None,
+                    chunk_size: int = CHUNK_SIZE, sketch_k: int = 2048):
+    """
+    Runs n_trials random 40-year paths and aggregates the wealth percentiles per year
+
+    n_trials: number of random trials
+    is_financially_literate: simulate fl (True) or nfl (False) people
+    model: distribution of the returns and income
+    seed: the results are reproducible for a given seed and chunk_size
+    max_workers: number of processes (defaults to every core)
+
+    Returns:
+        QuantileSketch: call .quantiles([0.05, 0.5, 0.95]) for the per-year percentiles
+    """
+    chunk_sizes = [min(chunk_size, n_trials - start) for start in range(0, n_trials, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    sketch = QuantileSketch(config.total_years + 1, sketch_k, seed=seed)
+    args = (chunk_sizes, [is_financially_literate] * len(streams), [model] * len(streams),
+            [config] * len(streams), [sketch_k] * len(streams))
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(streams) == 1:
+        chunks = map(_run_chunk, streams, *args)
+        for chunk in chunks:
+            sketch.merge(chunk)
+        return sketch
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps the chunk order, so merging is reproducible whatever finishes first
+        for chunk in executor.map(_run_chunk, streams, *args):
+            sketch.merge(chunk)
+    return sketch
+
+
+def run_tests():
+    """
+    Runs test cases for the Monte Carlo mode
+    """
+    # With no volatility the Monte Carlo paths are the deterministic simulation
+    fixed = ReturnModel(fl_volatility=0.0)
+    sim = MonteCarloSimulation([True, True], np.random.default_rng(1), fixed)
+    expected = BatchSimulation([True, True], closed_form=True).run_simulation()
+    assert (sim.run_simulation() == expected).all(), "Zero volatility should match BatchSimulation"
+    print("MonteCarloSimulation test passed!")
+
+    # The sketch should be close to the exact percentiles
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((50000, 3)) * [1, 10, 100]
+    sketch = QuantileSketch(3, k=512)
+    for start in range(0, 50000, 7000):
+        sketch.update(data[start:start + 7000])
+    assert sketch.count == 50000, "Sketch should count every row"
+    estimate = sketch.quantiles([0.1, 0.5, 0.9])
+    exact = np.quantile(data, [0.1, 0.5, 0.9], axis=0)
+    assert np.all(np.abs(estimate - exact) < 0.05 * np.array([1, 10, 100])), "Sketch quantiles should be close to exact"
+    assert sum(level.shape[1] for level in sketch.levels) < 512 * 10, "Sketch should stay small"
+    print("QuantileSketch test passed!")
+
+    # Same seed, same results, whatever the number of workers
+    model = ReturnModel(income_volatility=0.1)
+    serial = run_monte_carlo(3000, True, model, seed=7, max_workers=1, chunk_size=1000)
+    parallel = run_monte_carlo(3000, True, model, seed=7, max_workers=2, chunk_size=1000)
+    assert np.array_equal(serial.quantiles([0.5]), parallel.quantiles([0.5])), "Results should be reproducible"
+    percentiles = serial.quantiles([0.05, 0.5, 0.95])
+    assert np.all(percentiles[0] <= percentiles[1]) and np.all(percentiles[1] <= percentiles[2]), "Percentiles should be ordered"
+    assert percentiles[1, 0] == expected[0, 0], "Year 0 wealth is not random"
+    print("run_monte_carlo test passed!")
+
+
+if __name__ == "__main__":
+    run_tests()
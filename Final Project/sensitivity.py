@@ -0,0 +1,148 @@
+"""
+Sensitivity analysis for the financial literacy model
+Which parameter drives the gap between the FL and NFL wealth after 40 years?
+
+Every parameter is nudged up and down by a small relative step and the derivative of the final wealth is the
+central difference. All the nudged copies (2 per parameter, for FL and NFL, plus the two base cases) are people
+of one BatchSimulation with per-person profiles, so every derivative comes out of a single batched run
+instead of one Simulation per perturbed constant.
+
+The model has thresholds (a house is bought the year checking reaches the down payment), so the final wealth
+is only piecewise smooth. When a nudge moves a threshold the derivative is not meaningful and the row is
+marked smooth=False.
+
+This file contains:
+- sensitivities function (ranked table of the derivatives)
+- format_table function
+"""
+
+import argparse
+
+import numpy as np
+
+from main import DEFAULT_CONFIG, PROFILE_COLUMNS, BatchSimulation, SimulationConfig
+
+# Every float parameter of SimulationConfig can be nudged
+PARAMETERS = PROFILE_COLUMNS
+# Step of the central differences, relative to the parameter's value
+RELATIVE_STEP = 1e-5
+
+
+def sensitivities(config: SimulationConfig = DEFAULT_CONFIG, parameters=PARAMETERS,
+                  relative_step: float = RELATIVE_STEP, closed_form: bool = True):
+    """
+    Derivatives of the final FL and NFL wealth with respect to every parameter, in one batched run
+
+    config: the point the derivatives are taken at
+    parameters: names of the parameters to nudge (PROFILE_COLUMNS by default)
+    relative_step: the parameters are nudged by +/- relative_step * value
+
+    Returns:
+        list[dict]: one row per parameter, sorted by the effect on the wealth gap (largest first), with
+            parameter, value, step,
+            fl_derivative, nfl_derivative, gap_derivative: change of the final wealth per unit of the parameter
+            gap_per_percent: change of the FL - NFL gap for a 1% increase of the parameter
+            smooth: False if a nudge changed when a house is bought (the derivative jumps there)
+    """
+    for name in parameters:
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown parameter {name!r}, expected one of {PARAMETERS}")
+    base = np.array([getattr(config, name) for name in parameters], dtype=float)
+    steps = relative_step * np.where(base != 0, np.abs(base), 1.0)
+
+    # Rows: base, then +step and -step for every parameter; the same block for FL then NFL
+    n_parameters = len(parameters)
+    block = 1 + 2 * n_parameters
+    values = np.tile(base, (block, 1))
+    values[1::2, :] += np.diag(steps)
+    values[2::2, :] -= np.diag(steps)
+    values = np.vstack([values, values])
+    is_fl = np.repeat([True, False], block)
+
+    sim = BatchSimulation(is_fl, closed_form=closed_form, config=config,
+                          profiles={name: values[:, i] for i, name in enumerate(parameters)})
+    sim.run_simulation()
+    # unrounded wealth, the integers of the wealth history would swamp the small differences
+    final_wealth = (sim.savings + sim.checking - sim.debt - sim.loan).reshape(2, block)
+    rented_years = sim.rented_years.reshape(2, block)
+
+    up, down = final_wealth[:, 1::2], final_wealth[:, 2::2]
+    derivatives = (up - down) / (2 * steps)
+    smooth = np.all(rented_years[:, 1:] == rented_years[:, :1], axis=0).reshape(n_parameters, 2).all(axis=1)
+
+    rows = []
+    for i, name in enumerate(parameters):
+        gap_derivative = derivatives[0, i] - derivatives[1, i]
+        rows.append({
+            "parameter": name,
+            "value": base[i],
+            "step": steps[i],
+            "fl_derivative": derivatives[0, i],
+            "nfl_derivative": derivatives[1, i],
+            "gap_derivative": gap_derivative,
+            "gap_per_percent": gap_derivative * base[i] / 100,
+            "smooth": bool(smooth[i]),
+        })
+    rows.sort(key=lambda row: abs(row["gap_per_percent"]), reverse=True)
+    return rows
+
+
+def format_table(rows):
+    """
+    Returns the sensitivity rows as a text table
+    """
+    lines = [f"{'parameter':<24}{'value':>12}{'d FL':>16}{'d NFL':>16}{'gap per +1%':>16}  smooth"]
+    for row in rows:
+        lines.append(f"{row['parameter']:<24}{row['value']:>12g}{row['fl_derivative']:>16,.2f}"
+                     f"{row['nfl_derivative']:>16,.2f}{row['gap_per_percent']:>16,.2f}  {'yes' if row['smooth'] else 'no'}")
+    return "\n".join(lines)
+
+
+def run_tests():
+    """
+    Runs test cases for the sensitivity analysis
+    """
+    from dataclasses import replace
+
+    from main import Person, Simulation
+
+    rows = sensitivities()
+    assert sorted(row["parameter"] for row in rows) == sorted(PARAMETERS), "There should be a row per parameter"
+    effects = [abs(row["gap_per_percent"]) for row in rows]
+    assert effects == sorted(effects, reverse=True), "Rows should be ranked by their effect on the gap"
+    by_name = {row["parameter"]: row for row in rows}
+    assert by_name["income"]["fl_derivative"] > 0 and by_name["income"]["nfl_derivative"] > 0, "More income should mean more wealth"
+    assert by_name["monthly_rent"]["fl_derivative"] < 0, "A higher rent should mean less wealth"
+    assert by_name["fl_savings_rate"]["nfl_derivative"] == 0, "The FL savings rate should not change NFL wealth"
+    print("sensitivities test passed!")
+
+    # Same derivatives as rerunning Simulation once per perturbed constant
+    def final_wealth(is_fl, config):
+        person = Person(is_fl, config)
+        Simulation(person, closed_form=True).run_simulation()
+        return person.savings + person.checking - person.debt - person.loan
+
+    for name in ["income", "fl_savings_rate", "mortgage_rate_nfl"]:
+        row = by_name[name]
+        up = replace(DEFAULT_CONFIG, **{name: row["value"] + row["step"]})
+        down = replace(DEFAULT_CONFIG, **{name: row["value"] - row["step"]})
+        for is_fl, key in [(True, "fl_derivative"), (False, "nfl_derivative")]:
+            expected = (final_wealth(is_fl, up) - final_wealth(is_fl, down)) / (2 * row["step"])
+            assert abs(row[key] - expected) <= 1e-6 * max(1.0, abs(expected)), f"{key} of {name} should match Simulation"
+    print("sensitivities vs Simulation test passed!")
+
+    subset = sensitivities(parameters=["house_cost"], closed_form=False)
+    assert len(subset) == 1 and subset[0]["fl_derivative"] < 0, "A pricier house should lower the final wealth"
+    print("format_table:\n" + format_table(subset))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranked sensitivities of the final wealth to every parameter")
+    parser.add_argument("--step", type=float, default=RELATIVE_STEP, help="relative step of the central differences")
+    parser.add_argument("--loops", action="store_true", help="use the month loops instead of the closed-form steps")
+    args = parser.parse_args(argv)
+    print(format_table(sensitivities(relative_step=args.step, closed_form=not args.loops)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Parameter sweeps for the financial literacy model
+Runs the FL and NFL simulations for every SimulationConfig in a grid, in parallel
+
+This file contains:
+- config_grid function (cartesian product of parameter values)
+- ResultsTable class (columnar table the results stream into)
+- SweepCheckpoint class (append-only binary file of finished configs, to resume a sweep)
+- iter_sweep / run_sweep functions (fan chunks of configs out to a ProcessPoolExecutor)
+
+Example:
+    configs = config_grid(income=[40000.0, 59000.0], fl_savings_rate=[0.05, 0.07])
+    table = run_sweep(configs)
+    print(table["wealth_gap"])
+
+    # long sweeps: finished chunks are saved as they complete, rerun the same line to resume after a crash
+    table = run_sweep(configs, checkpoint="sweep.ckpt")
+"""
+
+import hashlib
+import itertools
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields, replace
+
+import numpy as np
+
+from main import DEFAULT_CONFIG, Person, Simulation, SimulationConfig
+
+# Parameters that can be swept (the derived fields of SimulationConfig are computed from these)
+PARAMETERS = [f.name for f in fields(SimulationConfig) if f.init]
+
+# Columns produced for every config, on top of the swept parameters
+RESULT_COLUMNS = [
+    "config_index",
+    "fl_wealth", "nfl_wealth", "wealth_gap",
+    "fl_years_in_debt", "nfl_years_in_debt",
+    "fl_rented_years", "nfl_rented_years",
+    "fl_total_debt_paid", "nfl_total_debt_paid",
+]
+
+# Upper bound on the configs sent to a worker at once (keeps results streaming back)
+MAX_CHUNK_SIZE = 2000
+
+# Checkpoint file: a header, then one fixed-size record per finished config
+CHECKPOINT_MAGIC = b"FLSWEEP1"
+# config key, fl/nfl wealth, fl/nfl years in debt, fl/nfl rented years, fl/nfl total debt paid
+CHECKPOINT_RECORD = struct.Struct("<16sqqiiiidd")
+CHECKPOINT_FIELDS = [
+    "fl_wealth", "nfl_wealth",
+    "fl_years_in_debt", "nfl_years_in_debt",
+    "fl_rented_years", "nfl_rented_years",
+    "fl_total_debt_paid", "nfl_total_debt_paid",
+]
+
+
+def config_grid(base: SimulationConfig = DEFAULT_CONFIG, **values):
+    """
+    Builds every combination of the given parameter values
+
+    base: config used for the parameters that are not swept
+    values: parameter name -> list of values, e.g. income=[40000.0, 59000.0]
+
+    Returns:
+        list[SimulationConfig]: one config per combination (last parameter varies fastest)
+    """
+    for name in values:
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown parameter {name!r}, expected one of {PARAMETERS}")
+    names = list(values)
+    return [replace(base, **dict(zip(names, combo))) for combo in itertools.product(*values.values())]
+
+
+class ResultsTable:
+    """
+    Columnar results: one list per column, rows are appended as they arrive
+    """
+    def __init__(self, columns):
+        self.columns = {name: [] for name in columns}
+
+    def append(self, row: dict):
+        """
+        Appends one row (a dict with a value for every column)
+        """
+        for name, column in self.columns.items():
+            column.append(row[name])
+
+    def __len__(self):
+        return len(self.columns["config_index"])
+
+    def __getitem__(self, name):
+        """
+        Returns a column as a NumPy array
+        """
+        return np.asarray(self.columns[name])
+
+    def sorted_by(self, name):
+        """
+        Returns a new table with the rows sorted by a column (rows arrive in completion order)
+        """
+        order = np.argsort(self[name], kind="stable")
+        table = ResultsTable(self.columns)
+        for column_name, column in self.columns.items():
+            table.columns[column_name] = [column[i] for i in order]
+        return table
+
+    def rows(self):
+        """
+        Yields the rows back as dicts
+        """
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+
+def config_key(config: SimulationConfig):
+    """
+    Returns a 16-byte fingerprint of a config's parameters (identifies it in a checkpoint)
+    """
+    values = repr([(name, getattr(config, name)) for name in PARAMETERS])
+    return hashlib.blake2b(values.encode(), digest_size=16).digest()
+
+
+class SweepCheckpoint:
+    """
+    Append-only binary file of finished configs
+    Each finished chunk is appended in one write and flushed to disk, so a crash loses at most the chunks in flight.
+    Configs are identified by their parameters, not their position, so a resumed grid can be reordered or extended.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        """
+        Reads the finished configs
+
+        Returns:
+            dict: config key -> {result column: value}
+        """
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(CHECKPOINT_MAGIC):
+            raise ValueError(f"{self.path} is not a sweep checkpoint")
+        finished = {}
+        body = memoryview(data)[len(CHECKPOINT_MAGIC):]
+        # a record cut short by a crash is ignored (the config just runs again)
+        usable = len(body) - len(body) % CHECKPOINT_RECORD.size
+        for key, *values in CHECKPOINT_RECORD.iter_unpack(body[:usable]):
+            finished[key] = dict(zip(CHECKPOINT_FIELDS, values))
+        return finished
+
+    def append(self, rows, configs):
+        """
+        Appends result rows, configs[row["config_index"]] is the config of each row
+        """
+        new_file = not os.path.exists(self.path)
+        if not new_file and os.path.getsize(self.path) > len(CHECKPOINT_MAGIC):
+            # drop a record cut short by a crash so the new ones stay aligned
+            extra = (os.path.getsize(self.path) - len(CHECKPOINT_MAGIC)) % CHECKPOINT_RECORD.size
+            if extra:
+                os.truncate(self.path, os.path.getsize(self.path) - extra)
+        records = b"".join(
+            CHECKPOINT_RECORD.pack(config_key(configs[row["config_index"]]), *(row[name] for name in CHECKPOINT_FIELDS))
+            for row in rows)
+        with open(self.path, "ab") as f:
+            if new_file:
+                f.write(CHECKPOINT_MAGIC)
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _run_config(config_index: int, config: SimulationConfig, closed_form: bool):
+    """
+    Runs the FL and NFL simulations for one config and returns the result row
+    """
+    row = {name: getattr(config, name) for name in PARAMETERS}
+    row["config_index"] = config_index
+    for prefix, is_fl in [("fl", True), ("nfl", False)]:
+        sim = Simulation(Person(is_fl, config), closed_form=closed_form)
+        sim.run_simulation()
+        row[f"{prefix}_wealth"] = sim.person.get_wealth()
+        row[f"{prefix}_years_in_debt"] = sim.years_in_debt
+        row[f"{prefix}_rented_years"] = sim.rented_years
+        row[f"{prefix}_total_debt_paid"] = sim.total_debt_paid
+    row["wealth_gap"] = row["fl_wealth"] - row["nfl_wealth"]
+    return row
+
+
+def _run_chunk(indexes, configs, closed_form: bool):
+    """
+    Worker entry point: runs a chunk of configs, indexes are their positions in the grid
+    """
+    return [_run_config(index, config, closed_form) for index, config in zip(indexes, configs)]
+
+
+def _chunk_size(n_configs: int, workers: int):
+    """
+    About 4 chunks per worker so faster workers pick up more of the load
+    """
+    return max(1, min(MAX_CHUNK_SIZE, -(-n_configs // (workers * 4))))
+
+
+def iter_sweep(configs, max_workers=None, chunk_size=None, closed_form: bool = True, checkpoint=None,
+               run_chunk=_run_chunk):
+    """
+    Runs every config across a process pool and yields the result rows as chunks finish
+
+    configs: list of SimulationConfig
+    max_workers: number of processes (defaults to every core)
+    chunk_size: configs per work unit (defaults to about 4 chunks per worker)
+    closed_form: use the closed-form yearly steps (same results, faster)
+    checkpoint: path of a checkpoint file; configs already in it are not run again
+        and every finished chunk is appended to it
+    run_chunk: runs one chunk, called as run_chunk(indexes, configs, closed_form) (defaults to _run_chunk,
+        must be a module-level function to be sent to the worker processes)
+
+    Yields:
+        dict: one result row per config, in completion order (config_index gives the grid position)
+    """
+    configs = list(configs)
+    pending = list(range(len(configs)))
+    store = None
+    if checkpoint:
+        store = SweepCheckpoint(checkpoint)
+        finished = store.load()
+        pending = []
+        for index, config in enumerate(configs):
+            record = finished.get(config_key(config))
+            if record is None:
+                pending.append(index)
+                continue
+            row = {name: getattr(config, name) for name in PARAMETERS}
+            row.update(record, config_index=index, wealth_gap=record["fl_wealth"] - record["nfl_wealth"])
+            yield row
+    if not pending:
+        return
+    workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or _chunk_size(len(pending), workers)
+    chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+    if workers == 1:
+        # No pool needed, avoids the process startup cost for small sweeps
+        results = (run_chunk(indexes, [configs[i] for i in indexes], closed_form) for indexes in chunks)
+        for rows in results:
+            if store:
+                store.append(rows, configs)
+            yield from rows
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_chunk, indexes, [configs[i] for i in indexes], closed_form)
+                   for indexes in chunks]
+        for future in as_completed(futures):
+            rows = future.result()
+            if store:
+                store.append(rows, configs)
+            yield from rows
+
+
+def run_sweep(configs, max_workers=None, chunk_size=None, closed_form: bool = True, checkpoint=None):
+    """
+    Runs every config (see iter_sweep) and collects the rows into a ResultsTable sorted by config_index
+    """
+    table = ResultsTable(PARAMETERS + RESULT_COLUMNS)
+    for row in iter_sweep(configs, max_workers, chunk_size, closed_form, checkpoint):
+        table.append(row)
+    return table.sorted_by("config_index")
+
+
+def run_tests():
+    """
+    Runs test cases for the sweep functions
+    """
+    configs = config_grid(income=[50000.0, 59000.0], house_cost=[150000.0, 175000.0])
+    assert len(configs) == 4, "Grid should have one config per combination"
+    assert configs[1].income == 50000.0 and configs[1].house_cost == 175000.0, "Last parameter should vary fastest"
+    assert configs[3] == DEFAULT_CONFIG, "Default values should give the default config"
+    assert configs[0].house_down_payment_fl == 0.20 * 150000.0, "Derived values should follow the swept parameters"
+    print("config_grid test passed!")
+
+    serial = run_sweep(configs, max_workers=1)
+    parallel = run_sweep(configs, max_workers=2, chunk_size=1)
+    assert len(parallel) == 4, "There should be one row per config"
+    assert list(serial.rows()) == list(parallel.rows()), "Parallel and serial sweeps should give the same table"
+    sim_fl = Simulation(Person(True))
+    sim_fl.run_simulation()
+    assert parallel["fl_wealth"][3] == sim_fl.person.get_wealth(), "Default config should match Simulation"
+    print("run_sweep test passed!")
+
+    # Checkpoint: interrupt a sweep after one chunk, then resume it
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sweep.ckpt")
+        partial = iter_sweep(configs, max_workers=1, chunk_size=2, checkpoint=path)
+        for _ in range(2):
+            next(partial)  # first chunk done and saved
+        partial.close()  # "crash"
+        assert len(SweepCheckpoint(path).load()) == 2, "Checkpoint should hold the finished chunk"
+        with open(path, "ab") as f:
+            f.write(b"torn")  # record cut short by the crash
+        # record the configs that are simulated again (max_workers=1 runs the chunks in this process)
+        ran = []
+
+        def run_chunk(indexes, chunk_configs, closed_form):
+            ran.extend(indexes)
+            return _run_chunk(indexes, chunk_configs, closed_form)
+        resumed = ResultsTable(PARAMETERS + RESULT_COLUMNS)
+        for row in iter_sweep(configs, max_workers=1, chunk_size=2, checkpoint=path, run_chunk=run_chunk):
+            resumed.append(row)
+        assert ran == [2, 3], "Only the configs missing from the checkpoint should run again"
+        assert list(resumed.sorted_by("config_index").rows()) == list(serial.rows()), "Resumed sweep should give the same table"
+        assert len(SweepCheckpoint(path).load()) == 4, "Checkpoint should hold every config after resuming"
+        assert (os.path.getsize(path) - len(CHECKPOINT_MAGIC)) % CHECKPOINT_RECORD.size == 0, "Torn record should be dropped"
+    print("checkpoint/resume test passed!")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,159 @@
+"""Write the listings report of every city in a folder, plus a summary comparing the cities.
+
+run_test_code writes the report of chicago_listings.csv only. write_city_reports finds every
+listings file of a folder, parses all of them in one process pool (largest files first, each file
+cut in chunks, see parallel_ingest.py) and writes the report of each city as soon as it's done,
+printing the progress and the time spent on each city. Then it writes summary.txt, one line per city.
+The title of each report is dated with the most recent review of its file, unless a date is given.
+
+Usage:
+    python city_reports.py listings_folder [reports_folder]
+"""
+
+import glob
+import os
+import sys
+import time
+
+from listings_report import percent
+from parallel_ingest import CHUNK_SIZE, iter_reports
+
+# Name of the cross-city summary in the reports folder
+SUMMARY_FILE = "summary.txt"
+
+
+def city_name(path: str) -> str:
+    """Find the city of a listings file
+
+    Args:
+        path (str): the listings file, e.g. data/chicago_listings.csv
+    Returns:
+        str: the file name without the folder, the extension and "_listings", e.g. chicago
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[:-len("_listings")] if name.endswith("_listings") else name
+
+
+def find_listing_files(directory: str) -> list[str]:
+    """List the listings files of a folder
+
+    Args:
+        directory (str): the folder
+    Returns:
+        list[str]: the paths of its .csv files, sorted by name
+    """
+    return sorted(glob.glob(os.path.join(directory, "*.csv")))
+
+
+def write_summary(f, reports: dict) -> None:
+    """Write one line per city, the cities with the most listings first
+
+    Args:
+        f: the open text file to write to
+        reports (dict[str, ListingsReport]): city -> report
+    """
+    f.write(f"{'City':<20} {'Listings':>9} {'Short-term':>11} {'Entire home':>12} {'Unlicensed':>11} "
+            f"{'Multi-listings':>15} {'Median price':>13} {'Average price':>14}\n")
+    for city, report in sorted(reports.items(), key=lambda item: (-item[1].total, item[0])):
+        n = report.total
+        unlicensed = report.license_status["unlicensed"] + report.license_status["pending"]
+        entire_homes = report.room_types.get("Entire home/apt", 0)
+        median = f"${report.median_price():.02f}" if report.price_count() > 0 else "-"
+        average = f"${report.average_price():.02f}" if report.price_count() > 0 else "-"
+        f.write(f"{city:<20} {n:>9,} {percent(report.short_term, n):>10}% {percent(entire_homes, n):>11}% "
+                f"{percent(unlicensed, n):>10}% {percent(report.count_multi_listings(), n):>14}% "
+                f"{median:>13} {average:>14}\n")
+    total = sum(report.total for report in reports.values())
+    f.write(f"\n{len(reports)} cities, {total:,} listings\n")
+
+
+def write_city_reports(directory: str, output_directory: str = None, max_workers: int = None,
+                       chunk_size: int = CHUNK_SIZE, data_date: str = None, log=print) -> dict:
+    """Write the report of every listings file of a folder, and the summary
+
+    Args:
+        directory (str): the folder with the listings files
+        output_directory (str): where the reports go (<city>_report.txt and summary.txt), directory by default
+        max_workers (int): number of processes (every core by default)
+        chunk_size (int): about how many bytes per chunk sent to a worker
+        data_date (str): date of the snapshots for the titles, the most recent review of each file by default
+        log: called with every progress line, print by default
+    Returns:
+        dict[str, ListingsReport]: city -> report
+    """
+    output_directory = output_directory or directory
+    os.makedirs(output_directory, exist_ok=True)
+    paths = find_listing_files(directory)
+    cities = [city_name(path) for path in paths]
+    if len(set(cities)) != len(cities):
+        raise ValueError("two listings files have the same city name")
+    log(f"{len(paths)} listings files in {directory}")
+
+    start = time.perf_counter()
+    reports = dict()
+    for path, report, seconds in iter_reports(paths, max_workers, chunk_size):
+        city = city_name(path)
+        output_file = os.path.join(output_directory, f"{city}_report.txt")
+        with open(output_file, "w") as f:
+            report.write(f, os.path.basename(path), data_date or report.data_date())
+        reports[city] = report
+        log(f"[{len(reports)}/{len(paths)}] {city}: {report.total:,} listings, parsed in {seconds:.2f} s "
+            f"({time.perf_counter() - start:.2f} s elapsed) -> {output_file}")
+
+    summary_file = os.path.join(output_directory, SUMMARY_FILE)
+    with open(summary_file, "w") as f:
+        write_summary(f, reports)
+    log(f"Summary of {len(reports)} cities written to {summary_file} in {time.perf_counter() - start:.2f} s")
+    return reports
+
+
+def run_tests() -> None:
+    """Write the reports of three cities made from chicago_listings.csv (run from the Lab 3 folder)"""
+    import csv
+    import io
+    import shutil
+    import tempfile
+
+    import lab3
+    from listings_report import ListingsReport
+
+    rows = lab3.read_data("chicago_listings.csv")
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy("chicago_listings.csv", directory)
+        for city, size in [("evanston", 400), ("oak_park", 2000), ("ghost_town", 0)]:
+            with open(os.path.join(directory, f"{city}_listings.csv"), 'w', newline='') as file:
+                csv.writer(file).writerows(rows[:size + 1])
+        output_directory = os.path.join(directory, "reports")
+        lines = []
+        reports = write_city_reports(directory, output_directory, max_workers=2, chunk_size=200000, log=lines.append)
+
+        assert sorted(reports) == ["chicago", "evanston", "ghost_town", "oak_park"], "Every city should have a report"
+        assert len(lines) == 6 and lines[1].startswith("[1/4]") and lines[4].startswith("[4/4]"), "Progress should be logged per city"
+        for city, size in [("chicago", len(rows) - 1), ("evanston", 400), ("oak_park", 2000), ("ghost_town", 0)]:
+            file_name = f"{city}_listings.csv"
+            expected = io.StringIO()
+            city_report = ListingsReport.from_csv(os.path.join(directory, file_name))
+            city_report.write(expected, file_name, city_report.data_date())
+            with open(os.path.join(output_directory, f"{city}_report.txt")) as file:
+                assert file.read() == expected.getvalue(), "Each city report should be the same as a report of its file alone"
+            assert reports[city].total == size, "Each report should count the listings of its city"
+        with open(os.path.join(output_directory, SUMMARY_FILE)) as file:
+            summary = file.read().splitlines()
+        assert [line.split()[0] for line in summary[1:5]] == ["chicago", "oak_park", "evanston", "ghost_town"], "Cities should be sorted by listings"
+        assert summary[-1] == f"4 cities, {len(rows) - 1 + 2400:,} listings", "The summary should count every listing"
+        assert "64.9%" in summary[1], "Chicago's short-term share should match the report"
+        with open(os.path.join(output_directory, "chicago_report.txt")) as file:
+            assert "(Data as of December 17, 2024)" in file.read(), "The title should be dated from the file"
+        with open(os.path.join(output_directory, "ghost_town_report.txt")) as file:
+            assert "Total listings: 0" in file.read(), "A file without listings should still get a report"
+    assert city_name("data/chicago_listings.csv") == "chicago" and city_name("paris.csv") == "paris", "City names come from the file names"
+    print("write_city_reports test passed!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # flush so the progress shows up as it goes, even when piped to a file
+        write_city_reports(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None,
+                           log=lambda line: print(line, flush=True))
+    else:
+        run_tests()
@@ -8,8 +8,12 @@ Date: Feb 5, 2025
 """
 
 # Import necessary modules
+import bisect
+import collections
 import csv
+import functools
 import os
+import re
 import statistics
 
 # TODO: Define the necessary constants
@@ -92,6 +96,50 @@ def count_listings_by_type(data: list[list[str]]) -> dict[str, int]:
 
 # TODO: Task 3: Count the number of listings by their license type (licensed, unlicensed, pending, or exempt) (*do* hardcode the keys here).
 # Returns a dictionary with string keys and integer values. The keys are "unlicensed", "pending", "exempt", "licensed".
+#
+# One regex does both checks: 'pending' in any case (re.ASCII so only A-Z match a-z, like .lower()),
+# otherwise '32' followed by an optional space and '+' or '-'. The lookaheads make pending win wherever it is.
+LICENSE_PATTERN = re.compile(r"(?=.*(?P<pending>pending))|(?=.*(?P<exempt>32 ?[+-]))", re.IGNORECASE | re.ASCII | re.DOTALL)
+# Licenses remembered by classify_license: most license numbers are unique, only the common values
+# ("", "City registration pending", ...) are worth keeping
+LICENSE_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=LICENSE_CACHE_SIZE)
+def classify_license(license: str) -> str:
+    """Find the license type of one license (the last LICENSE_CACHE_SIZE distinct licenses are remembered)
+
+    Args:
+        license (str): the license column of a listing
+
+    Returns:
+        str: "unlicensed", "pending", "exempt" or "licensed"
+    """
+    if license == None or license == "":
+        return "unlicensed"
+    match = LICENSE_PATTERN.match(license)
+    if match is None:
+        return "licensed"
+    return "pending" if match.group("pending") is not None else "exempt"
+
+
+def count_license_status(licenses) -> dict[str, int]:
+    """Count a whole license column by license type
+
+    Args:
+        licenses: the license of every listing (any iterable of strings)
+
+    Returns:
+        dict[str, int]: same keys and counts as get_license_status
+    """
+    inventory = {"unlicensed":0, "pending":0, "exempt":0, "licensed":0}
+    # licenses repeat a lot (empty, "City registration pending", ...): count the distinct ones first,
+    # then classify each of them once
+    for license, count in collections.Counter(licenses).items():
+        inventory[classify_license(license)] += count
+    return inventory
+
+
 def get_license_status(data: list[list[str]]) -> dict[str, int]:
     """Make an inventory of the listings by their license type
 
@@ -109,41 +157,63 @@ def get_license_status(data: list[list[str]]) -> dict[str, int]:
     #
     # Some of your values might be different from those on Inside Airbnb, but pending and unlicensed should match
 
-    # Your code goes here
-    # Initialize a dictionary with keys hardcoded:
-        # set initial count to zero
-    inventory = {"unlicensed":0, "pending":0, "exempt":0, "licensed":0} 
-
-    # Loop through the listings data and allocate a +1 count to each license type
-    for listing in data:
-        # check with if statements for all types according to specs above 
-        if listing[INDEX_LICENSE] == None or listing[INDEX_LICENSE] == "":
-            inventory["unlicensed"] += 1 
-        elif 'pending' in listing[INDEX_LICENSE].lower(): 
-            inventory["pending"] += 1 
-        elif '32+' in listing[INDEX_LICENSE] or '32 +' in listing[INDEX_LICENSE] or '32-' in listing[INDEX_LICENSE] or '32 -'in listing[INDEX_LICENSE]:
-            inventory["exempt"] += 1 
-        else: 
-            inventory["licensed"] += 1 
-    return inventory
+    # Classify the whole license column at once (see classify_license for the rules above)
+    return count_license_status(listing[INDEX_LICENSE] for listing in data)
 
 # TODO: Task 4: Count the number of listings that are by hosts who have multiple listings.
 # Returns the number of listings by hosts with multiple listings (they have > 1 listing).
 #
 # Refer to the "Listings Per Hosts" section on https://insideairbnb.com/chicago/.
 # We are looking for what is referred to as the number of multi-listings.
-def count_multi_listings(data: list[list[str]]) -> int:
-    """Counts the number of hosts who have multiple listings
+def build_host_index(data: list[list[str]]) -> dict[str, int]:
+    """Count the listings of every host in one pass
+
+    Args:
+        data list[list[str]]: a list of listings with characteristics, including host_id
+
+    Returns:
+        dict[str, int]: host_id -> number of listings of that host (in order of first appearance)
+    """
+    host_index = dict()
+    for listing in data:
+        host = listing[INDEX_HOST_ID]
+        host_index[host] = host_index.get(host, 0) + 1
+    return host_index
+
+
+def host_count_histogram(host_index: dict[str, int], bounds: list[int]) -> list[int]:
+    """Count the listings by hosts whose number of listings falls in each bucket
+
+    Args:
+        host_index (dict[str, int]): host_id -> number of listings (see build_host_index)
+        bounds (list[int]): sorted lower bounds of the buckets, bucket j is bounds[j] <= count < bounds[j + 1]
+            and the last bucket has no upper bound, e.g. [1, 2, 5] -> 1 listing, 2 to 4 listings, 5+ listings
+
+    Returns:
+        list[int]: the number of listings in each bucket (listings below bounds[0] are not counted)
+    """
+    histogram = [0] * len(bounds)
+    for count in host_index.values():
+        bucket = bisect.bisect_right(bounds, count) - 1
+        if bucket >= 0:
+            histogram[bucket] += count
+    return histogram
+
+
+def count_multi_listings(data: list[list[str]], host_index: dict[str, int] = None) -> int:
+    """Counts the number of listings by hosts who have multiple listings
     Args:
         data list[list[str]]: a list of listings with characteristics, including host_id
+        host_index (dict[str, int]): optional result of build_host_index(data), to avoid building it again
         
     Returns: 
-        int: the total number of hosts who have more than 1 listing on Airbnb
+        int: the total number of listings by hosts who have more than 1 listing on Airbnb
     """
     # Your code goes here
-    inventory = [listing[INDEX_HOST_ID] for listing in data]
-    count = [h_id for h_id in inventory if inventory.count(h_id) > 1]
-    return len(count)
+    # one pass to count the listings per host, instead of inventory.count(h_id) for every listing
+    if host_index is None:
+        host_index = build_host_index(data)
+    return sum(count for count in host_index.values() if count > 1)
 
 # TODO: Task 5: Count the number of listings that are by hosts who have i listings, where 0 <= i <= 10.
 # Returns a list of 11 integers where for every number i from 0 to 10...
@@ -153,28 +223,20 @@ def count_multi_listings(data: list[list[str]]) -> int:
 #   * At index 10, list[l0] is how many listings are by hosts with >= 10 listings.
 #
 # Refer to the bar diagram titled "Listings Per Host" on https://insideairbnb.com/chicago.
-def count_listings_by_host_count(data: list[list[str]]) -> list[int]:
-    """Counts the number of hosts who have i listings, where i ranges from 0 to 10+
+def count_listings_by_host_count(data: list[list[str]], host_index: dict[str, int] = None) -> list[int]:
+    """Counts the number of listings by hosts who have i listings, where i ranges from 0 to 10+
     Args:
         data list[list[str]]: a list of listings with characteristics, including host_id
+        host_index (dict[str, int]): optional result of build_host_index(data), to avoid building it again
         
     Returns: 
-        list[int]: the number of hosts who have the index's amount of listings 
+        list[int]: the number of listings by hosts who have the index's amount of listings 
     """
-    listing_counts = [0] * 11  # [0, 0,...0]
-
-    inventory = [listing[INDEX_HOST_ID] for listing in data]
-    count = list()
-
     # Your code goes here
-    for i in range(len(listing_counts)): 
-        if i != 10:
-            count = [h_id for h_id in inventory if inventory.count(h_id) == i and h_id not in count]
-            listing_counts[i] = len(count)
-        if i == 10:
-            count = [h_id for h_id in inventory if inventory.count(h_id) >= i and h_id not in count]
-            listing_counts[i] = len(count)
-    return listing_counts
+    # buckets 0, 1, ..., 9 and 10+ over the listings per host, built once
+    if host_index is None:
+        host_index = build_host_index(data)
+    return host_count_histogram(host_index, list(range(11)))
 
 # TODO: Task 6: Return a list containing listing prices, excluding empty prices.
 # The room type is an optional parameter. It's what to filter the listings by.
@@ -340,6 +402,12 @@ def run_test_code() -> None:
     assert isinstance(license_status, dict), "get_license_status should return a dictionary"
     assert "exempt" in license_status, "get_license_status should have string keys 'licensed', 'unlicensed', 'exempt',and 'pending'"
     assert sum(list(license_status.values())) == len(listings), "check the values returned by get_license_status"
+    for license, expected in [("", "unlicensed"), ("R22000091234", "licensed"), ("City registration PENDING", "pending"),
+                              ("32+ Days Listing", "exempt"), ("Exempt 32 - nights", "exempt"), ("32 + pending", "pending"),
+                              ("32\n-", "licensed"), ("Pend\u0130ng", "licensed"), ("323", "licensed")]:
+        assert classify_license(license) == expected, f"classify_license({license!r}) should be {expected}"
+    assert count_license_status(listing[INDEX_LICENSE] for listing in listings) == license_status, "The batch counts should match"
+    assert classify_license.cache_info().currsize <= LICENSE_CACHE_SIZE, "Remembered licenses should stay bounded"
     unlicensed = license_status["unlicensed"] + license_status["pending"]
     f.write(
         f"\nNumber of unlicensed current listings, at least {unlicensed:,} ({round(((unlicensed/n)*100),1)}%); "
@@ -358,7 +426,13 @@ def run_test_code() -> None:
     )
 
     # Test Task 5
-    counts = count_listings_by_host_count(listings)
+    host_index = build_host_index(listings)
+    assert sum(host_index.values()) == len(listings), "build_host_index should count every listing"
+    assert count_multi_listings(listings, host_index) == multihosts, "count_multi_listings should give the same count with a host index"
+    assert host_count_histogram(host_index, [1, 2]) == [len(listings) - multihosts, multihosts], "Histogram should split single and multi listings"
+    assert sum(host_count_histogram(host_index, [1, 3, 10, 100])) == len(listings), "Histogram buckets should cover every listing"
+    assert host_count_histogram({"a": 2, "b": 5}, [3, 6]) == [5, 0], "Counts below the first bound should be skipped"
+    counts = count_listings_by_host_count(listings, host_index)
     assert counts[0] == 0, "No host has 0 listings, otherwise they wouldn't be in the data"
     assert counts[1] == len(listings) - count_multi_listings(listings), "Single listing count incorrect"
 
@@ -398,6 +472,11 @@ def run_test_code() -> None:
 
 
     # Test Task 8
+    # Index the listings once: the host names below are then dict lookups instead of a full scan each
+    # (imported here, listings_index imports the constants of this file)
+    from listings_index import ListingsIndex
+    index = ListingsIndex(listings)
+    assert index.get_host_name_by_id("2613") == get_host_name_by_id(listings, "2613"), "The index should find the same host names"
     # Get names of hosts and their listings
     listing_counts = listings_per_host_with_type(listings)
     assert sum(list(listing_counts.values())) == len(listings), "Number of listings per host computed incorrectly"
@@ -405,13 +484,13 @@ def run_test_code() -> None:
     top_hosts = sorted(listing_counts.items(), key=lambda item: item[1], reverse=True)[:10]
     f.write(f"\n-----Top {len(top_hosts)} hosts with the largest number of listings-----\n")
     for host_id, count in top_hosts:
-        f.write(f"{get_host_name_by_id(listings, host_id):<17} has {count}\n")
+        f.write(f"{index.get_host_name_by_id(host_id):<17} has {count}\n")
 
     listing_counts = listings_per_host_with_type(listings, "Entire home/apt")
     top_hosts = sorted(listing_counts.items(), key=lambda item: item[1], reverse=True)[:10]
     f.write(f"\n-----Top {len(top_hosts)} hosts with largest number of entire home listings-----\n")
     for host_id, count in top_hosts:
-        f.write(f"{get_host_name_by_id(listings, host_id):<17} has {count}\n")
+        f.write(f"{index.get_host_name_by_id(host_id):<17} has {count}\n")
 
     f.close()
 
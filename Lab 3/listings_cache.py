@@ -0,0 +1,333 @@
+"""Keep the parsed listings on disk so reruns skip the CSV parsing.
+
+load_listings_cached parses the CSV once with load_listings and saves the ListingsTable next to it
+(chicago_listings.csv -> chicago_listings.listings.cache). The next runs map the cache file into memory
+and the columns are read straight from it, without parsing or copying anything.
+
+The cache remembers the size, modification time and hash of the CSV it was built from:
+- same size and modification time: the cache is used as is
+- same size, different modification time: the CSV is hashed again, the cache is used if the content is the same
+  and the new modification time is saved in the cache, so the next runs don't hash it again
+- anything else: the CSV is parsed again and the cache is rewritten
+
+File layout: magic, header length, JSON header (source file, columns, where each buffer is),
+then the column buffers (int64/float64/uint32/byte arrays), each one starting on an 8-byte boundary.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from listings_table import DictionaryColumn, ListingsTable, NumberColumn, StringColumn, load_listings
+
+CACHE_MAGIC = b"LSTCACHE"
+CACHE_VERSION = 1
+# magic, version, header length
+CACHE_PREFIX = struct.Struct("<8sIQ")
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def default_cache_path(path_to_csv: str) -> str:
+    """Find where the cache of a CSV goes
+
+    Args:
+        path_to_csv (str): the listings file
+    Returns:
+        str: the same path with .listings.cache instead of .csv
+    """
+    return os.path.splitext(path_to_csv)[0] + ".listings.cache"
+
+
+def file_hash(path: str) -> str:
+    """Hash the content of a file
+
+    Args:
+        path (str): the file to hash
+    Returns:
+        str: the BLAKE2b hash of the file, in hex
+    """
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(path_to_csv: str, content_hash: str = None) -> dict:
+    stat = os.stat(path_to_csv)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": content_hash or file_hash(path_to_csv),
+    }
+
+
+def _column_buffers(column) -> tuple[str, dict, dict]:
+    """Split a column into its buffers and the small values that go in the header"""
+    if isinstance(column, NumberColumn):
+        buffers = {"data": column.data, "nulls": column.nulls}
+        if column.is_float:
+            buffers["decimals"] = column.decimals
+        kind = "float" if column.is_float else "int"
+        return kind, buffers, {"raw": {str(index): text for index, text in column.raw.items()}}
+    if isinstance(column, DictionaryColumn):
+        return "category", {"codes": column.codes}, {"values": column.values}
+    return "str", {"data": column.data, "offsets": column.offsets}, {}
+
+
+def write_cache(table: ListingsTable, path_to_csv: str, cache_path: str, source: dict = None) -> None:
+    """Save a table to a cache file (written to a temporary file first, then renamed)
+
+    Args:
+        table (ListingsTable): the parsed listings
+        path_to_csv (str): the CSV the table was parsed from
+        cache_path (str): where to write the cache
+        source (dict): size, mtime_ns and hash of the CSV taken before parsing it, read now by default
+    """
+    header = {
+        "byteorder": sys.byteorder,
+        "source": source or _source_info(path_to_csv),
+        "rows": len(table),
+        "column_names": table.column_names,
+        "columns": [],
+    }
+    buffers = []
+    offset = 0
+    for column in table.columns:
+        kind, column_buffers, extra = _column_buffers(column)
+        description = {"type": kind, "buffers": {}, **extra}
+        for name, buffer in column_buffers.items():
+            data = bytes(buffer)
+            typecode = buffer.typecode if hasattr(buffer, "typecode") else "B"
+            description["buffers"][name] = [offset, len(data), typecode]
+            buffers.append(data)
+            offset += len(data) + (-len(data) % 8)
+        header["columns"].append(description)
+
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b" " * (-(CACHE_PREFIX.size + len(header_bytes)) % 8)
+    temporary_path = cache_path + ".tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(CACHE_PREFIX.pack(CACHE_MAGIC, CACHE_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for data in buffers:
+            file.write(data)
+            file.write(b"\0" * (-len(data) % 8))
+    os.replace(temporary_path, cache_path)
+
+
+def read_cache_header(cache_path: str):
+    """Read the header of a cache file
+
+    Args:
+        cache_path (str): the cache file
+    Returns:
+        dict | None: the header, None if the file is missing or not a cache of this version
+    """
+    try:
+        with open(cache_path, 'rb') as file:
+            magic, version, header_length = CACHE_PREFIX.unpack(file.read(CACHE_PREFIX.size))
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return None
+            return json.loads(file.read(header_length))
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def open_cache(cache_path: str) -> ListingsTable:
+    """Map a cache file into memory as a ListingsTable (read only, nothing is copied)
+
+    Args:
+        cache_path (str): the cache file
+    Returns:
+        ListingsTable: the cached listings, its columns are views of the file
+    """
+    with open(cache_path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    _, _, header_length = CACHE_PREFIX.unpack_from(mapped)
+    header = json.loads(mapped[CACHE_PREFIX.size:CACHE_PREFIX.size + header_length])
+    start = CACHE_PREFIX.size + header_length
+    view = memoryview(mapped)
+
+    def buffer(description: dict, name: str):
+        offset, length, typecode = description["buffers"][name]
+        return view[start + offset:start + offset + length].cast(typecode)
+
+    table = ListingsTable(header["column_names"])
+    for index, description in enumerate(header["columns"]):
+        kind = description["type"]
+        if kind in ("int", "float"):
+            column = NumberColumn('d' if kind == "float" else 'q')
+            column.data = buffer(description, "data")
+            column.nulls = buffer(description, "nulls")
+            if kind == "float":
+                column.decimals = buffer(description, "decimals")
+            column.raw = {int(row): text for row, text in description["raw"].items()}
+        elif kind == "category":
+            column = DictionaryColumn()
+            column.codes = buffer(description, "codes")
+            column.values = description["values"]
+            column.lookup = {text: code for code, text in enumerate(column.values)}
+        else:
+            column = StringColumn()
+            column.data = buffer(description, "data")
+            column.offsets = buffer(description, "offsets")
+        table.columns[index] = column
+    # the views keep the mapping open as long as the table is used
+    table.mapped = mapped
+    return table
+
+
+def cache_is_valid(path_to_csv: str, header, hash_file=file_hash) -> bool:
+    """Check that a cache was built from the current content of the CSV
+
+    Args:
+        path_to_csv (str): the listings file
+        header (dict | None): the header of the cache (see read_cache_header)
+        hash_file: hashes the CSV when only its modification time changed, file_hash by default
+    Returns:
+        bool: True if the cache can be used
+    """
+    if header is None or header.get("byteorder") != sys.byteorder:
+        return False
+    source = header["source"]
+    stat = os.stat(path_to_csv)
+    if stat.st_size != source["size"]:
+        return False
+    if stat.st_mtime_ns == source["mtime_ns"]:
+        return True
+    # touched but maybe not changed: compare the content
+    return hash_file(path_to_csv) == source["hash"]
+
+
+def _refresh_source(path_to_csv: str, cache_path: str, header: dict) -> None:
+    """Save the new size and modification time of a CSV that was touched but not changed
+
+    The header is rewritten in place, padded with spaces to its old length so the buffers don't move.
+    If it doesn't fit anymore, the cache is left as is (and the CSV is hashed again next time).
+    """
+    header = dict(header, source=_source_info(path_to_csv, header["source"]["hash"]))
+    header_bytes = json.dumps(header).encode()
+    try:
+        with open(cache_path, 'r+b') as file:
+            _, _, header_length = CACHE_PREFIX.unpack(file.read(CACHE_PREFIX.size))
+            if len(header_bytes) <= header_length:
+                file.write(header_bytes + b" " * (header_length - len(header_bytes)))
+    except (OSError, struct.error):
+        # no write access: the cache is still valid, only slower to check
+        pass
+
+
+def load_listings_cached(path_to_csv: str, cache_path: str = None, parse=load_listings,
+                         hash_file=file_hash) -> ListingsTable:
+    """Load the listings from the cache if it's up to date, otherwise parse the CSV and rebuild the cache
+
+    Args:
+        path_to_csv (str): the listings file
+        cache_path (str): where the cache goes, next to the CSV by default
+        parse: reads the CSV into a ListingsTable, load_listings by default
+        hash_file: hashes the CSV, file_hash by default
+    Returns:
+        ListingsTable: the listings (read only when they come from the cache)
+    """
+    cache_path = cache_path or default_cache_path(path_to_csv)
+    header = read_cache_header(cache_path)
+    if cache_is_valid(path_to_csv, header, hash_file):
+        if os.stat(path_to_csv).st_mtime_ns != header["source"]["mtime_ns"]:
+            _refresh_source(path_to_csv, cache_path, header)
+        return open_cache(cache_path)
+    # size, modification time and hash before parsing: if the CSV changes while it's parsed, the cache
+    # would store the new ones with the old content
+    source = _source_info(path_to_csv, hash_file(path_to_csv))
+    table = parse(path_to_csv)
+    stat = os.stat(path_to_csv)
+    if stat.st_size != source["size"] or stat.st_mtime_ns != source["mtime_ns"]:
+        return table
+    try:
+        write_cache(table, path_to_csv, cache_path, source)
+    except OSError:
+        # no write access next to the file: work without a cache
+        return table
+    return open_cache(cache_path)
+
+
+def run_tests() -> None:
+    """Check the cache on a copy of chicago_listings.csv (run from the Lab 3 folder)"""
+    import csv
+    import shutil
+    import tempfile
+    import time
+
+    import lab3
+
+    # count the CSV parses and hashes done by load_listings_cached
+    calls = {"parse": 0, "hash": 0}
+
+    def parse(path_to_csv):
+        calls["parse"] += 1
+        return load_listings(path_to_csv)
+
+    def hash_file(path):
+        calls["hash"] += 1
+        return file_hash(path)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "listings.csv")
+        shutil.copy("chicago_listings.csv", path)
+        listings = lab3.read_data(path)[1:]
+
+        start = time.perf_counter()
+        cold = load_listings_cached(path, parse=parse, hash_file=hash_file)
+        cold_time = time.perf_counter() - start
+        assert calls["parse"] == 1, "A cold start should parse the CSV"
+        assert os.path.exists(default_cache_path(path)), "The cache should be written next to the CSV"
+        start = time.perf_counter()
+        warm = load_listings_cached(path, parse=parse, hash_file=hash_file)
+        warm_time = time.perf_counter() - start
+        assert calls == {"parse": 1, "hash": 1}, "A warm start should neither parse nor hash the CSV"
+        assert isinstance(warm.column("price").data, memoryview), "A warm start should map the cache"
+        assert len(warm) == len(listings) and all(warm[i] == listings[i] for i in range(len(listings))), "Cached rows should match the CSV"
+        assert lab3.get_prices(warm) == lab3.get_prices(listings), "The lab3.py functions should work on the cached table"
+        assert warm.column("room_type").code_of("Private room") == cold.column("room_type").code_of("Private room"), "Dictionary codes should be kept"
+        print(f"load_listings_cached test passed! (parse {cold_time * 1000:.0f} ms, warm start {warm_time * 1000:.1f} ms)")
+
+        # Touching the file keeps the cache (same content), changing it rebuilds the cache
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert cache_is_valid(path, read_cache_header(default_cache_path(path))), "Same content should keep the cache"
+        touched = load_listings_cached(path, parse=parse, hash_file=hash_file)
+        assert calls == {"parse": 1, "hash": 2}, "A touched CSV should be hashed, not parsed"
+        assert len(touched) == len(listings), "A touched CSV should use the cache"
+        assert read_cache_header(default_cache_path(path))["source"]["mtime_ns"] == os.stat(path).st_mtime_ns, "The new modification time should be saved"
+        touched = load_listings_cached(path, parse=parse, hash_file=hash_file)
+        assert calls == {"parse": 1, "hash": 2}, "After a match the CSV shouldn't be hashed again"
+        assert touched[0] == listings[0], "The refreshed cache should still read"
+        with open(path, 'a', newline='') as file:
+            # chicago_listings.csv doesn't end with a newline
+            file.write("\n")
+            csv.writer(file).writerow(listings[0])
+        assert not cache_is_valid(path, read_cache_header(default_cache_path(path))), "A changed CSV should invalidate the cache"
+        changed = load_listings_cached(path, parse=parse, hash_file=hash_file)
+        assert len(changed) == len(listings) + 1 and changed[-1] == listings[0], "The cache should be rebuilt from the new CSV"
+        assert read_cache_header(os.path.join(directory, "missing.cache")) is None, "A missing cache has no header"
+
+        # A CSV changed while it's parsed: the table parsed from the old content is not cached
+        def parse_then_change(path_to_csv):
+            table = load_listings(path_to_csv)
+            with open(path_to_csv, 'a', newline='') as file:
+                csv.writer(file).writerow(listings[1])
+            return table
+        os.remove(default_cache_path(path))
+        racing = load_listings_cached(path, parse=parse_then_change)
+        assert len(racing) == len(listings) + 1, "The table parsed before the change should be returned"
+        assert not os.path.exists(default_cache_path(path)), "The old content should not be cached under the new size"
+        fresh = load_listings_cached(path)
+        assert len(fresh) == len(listings) + 2 and fresh[-1] == listings[1], "The next load should parse the new CSV"
+        del warm, cold, changed, touched, racing, fresh
+        print("cache invalidation test passed!")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,335 @@
+"""Update the report of a city from its previous snapshot instead of recomputing it.
+
+Inside Airbnb publishes a new snapshot of every city each quarter, and most listings don't change.
+DeltaReport keeps the ListingsReport of the last snapshot with a fingerprint (hash of the CSV record)
+of every listing. update reads the records of the new snapshot without parsing them, matches the
+listings by listing_id (the first column) and only parses and updates the report for the listings
+that were added, removed or changed: a changed listing is taken out with its old values (kept in
+the state) and added back with the new ones. Reading and hashing the records still takes about half
+the time of a full report, the rest of the parsing is saved.
+
+The counts, host histograms and price statistics are the same as a report built from scratch.
+Hosts tied in the top 10 may come in a different order, and a host's name is the last one added.
+The report is rebuilt from the file instead when updating it would not give the same numbers:
+- a snapshot has an empty room type: count_listings_by_type depends on the order of the rows
+- a room type has more than max_prices distinct prices: its prices are merged into centroids
+  (see price_stats.py) and a removed price can only be taken out of the closest one
+
+Usage:
+    python listings_delta.py state_file listings.csv [report.txt]
+"""
+
+import csv
+import hashlib
+import io
+import os
+import pickle
+import sys
+
+from lab3 import (INDEX_HOST_ID, INDEX_HOST_NAME, INDEX_LAST_REVIEW, INDEX_LICENSE, INDEX_LISTING_ID, INDEX_NIGHTS,
+                  INDEX_PRICE, INDEX_TYPE)
+from listings_report import ListingsReport
+from price_stats import MAX_VALUES
+
+# Columns the report reads, kept for every listing to take it out of the report later
+REPORT_COLUMNS = [INDEX_NIGHTS, INDEX_TYPE, INDEX_LICENSE, INDEX_HOST_ID, INDEX_HOST_NAME, INDEX_PRICE, INDEX_LAST_REVIEW]
+
+
+def fingerprint(record: str) -> bytes:
+    """Hash a whole CSV record
+
+    Args:
+        record (str): the text of one record of the listings file, without the final newline
+    Returns:
+        bytes: 16-byte BLAKE2b hash of the text (same text, same hash)
+    """
+    return hashlib.blake2b(record.encode(), digest_size=16).digest()
+
+
+def _report_values(listing: list[str]) -> tuple:
+    return tuple(listing[column] for column in REPORT_COLUMNS)
+
+
+def _row(values: tuple) -> list[str]:
+    """Rebuild a row with the REPORT_COLUMNS values, enough for ListingsReport.add/remove"""
+    row = [""] * (max(REPORT_COLUMNS) + 1)
+    for column, value in zip(REPORT_COLUMNS, values):
+        row[column] = value
+    return row
+
+
+# Position of the room type in the values kept for every listing
+_TYPE_VALUE = REPORT_COLUMNS.index(INDEX_TYPE)
+
+
+def _read_records(path_to_csv: str):
+    """Yield the text of every record after the header, without parsing it
+
+    A record goes on to the next line while it has an odd number of quote characters (a newline
+    inside a quoted field, see parallel_ingest.py).
+    """
+    with open(path_to_csv, 'r') as file:
+        pending = ""
+        header = True
+        for line in file:
+            if pending:
+                pending += line
+                if pending.count('"') % 2 == 1:
+                    continue
+                record, pending = pending, ""
+            elif line.count('"') % 2 == 1:
+                pending = line
+                continue
+            else:
+                record = line
+            if header:
+                header = False
+            elif record.strip("\n"):
+                yield record.rstrip("\n")
+        if pending and not header:
+            yield pending.rstrip("\n")
+
+
+def _parse(record: str) -> list[str]:
+    return next(csv.reader(io.StringIO(record)))
+
+
+class DeltaReport:
+    """The report of the last snapshot and what is needed to update it
+
+    Attributes:
+        report (ListingsReport): the report of the last snapshot
+        listings (dict[str, tuple[bytes, tuple]]): listing id -> (fingerprint, values of REPORT_COLUMNS)
+        source (str): the last snapshot
+    """
+
+    def __init__(self, max_prices: int = MAX_VALUES):
+        """Start with an empty report
+
+        Args:
+            max_prices (int): distinct prices kept per room type (see ListingsReport)
+        """
+        self.report = ListingsReport(max_prices)
+        self.listings = dict()
+        self.source = None
+
+    @classmethod
+    def from_csv(cls, path_to_csv: str, max_prices: int = MAX_VALUES) -> "DeltaReport":
+        """Build the report of a first snapshot
+
+        Args:
+            path_to_csv (str): the listings file
+            max_prices (int): distinct prices kept per room type (see ListingsReport)
+        Returns:
+            DeltaReport: the report and the fingerprints of every listing
+        """
+        delta = cls(max_prices)
+        delta.update(path_to_csv)
+        return delta
+
+    def update(self, path_to_csv: str) -> dict[str, int]:
+        """Bring the report to a new snapshot, updating it for the listings that changed
+
+        Args:
+            path_to_csv (str): the new listings file
+        Returns:
+            dict[str, int]: number of listings "added", "removed", "changed" and "unchanged"
+        Raises:
+            ValueError: if a listing id appears twice in the file
+        """
+        listings = dict()
+        added = []
+        changed = []
+        # count_listings_by_type stops at the first empty room type, wherever it is in the file
+        empty_room_type = False
+        for record in _read_records(path_to_csv):
+            listing = None
+            if record.startswith('"'):
+                listing = _parse(record)
+                listing_id = listing[INDEX_LISTING_ID]
+            else:
+                # the listing id is the first column
+                listing_id = record.partition(",")[0]
+            if listing_id in listings:
+                raise ValueError(f"listing {listing_id} appears twice in {path_to_csv}")
+            row_fingerprint = fingerprint(record)
+            previous = self.listings.get(listing_id)
+            if previous is not None and previous[0] == row_fingerprint:
+                # same record as last time: not parsed
+                entry = listings[listing_id] = previous
+            else:
+                entry = listings[listing_id] = (row_fingerprint, _report_values(listing or _parse(record)))
+                if previous is None:
+                    added.append(entry[1])
+                else:
+                    changed.append((previous[1], entry[1]))
+            if entry[1][_TYPE_VALUE] == "":
+                empty_room_type = True
+        removed = [values for listing_id, (_, values) in self.listings.items() if listing_id not in listings]
+
+        # a changed row only matters if it changed a column of the report
+        changed_values = [(old, new) for old, new in changed if old != new]
+        approximate_prices = not all(stats.exact for stats in self.report.prices.values())
+        if empty_room_type or self.report.room_types_stopped or approximate_prices:
+            # room types depend on the order of the rows, or merged prices can't be taken out exactly: start over
+            self.report = ListingsReport.from_csv(path_to_csv, self.report.max_prices)
+        else:
+            for values in removed + [old for old, _ in changed_values]:
+                self.report.remove(_row(values))
+            for values in [new for _, new in changed_values] + added:
+                self.report.add(_row(values))
+        self.listings = listings
+        self.source = path_to_csv
+        return {
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "unchanged": len(listings) - len(added) - len(changed),
+        }
+
+    def save(self, path: str) -> None:
+        """Save the state, to update it with the next snapshot
+
+        Args:
+            path (str): where to write it (written to a temporary file first, then renamed)
+        """
+        temporary_path = path + ".tmp"
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DeltaReport":
+        """Read a state written by save
+
+        Args:
+            path (str): the state file
+        Returns:
+            DeltaReport: the report of the last snapshot
+        """
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+
+def run_tests() -> None:
+    """Check the updated report against a report of the new snapshot built from scratch (run from the Lab 3 folder)"""
+    import math
+    import random
+    import statistics
+    import tempfile
+    import time
+
+    import lab3
+
+    file_name = "chicago_listings.csv"
+    rows = lab3.read_data(file_name)
+    header, listings = rows[0], rows[1:]
+    random.seed(150)
+    # next quarter: 300 listings gone, 500 changed (some only in their reviews), 200 new
+    new_listings = [list(listing) for listing in random.sample(listings, len(listings) - 300)]
+    for listing in random.sample(new_listings, 500):
+        column = random.choice([INDEX_PRICE, INDEX_TYPE, INDEX_LICENSE, INDEX_HOST_ID, INDEX_NIGHTS, lab3.INDEX_REVIEWS])
+        listing[column] = random.choice(listings)[column]
+    for i, listing in enumerate(random.sample(listings, 200)):
+        new_listings.append([f"new{i}"] + listing[1:])
+
+    with tempfile.TemporaryDirectory() as directory:
+        new_path = os.path.join(directory, "next_quarter.csv")
+        with open(new_path, 'w', newline='') as file:
+            csv.writer(file).writerows([header] + new_listings)
+
+        delta = DeltaReport.from_csv(file_name)
+        assert delta.report.host_listings == ListingsReport.from_csv(file_name).host_listings, "The first snapshot should be added in full"
+        state_path = os.path.join(directory, "chicago.state")
+        delta.save(state_path)
+        delta = DeltaReport.load(state_path)
+
+        start = time.perf_counter()
+        counts = delta.update(new_path)
+        delta_time = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = ListingsReport.from_csv(new_path)
+        full_time = time.perf_counter() - start
+
+    assert counts["removed"] == 300 and counts["added"] == 200 and counts["changed"] <= 500, "Diff counts should match the edits"
+    assert sum(counts.values()) - counts["removed"] == len(new_listings), "Every new listing should be counted once"
+    report = delta.report
+    assert report.total == expected.total and report.short_term == expected.short_term, "Totals should match"
+    assert report.room_types == expected.room_types, "Room types should match"
+    assert report.license_status == expected.license_status, "License status should match"
+    assert report.host_listings == expected.host_listings, "Listings per host should match"
+    assert report.host_listings_by_type == expected.host_listings_by_type, "Listings per host and room type should match"
+    assert report.count_listings_by_host_count() == expected.count_listings_by_host_count(), "Host histograms should match"
+    assert report.host_names.keys() == expected.host_names.keys(), "Hosts that left should be forgotten"
+    for room_type in ["", "Entire home/apt", "Private room", "Hotel room", "Shared room"]:
+        assert report.price_count(room_type) == expected.price_count(room_type), "Price counts should match"
+        assert report.median_price(room_type) == expected.median_price(room_type), "Median prices should match"
+        assert math.isclose(report.average_price(room_type), expected.average_price(room_type)), "Average prices should match"
+        assert report.price_percentiles(room_type) == expected.price_percentiles(room_type), "Price percentiles should match"
+        # and against the lab3.py functions, not only another ListingsReport
+        prices = lab3.get_prices(new_listings, room_type)
+        assert report.price_count(room_type) == len(prices), "Price counts should match get_prices"
+        assert report.median_price(room_type) == statistics.median(prices), "Median prices should match statistics.median"
+        assert math.isclose(report.average_price(room_type), statistics.fmean(prices)), "Average prices should match get_prices"
+    print(f"DeltaReport update test passed! ({counts}, update {delta_time * 1000:.0f} ms, full report {full_time * 1000:.0f} ms)")
+
+    # Same snapshot again: nothing to do
+    again = DeltaReport.from_csv(file_name)
+    host_listings = dict(again.report.host_listings)
+    assert again.update(file_name) == {"added": 0, "removed": 0, "changed": 0, "unchanged": len(listings)}, "Nothing should change"
+    assert again.report.host_listings == host_listings, "The report should stay the same"
+    records = list(_read_records(file_name))
+    assert len(records) == len(listings) and all(_parse(record) == listing for record, listing in zip(records, listings)), "Records should match the rows, even across lines"
+    assert fingerprint(records[0]) == fingerprint(str(records[0])) != fingerprint(records[1]), "Fingerprints should follow the text"
+    print("DeltaReport unchanged snapshot test passed!")
+
+    # An empty room type (added or changed) stops count_listings_by_type: the report is rebuilt
+    with tempfile.TemporaryDirectory() as directory:
+        for row_number in [10, len(listings)]:
+            snapshot = [list(listing) for listing in listings]
+            if row_number < len(listings):
+                snapshot[row_number][INDEX_TYPE] = ""
+            else:
+                snapshot.append(["new"] + listings[0][1:INDEX_TYPE] + [""] + listings[0][INDEX_TYPE + 1:])
+            path = os.path.join(directory, f"empty_{row_number}.csv")
+            with open(path, 'w', newline='') as file:
+                csv.writer(file).writerows([header] + snapshot)
+            delta = DeltaReport.from_csv(file_name)
+            delta.update(path)
+            assert delta.report.room_types == lab3.count_listings_by_type(snapshot), "Room types should stop at the empty one"
+            assert delta.report.room_types == ListingsReport.from_csv(path).room_types, "Room types should match a full build"
+            # and back to a snapshot without empty room types
+            delta.update(file_name)
+            assert delta.report.room_types == lab3.count_listings_by_type(listings), "Room types should be counted again"
+    print("DeltaReport empty room type test passed!")
+
+    # Past max_prices distinct prices the percentiles are approximate: the report is rebuilt
+    with tempfile.TemporaryDirectory() as directory:
+        new_path = os.path.join(directory, "next_quarter.csv")
+        with open(new_path, 'w', newline='') as file:
+            csv.writer(file).writerows([header] + new_listings)
+        delta = DeltaReport.from_csv(file_name, max_prices=100)
+        assert not delta.report.prices[""].exact, "100 distinct prices should not be enough for Chicago"
+        delta.update(new_path)
+        expected = ListingsReport.from_csv(new_path, max_prices=100)
+    for room_type in ["", "Entire home/apt", "Private room"]:
+        assert delta.report.prices[room_type].values == expected.prices[room_type].values, "Merged prices should match a full build"
+        assert delta.report.price_percentiles(room_type) == expected.price_percentiles(room_type), "Percentiles should match a full build"
+    print("DeltaReport approximate prices test passed!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        state_file, input_file = sys.argv[1], sys.argv[2]
+        output_file = sys.argv[3] if len(sys.argv) > 3 else "report.txt"
+        if os.path.exists(state_file):
+            delta = DeltaReport.load(state_file)
+            print(f"Updating the report of {delta.source}:", delta.update(input_file))
+        else:
+            delta = DeltaReport.from_csv(input_file)
+        delta.save(state_file)
+        with open(output_file, "w") as f:
+            delta.report.write(f, input_file, delta.report.data_date())
+        print("Report has been written to", output_file)
+    else:
+        run_tests()
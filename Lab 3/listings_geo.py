@@ -0,0 +1,308 @@
+"""Grid index on latitude/longitude for proximity and bounding box queries over the listings.
+
+Finding the listings within 1 km of a point means computing the distance to every listing.
+GridIndex puts each listing in a cell of about cell_km x cell_km (rows of latitude, each row cut
+in longitude cells whose width in degrees grows with the latitude so they stay about square),
+so a query only reads the cells that overlap the circle or the box and checks the listings in them.
+The cells also give the density and the price statistics of every area.
+
+Works on the rows of read_data or on a ListingsTable (its float columns are read directly).
+Listings without coordinates are not indexed. Boxes and circles crossing the 180th meridian are not supported.
+"""
+
+import math
+from array import array
+
+from lab3 import INDEX_LATITUDE, INDEX_LONGITUDE, INDEX_PRICE
+from listings_table import ListingsTable, NumberColumn, number_values
+from price_stats import PriceStats
+
+# Mean radius of the Earth
+EARTH_RADIUS_KM = 6371.0088
+# Length of one degree of latitude
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+# Default size of the cells
+CELL_KM = 0.5
+# Near the poles, one longitude cell per row band
+MIN_COSINE = 1e-6
+
+
+def haversine_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great-circle distance between two points
+
+    Args:
+        latitude1 (float): latitude of the first point, in degrees
+        longitude1 (float): longitude of the first point, in degrees
+        latitude2 (float): latitude of the second point, in degrees
+        longitude2 (float): longitude of the second point, in degrees
+    Returns:
+        float: the distance in km
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """The listings bucketed in cells of about cell_km x cell_km
+
+    Attributes:
+        data: the listings (a list of rows or a ListingsTable), appended to by append
+        cell_km (float): size of the cells
+        latitudes (array): latitude of every row (nan if missing)
+        longitudes (array): longitude of every row (nan if missing)
+        cells (dict[tuple[int, int], array]): (row band, column) -> row numbers, in row order
+    """
+
+    def __init__(self, data=None, cell_km: float = CELL_KM):
+        """Index existing listings
+
+        Args:
+            data: the listings to index (a list of rows or a ListingsTable), an empty list by default
+            cell_km (float): size of the cells, about the radius of the usual queries works best
+        """
+        self.data = data if data is not None else []
+        self.cell_km = cell_km
+        self.cell_degrees = cell_km / KM_PER_DEGREE
+        self.cells = dict()
+        if isinstance(self.data, ListingsTable) and isinstance(self.data.columns[INDEX_LATITUDE], NumberColumn):
+            # typed columns: copy the floats, nulls are already nan
+            self.latitudes = array('d', self.data.columns[INDEX_LATITUDE].data)
+            self.longitudes = array('d', self.data.columns[INDEX_LONGITUDE].data)
+        else:
+            self.latitudes = array('d', (_coordinate(listing[INDEX_LATITUDE]) for listing in self.data))
+            self.longitudes = array('d', (_coordinate(listing[INDEX_LONGITUDE]) for listing in self.data))
+        for row_number in range(len(self.latitudes)):
+            self._index(row_number)
+
+    def _band_width(self, band: int) -> float:
+        """Width in degrees of the longitude cells of a row band (at least cell_km at its edge closest to a pole)"""
+        edge = max(abs(band * self.cell_degrees), abs((band + 1) * self.cell_degrees))
+        return self.cell_degrees / max(math.cos(math.radians(min(edge, 90.0))), MIN_COSINE)
+
+    def cell_of(self, latitude: float, longitude: float) -> tuple[int, int]:
+        """Find the cell of a point
+
+        Args:
+            latitude (float): in degrees
+            longitude (float): in degrees
+        Returns:
+            tuple[int, int]: (row band, column)
+        """
+        band = math.floor(latitude / self.cell_degrees)
+        return band, math.floor(longitude / self._band_width(band))
+
+    def cell_bounds(self, cell: tuple[int, int]) -> tuple[float, float, float, float]:
+        """Find the corners of a cell
+
+        Args:
+            cell (tuple[int, int]): (row band, column)
+        Returns:
+            tuple[float, float, float, float]: (south, west, north, east) in degrees
+        """
+        band, column = cell
+        width = self._band_width(band)
+        return band * self.cell_degrees, column * width, (band + 1) * self.cell_degrees, (column + 1) * width
+
+    def _index(self, row_number: int) -> None:
+        latitude, longitude = self.latitudes[row_number], self.longitudes[row_number]
+        if math.isnan(latitude) or math.isnan(longitude):
+            return
+        cell = self.cell_of(latitude, longitude)
+        rows = self.cells.get(cell)
+        if rows is None:
+            rows = self.cells[cell] = array('I')
+        rows.append(row_number)
+
+    def append(self, listing: list[str]) -> None:
+        """Add a listing to the data and to the grid
+
+        Args:
+            listing (list[str]): one row of the listings file
+        """
+        self.data.append(listing)
+        self.latitudes.append(_coordinate(listing[INDEX_LATITUDE]))
+        self.longitudes.append(_coordinate(listing[INDEX_LONGITUDE]))
+        self._index(len(self.latitudes) - 1)
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def _cells_in_box(self, south: float, west: float, north: float, east: float):
+        """The cells that overlap a box, with True if the cell is entirely inside it"""
+        for band in range(math.floor(south / self.cell_degrees), math.floor(north / self.cell_degrees) + 1):
+            width = self._band_width(band)
+            for column in range(math.floor(west / width), math.floor(east / width) + 1):
+                cell = (band, column)
+                if cell in self.cells:
+                    cell_south, cell_west, cell_north, cell_east = self.cell_bounds(cell)
+                    inside = south <= cell_south and cell_north <= north and west <= cell_west and cell_east <= east
+                    yield cell, inside
+
+    def within_box(self, south: float, west: float, north: float, east: float) -> list[int]:
+        """Find the listings inside a bounding box (edges included)
+
+        Args:
+            south (float): smallest latitude
+            west (float): smallest longitude
+            north (float): largest latitude
+            east (float): largest longitude
+        Returns:
+            list[int]: the row numbers, in row order
+        """
+        matches = []
+        latitudes, longitudes = self.latitudes, self.longitudes
+        for cell, inside in self._cells_in_box(south, west, north, east):
+            if inside:
+                matches.extend(self.cells[cell])
+            else:
+                matches.extend(row_number for row_number in self.cells[cell]
+                               if south <= latitudes[row_number] <= north and west <= longitudes[row_number] <= east)
+        matches.sort()
+        return matches
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> list[int]:
+        """Find the listings within a distance of a point
+
+        Args:
+            latitude (float): latitude of the center, in degrees
+            longitude (float): longitude of the center, in degrees
+            radius_km (float): the distance, in km
+        Returns:
+            list[int]: the row numbers of the listings at most radius_km away, in row order
+        """
+        latitude_span = radius_km / KM_PER_DEGREE
+        south, north = max(latitude - latitude_span, -90.0), min(latitude + latitude_span, 90.0)
+        # the circle is widest (in degrees) at its edge closest to a pole
+        cosine = math.cos(math.radians(max(abs(south), abs(north))))
+        longitude_span = latitude_span / cosine if cosine > latitude_span / 180 else 180.0
+        phi = math.radians(latitude)
+        cos_phi = math.cos(phi)
+        # haversine without the asin: a point is inside when its a <= limit
+        limit = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+        matches = []
+        latitudes, longitudes = self.latitudes, self.longitudes
+        sin, cos, radians = math.sin, math.cos, math.radians
+        for cell, _ in self._cells_in_box(south, longitude - longitude_span, north, longitude + longitude_span):
+            for row_number in self.cells[cell]:
+                other = radians(latitudes[row_number])
+                a = sin((other - phi) / 2) ** 2 + cos_phi * cos(other) * sin(radians(longitudes[row_number] - longitude) / 2) ** 2
+                if a <= limit:
+                    matches.append(row_number)
+        matches.sort()
+        return matches
+
+    def cell_counts(self) -> dict[tuple[int, int], int]:
+        """Count the listings of every non-empty cell
+
+        Returns:
+            dict[tuple[int, int], int]: cell -> number of listings
+        """
+        return {cell: len(rows) for cell, rows in self.cells.items()}
+
+    def cell_density(self, cell: tuple[int, int]) -> float:
+        """Listings per square km in a cell
+
+        Args:
+            cell (tuple[int, int]): (row band, column)
+        Returns:
+            float: number of listings divided by the area of the cell
+        """
+        south, west, north, east = self.cell_bounds(cell)
+        area = (KM_PER_DEGREE ** 2 * (east - west) * (math.sin(math.radians(north)) - math.sin(math.radians(south)))
+                * 180 / math.pi)
+        return len(self.cells.get(cell, ())) / area
+
+    def cell_prices(self) -> dict[tuple[int, int], PriceStats]:
+        """Price statistics of every non-empty cell
+
+        Returns:
+            dict[tuple[int, int], PriceStats]: cell -> statistics of the prices of its listings (may have no price)
+        """
+        prices = dict()
+        # read once, from the price column of a ListingsTable
+        row_prices = number_values(self.data, INDEX_PRICE)
+        for cell, rows in self.cells.items():
+            stats = prices[cell] = PriceStats()
+            for row_number in rows:
+                price = row_prices[row_number]
+                if price is not None:
+                    stats.add(price)
+        return prices
+
+
+def _coordinate(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def run_tests() -> None:
+    """Check the grid against full scans on chicago_listings.csv (run from the Lab 3 folder)"""
+    import random
+    import time
+
+    import lab3
+    from listings_table import load_listings
+
+    listings = lab3.read_data("chicago_listings.csv")[1:]
+    points = [(float(listing[INDEX_LATITUDE]), float(listing[INDEX_LONGITUDE])) for listing in listings]
+    random.seed(150)
+    for data in [listings, load_listings("chicago_listings.csv")]:
+        grid = GridIndex(data)
+        assert sum(grid.cell_counts().values()) == len(listings), "Every listing should be in a cell"
+        for _ in range(50):
+            latitude, longitude = random.choice(points)
+            radius = random.choice([0.1, 1.0, 3.0])
+            expected = [i for i, point in enumerate(points) if haversine_km(latitude, longitude, *point) <= radius]
+            assert grid.within_radius(latitude, longitude, radius) == expected, "Radius queries should match a full scan"
+            south, west = latitude - random.random() / 50, longitude - random.random() / 50
+            north, east = latitude + random.random() / 50, longitude + random.random() / 50
+            expected = [i for i, (lat, lon) in enumerate(points) if south <= lat <= north and west <= lon <= east]
+            assert grid.within_box(south, west, north, east) == expected, "Box queries should match a full scan"
+    assert grid.within_radius(0.0, 0.0, 5.0) == [], "No listings in the ocean"
+    assert grid.within_radius(41.88, -87.63, 50.0) == list(range(len(listings))), "All of Chicago is within 50 km of the Loop"
+    print("GridIndex queries test passed!")
+
+    # Distances and cells
+    assert abs(haversine_km(41.8781, -87.6298, 40.7128, -74.0060) - 1145) < 5, "Chicago to New York is about 1145 km"
+    for latitude in [-89.9, -45.0, 0.0, 41.9, 70.0, 89.9]:
+        south, west, north, east = grid.cell_bounds(grid.cell_of(latitude, 10.0))
+        assert south <= latitude < north and west <= 10.0 < east, "A point should be inside its cell"
+        assert haversine_km(north, west, north, east) >= CELL_KM * 0.999, "Cells should be at least cell_km wide"
+    cell = grid.cell_of(*points[0])
+    area = grid.cell_counts()[cell] / grid.cell_density(cell)
+    assert CELL_KM ** 2 <= area < CELL_KM ** 2 * 1.01, "Densities should use the area of the cell"
+    assert grid.cell_density((0, 0)) == 0, "Empty cells have no listings"
+    prices = grid.cell_prices()
+    assert sum(stats.count for stats in prices.values()) == len(lab3.get_prices(listings)), "Cell prices should cover every price"
+    grown = GridIndex(listings[:100])
+    for listing in listings[100:]:
+        grown.append(listing)
+    assert grown.cells == GridIndex(listings).cells, "Appended rows should be indexed like a full build"
+    missing = list(listings[0])
+    missing[INDEX_LATITUDE] = ""
+    grown.append(missing)
+    assert len(grown) == len(listings) + 1 and sum(grown.cell_counts().values()) == len(listings), "Listings without coordinates are skipped"
+    print("GridIndex cells test passed!")
+
+    # Throughput on a million listings (Chicago copied around 120 shifted centers)
+    big = GridIndex()
+    for copy in range(120):
+        shift_latitude, shift_longitude = (copy // 12) * 0.5, (copy % 12) * 0.5
+        for latitude, longitude in points:
+            big.latitudes.append(latitude + shift_latitude)
+            big.longitudes.append(longitude + shift_longitude)
+            big._index(len(big.latitudes) - 1)
+    queries = [(latitude + (i % 10) * 0.5, longitude + (i % 12) * 0.5) for i, (latitude, longitude) in enumerate(random.sample(points, 2000))]
+    start = time.perf_counter()
+    found = sum(len(big.within_radius(latitude, longitude, 1.0)) for latitude, longitude in queries)
+    rate = len(queries) / (time.perf_counter() - start)
+    assert rate > 1000, "A million listings should answer thousands of 1 km queries per second"
+    print(f"GridIndex throughput test passed! ({len(big):,} listings, {rate:,.0f} queries/s, {found / len(queries):.0f} listings per query)")
+
+
+if __name__ == "__main__":
+    run_tests()
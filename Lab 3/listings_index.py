@@ -0,0 +1,200 @@
+"""Hash indexes on host id, room type and neighbourhood over the listings.
+
+get_host_name_by_id builds a {host_id: host_name} dict on every call, and get_prices or
+listings_per_host_with_type scan every listing to keep one room type. ListingsIndex builds the
+indexes once (row numbers of every host, room type and neighbourhood) and keeps them up to date
+as listings are appended, so a host name is one dict lookup and a filtered query only reads
+the matching rows.
+
+Works on the rows of read_data or on a ListingsTable (see listings_table.py).
+"""
+
+from array import array
+
+from lab3 import INDEX_HOST_ID, INDEX_HOST_NAME, INDEX_NEIGHBORHOOD, INDEX_PRICE, INDEX_TYPE
+from listings_table import number_values
+
+# Indexed fields: name -> column
+INDEXED_COLUMNS = {
+    "host_id": INDEX_HOST_ID,
+    "room_type": INDEX_TYPE,
+    "neighbourhood": INDEX_NEIGHBORHOOD,
+}
+
+
+class ListingsIndex:
+    """The listings with a hash index on each of INDEXED_COLUMNS
+
+    Attributes:
+        data: the listings (a list of rows or a ListingsTable), appended to by append
+        indexes (dict[str, dict[str, array]]): field -> value -> row numbers, in row order
+        host_names (dict[str, str]): host id -> host name (the last one seen, like get_host_name_by_id)
+    """
+
+    def __init__(self, data=None):
+        """Index existing listings
+
+        Args:
+            data: the listings to index (a list of rows or a ListingsTable), an empty list by default
+        """
+        self.data = data if data is not None else []
+        self.indexes = {field: dict() for field in INDEXED_COLUMNS}
+        self.host_names = dict()
+        for row_number, listing in enumerate(self.data):
+            self._index(row_number, listing)
+
+    def _index(self, row_number: int, listing) -> None:
+        for field, column in INDEXED_COLUMNS.items():
+            rows = self.indexes[field].get(listing[column])
+            if rows is None:
+                rows = self.indexes[field][listing[column]] = array('I')
+            rows.append(row_number)
+        self.host_names[listing[INDEX_HOST_ID]] = listing[INDEX_HOST_NAME]
+
+    def append(self, listing: list[str]) -> None:
+        """Add a listing to the data and to the indexes
+
+        Args:
+            listing (list[str]): one row of the listings file
+        Raises:
+            ValueError: if the data is a table mapped from a cache file (see listings_cache.py), it's read only
+        """
+        if getattr(self.data, "mapped", None) is not None:
+            raise ValueError("the listings come from a cache file and are read only, load them with load_listings to append")
+        row_number = len(self.data)
+        self.data.append(listing)
+        self._index(row_number, listing)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def rows(self, **filters) -> list[int]:
+        """Find the row numbers of the listings matching every filter
+
+        Args:
+            filters: field=value for fields of INDEXED_COLUMNS, e.g. rows(room_type="Private room", neighbourhood="Loop")
+        Returns:
+            list[int]: the matching row numbers in row order (every row without filters)
+        """
+        if not filters:
+            return list(range(len(self.data)))
+        for field in filters:
+            if field not in INDEXED_COLUMNS:
+                raise ValueError(f"{field!r} is not indexed, expected one of {list(INDEXED_COLUMNS)}")
+        postings = sorted((self.indexes[field].get(value, array('I')) for field, value in filters.items()), key=len)
+        # start from the shortest list and keep the rows that are in all the others
+        matches = list(postings[0])
+        for other in postings[1:]:
+            other = set(other)
+            matches = [row_number for row_number in matches if row_number in other]
+        return matches
+
+    def get_host_name_by_id(self, query_id: str) -> str:
+        """Find the name of the host given their id (one dict lookup)
+
+        Args:
+            query_id (str): the host id
+        Returns:
+            str: same as get_host_name_by_id(data, query_id)
+        """
+        return self.host_names.get(query_id, "Name not found")
+
+    def get_prices(self, room_type: str = "") -> list[float]:
+        """List the prices, optionally of one room type, reading only the matching rows
+
+        Args:
+            room_type (str): the room type, every room type if empty
+        Returns:
+            list[float]: same as get_prices(data, room_type)
+        """
+        rows = self.rows(room_type=room_type) if room_type != "" else None
+        return [float(price) for price in number_values(self.data, INDEX_PRICE, rows) if price is not None]
+
+    def listings_per_host_with_type(self, room_type: str = "") -> dict[str, int]:
+        """Find the number of listings of each host, optionally for one room type
+
+        Args:
+            room_type (str): the room type, every room type if empty
+        Returns:
+            dict[str, int]: same as listings_per_host_with_type(data, room_type)
+        """
+        if room_type == "":
+            return {host: len(rows) for host, rows in self.indexes["host_id"].items()}
+        host_listings = dict()
+        for row_number in self.rows(room_type=room_type):
+            host = self.data[row_number][INDEX_HOST_ID]
+            host_listings[host] = host_listings.get(host, 0) + 1
+        return host_listings
+
+    def count_by(self, field: str) -> dict[str, int]:
+        """Count the listings of every value of an indexed field
+
+        Args:
+            field (str): one of INDEXED_COLUMNS, e.g. "neighbourhood"
+        Returns:
+            dict[str, int]: value -> number of listings, in order of first appearance
+        """
+        return {value: len(rows) for value, rows in self.indexes[field].items()}
+
+
+def run_tests() -> None:
+    """Check the indexes against the lab3.py functions on chicago_listings.csv (run from the Lab 3 folder)"""
+    import os
+    import shutil
+    import tempfile
+
+    import lab3
+    from listings_cache import load_listings_cached
+    from listings_table import load_listings
+
+    listings = lab3.read_data("chicago_listings.csv")[1:]
+    for data in [listings, load_listings("chicago_listings.csv")]:
+        index = ListingsIndex(data)
+        for host_id in ["2613", "0000000000000000", " ", listings[-1][INDEX_HOST_ID]]:
+            assert index.get_host_name_by_id(host_id) == lab3.get_host_name_by_id(listings, host_id), "Host names should match"
+        for room_type in ["", "Entire home/apt", "Hotel room", "Castle"]:
+            assert index.get_prices(room_type) == lab3.get_prices(listings, room_type), "get_prices should match"
+            assert index.listings_per_host_with_type(room_type) == lab3.listings_per_host_with_type(listings, room_type), "Listings per host should match"
+        assert sum(index.count_by("neighbourhood").values()) == len(listings), "Every listing should have a neighbourhood"
+    print("ListingsIndex queries test passed!")
+
+    loop_rooms = index.rows(neighbourhood="Loop", room_type="Private room")
+    expected = [i for i, listing in enumerate(listings) if listing[INDEX_NEIGHBORHOOD] == "Loop" and listing[INDEX_TYPE] == "Private room"]
+    assert loop_rooms == expected, "Combined filters should match a full scan"
+    assert index.rows(host_id="nobody") == [], "An unknown value has no rows"
+    try:
+        index.rows(price="100")
+        assert False, "Only indexed fields can be filtered"
+    except ValueError:
+        pass
+    print("ListingsIndex rows test passed!")
+
+    # Appending keeps the indexes up to date
+    grown = ListingsIndex(listings[:100])
+    for listing in listings[100:]:
+        grown.append(listing)
+    assert grown.indexes == ListingsIndex(listings).indexes, "Appended rows should be indexed like a full build"
+    new_listing = list(listings[0])
+    new_listing[INDEX_HOST_ID], new_listing[INDEX_HOST_NAME] = "2613", "Becky"
+    grown.append(new_listing)
+    assert grown.get_host_name_by_id("2613") == "Becky", "The last name seen should win, like get_host_name_by_id"
+    assert grown.rows(host_id="2613")[-1] == len(listings), "The new row should be in the host index"
+
+    # A table mapped from the cache can be indexed but not appended to
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "listings.csv")
+        shutil.copy("chicago_listings.csv", path)
+        cached = ListingsIndex(load_listings_cached(path))
+        assert cached.get_prices("Hotel room") == lab3.get_prices(listings, "Hotel room"), "A cached table should be indexed"
+        try:
+            cached.append(listings[0])
+            assert False, "A cached table is read only"
+        except ValueError:
+            pass
+        assert len(cached) == len(listings) and cached.indexes == ListingsIndex(listings).indexes, "A refused append should change nothing"
+        del cached
+    print("ListingsIndex append test passed!")
+
+
+if __name__ == "__main__":
+    run_tests()
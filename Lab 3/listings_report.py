@@ -0,0 +1,468 @@
+"""Compute every metric of the listings report in one pass over the CSV.
+
+The functions in lab3.py each rescan the full list of listings, and the whole file is loaded first.
+ListingsReport reads the CSV row by row and updates all the counters at once, so the report is
+one pass and memory grows with the number of hosts, not with the number of rows (the prices are kept
+as PriceStats, bounded by max_prices distinct prices per room type).
+It gives the same numbers as the lab3.py functions and writes the same report.txt.
+
+Usage:
+    python listings_report.py [listings.csv] [report.txt]
+"""
+
+import csv
+import datetime
+import sys
+
+from lab3 import (INDEX_HOST_ID, INDEX_HOST_NAME, INDEX_LAST_REVIEW, INDEX_LICENSE, INDEX_NIGHTS,
+                  INDEX_PRICE, INDEX_TYPE, classify_license, host_count_histogram)
+from price_stats import MAX_VALUES, PriceStats
+
+
+# Date of the chicago_listings.csv snapshot, in the title of its report
+DATA_DATE = "December 18, 2024"
+
+
+def percent(count: int, total: int) -> float:
+    """Share of a total, in percent rounded like the report
+
+    Args:
+        count (int): the part
+        total (int): the whole
+    Returns:
+        float: count / total * 100 rounded to 1 decimal, 0.0 if total is 0
+    """
+    return round(((count/total)*100),1) if total > 0 else 0.0
+
+
+def _decrement(counts: dict, key) -> None:
+    """Take 1 from counts[key], deleting the key at 0"""
+    if counts[key] == 1:
+        del counts[key]
+    else:
+        counts[key] -= 1
+
+
+class ListingsReport:
+    """All the report metrics, updated one listing at a time
+
+    Attributes:
+        total (int): number of listings
+        short_term (int): listings with a minimum number of nights < 30
+        room_types (dict[str, int]): count_listings_by_type
+        license_status (dict[str, int]): get_license_status
+        host_listings (dict[str, int]): listings_per_host_with_type (all room types)
+        host_listings_by_type (dict[str, dict[str, int]]): listings_per_host_with_type for each room type
+        host_names (dict[str, str]): host id -> host name (the last one seen, like get_host_name_by_id)
+        prices (dict[str, PriceStats]): room type -> statistics of the prices, "" is every room type
+        latest_review (str): the most recent last_review date (YYYY-MM-DD), "" if none
+    """
+
+    def __init__(self, max_prices: int = MAX_VALUES):
+        """Start with no listings
+
+        Args:
+            max_prices (int): distinct prices kept per room type before the percentiles become approximate
+        """
+        self.max_prices = max_prices
+        self.total = 0
+        self.short_term = 0
+        self.room_types = dict()
+        # count_listings_by_type stops at the first empty room type
+        self.room_types_stopped = False
+        self.license_status = {"unlicensed": 0, "pending": 0, "exempt": 0, "licensed": 0}
+        self.host_listings = dict()
+        self.host_listings_by_type = dict()
+        self.host_names = dict()
+        self.prices = {"": PriceStats(max_prices)}
+        self.latest_review = ""
+
+    @classmethod
+    def from_csv(cls, path_to_csv: str, max_prices: int = MAX_VALUES) -> "ListingsReport":
+        """Build the report from a listings CSV, streaming the rows
+
+        Args:
+            path_to_csv (str): the path to the csv file (the first row is the column names)
+            max_prices (int): distinct prices kept per room type (see PriceStats)
+        Returns:
+            ListingsReport: the report of every listing in the file
+        """
+        report = cls(max_prices)
+        with open(path_to_csv, 'r') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for listing in reader:
+                report.add(listing)
+        return report
+
+    def add(self, listing: list[str]) -> None:
+        """Update every metric with one listing
+
+        Args:
+            listing (list[str]): one row of the listings data
+        """
+        self.total += 1
+        if int(listing[INDEX_NIGHTS]) < 30:
+            self.short_term += 1
+
+        room_type = listing[INDEX_TYPE]
+        if room_type == "" or room_type == None:
+            self.room_types_stopped = True
+        if not self.room_types_stopped:
+            self.room_types[room_type] = self.room_types.get(room_type, 0) + 1
+
+        self.license_status[classify_license(listing[INDEX_LICENSE])] += 1
+
+        host = listing[INDEX_HOST_ID]
+        self.host_listings[host] = self.host_listings.get(host, 0) + 1
+        by_type = self.host_listings_by_type.setdefault(room_type, dict())
+        by_type[host] = by_type.get(host, 0) + 1
+        self.host_names[host] = listing[INDEX_HOST_NAME]
+        if listing[INDEX_LAST_REVIEW] > self.latest_review:
+            self.latest_review = listing[INDEX_LAST_REVIEW]
+
+        if listing[INDEX_PRICE] != '':
+            price = float(listing[INDEX_PRICE])
+            self.prices[""].add(price)
+            # prices[""] is every room type, a listing without a room type only counts there
+            if room_type != "":
+                self._price_stats(room_type).add(price)
+
+    def remove(self, listing: list[str]) -> None:
+        """Take out a listing that was added before (see listings_delta.py)
+
+        Counts that drop to 0 are deleted, so the report is the same as one built without the listing.
+        A host keeps the last name added, and latest_review stays the latest one added.
+
+        Args:
+            listing (list[str]): the row that was added
+        Raises:
+            ValueError: once an empty room type was seen, room types depend on the order of the rows
+        """
+        room_type = listing[INDEX_TYPE]
+        if self.room_types_stopped or room_type == "" or room_type == None:
+            raise ValueError("room types stop at the first empty one, the report has to be rebuilt")
+        self.total -= 1
+        if int(listing[INDEX_NIGHTS]) < 30:
+            self.short_term -= 1
+        _decrement(self.room_types, room_type)
+        self.license_status[classify_license(listing[INDEX_LICENSE])] -= 1
+
+        host = listing[INDEX_HOST_ID]
+        _decrement(self.host_listings, host)
+        _decrement(self.host_listings_by_type[room_type], host)
+        if not self.host_listings_by_type[room_type]:
+            del self.host_listings_by_type[room_type]
+        if host not in self.host_listings:
+            del self.host_names[host]
+
+        if listing[INDEX_PRICE] != '':
+            price = float(listing[INDEX_PRICE])
+            self.prices[""].remove(price)
+            self.prices[room_type].remove(price)
+            if self.prices[room_type].count == 0:
+                del self.prices[room_type]
+
+    def merge(self, other: "ListingsReport") -> None:
+        """Add the listings of another report, as if its rows came after the rows of this one
+
+        Reports of consecutive chunks of a file, merged in order, give the report of the whole file
+        (see parallel_ingest.py).
+
+        Args:
+            other (ListingsReport): the report of the rows that follow
+        """
+        self.total += other.total
+        self.short_term += other.short_term
+        if not self.room_types_stopped:
+            for room_type, count in other.room_types.items():
+                self.room_types[room_type] = self.room_types.get(room_type, 0) + count
+            self.room_types_stopped = other.room_types_stopped
+        for status, count in other.license_status.items():
+            self.license_status[status] += count
+        for host, count in other.host_listings.items():
+            self.host_listings[host] = self.host_listings.get(host, 0) + count
+        for room_type, host_listings in other.host_listings_by_type.items():
+            by_type = self.host_listings_by_type.setdefault(room_type, dict())
+            for host, count in host_listings.items():
+                by_type[host] = by_type.get(host, 0) + count
+        self.host_names.update(other.host_names)
+        self.latest_review = max(self.latest_review, other.latest_review)
+        for room_type, stats in other.prices.items():
+            self._price_stats(room_type).merge(stats)
+
+    def _price_stats(self, room_type: str) -> PriceStats:
+        stats = self.prices.get(room_type)
+        if stats is None:
+            stats = self.prices[room_type] = PriceStats(self.max_prices)
+        return stats
+
+    def count_multi_listings(self) -> int:
+        """Count the listings by hosts with more than 1 listing
+
+        Returns:
+            int: same as count_multi_listings
+        """
+        return host_count_histogram(self.host_listings, [2])[0]
+
+    def count_listings_by_host_count(self) -> list[int]:
+        """Count the listings by hosts with i listings, for i from 0 to 10 (10 is 10 or more)
+
+        Returns:
+            list[int]: same as count_listings_by_host_count
+        """
+        return host_count_histogram(self.host_listings, list(range(11)))
+
+    def listings_per_host_with_type(self, room_type: str = "") -> dict[str, int]:
+        """Find the number of listings of each host, optionally for one room type
+
+        Args:
+            room_type (str): the room type to count, every room type if empty
+        Returns:
+            dict[str, int]: same as listings_per_host_with_type
+        """
+        if room_type == "":
+            return dict(self.host_listings)
+        return dict(self.host_listings_by_type.get(room_type, dict()))
+
+    def get_host_name_by_id(self, query_id: str) -> str:
+        """Find the name of the host given their id
+
+        Args:
+            query_id (str): the host id
+        Returns:
+            str: the host name, or "Name not found"
+        """
+        return self.host_names.get(query_id, "Name not found")
+
+    def price_count(self, room_type: str = "") -> int:
+        """Count the listings with a price
+
+        Args:
+            room_type (str): the room type to count, every room type if empty
+        Returns:
+            int: same as len(get_prices(data, room_type))
+        """
+        return self.prices[room_type].count if room_type in self.prices else 0
+
+    def average_price(self, room_type: str = "") -> float:
+        """Average price of the listings with a price
+
+        Args:
+            room_type (str): the room type, every room type if empty
+        Returns:
+            float: the average of get_prices(data, room_type)
+        """
+        return self.prices[room_type].mean()
+
+    def median_price(self, room_type: str = "") -> float:
+        """Median price of the listings with a price
+
+        Args:
+            room_type (str): the room type, every room type if empty
+        Returns:
+            float: statistics.median(get_prices(data, room_type))
+        """
+        return self.prices[room_type].median()
+
+    def price_percentiles(self, room_type: str = "", percents: list[float] = (10, 25, 50, 75, 90)) -> list[float]:
+        """Percentiles of the prices
+
+        Args:
+            room_type (str): the room type, every room type if empty
+            percents (list[float]): between 0 and 100
+        Returns:
+            list[float]: the percentile of every percent (approximate past max_prices distinct prices)
+        """
+        return self.prices[room_type].percentiles(percents)
+
+    def top_hosts(self, room_type: str = "", number: int = 10) -> list[tuple[str, int]]:
+        """Find the hosts with the most listings
+
+        Args:
+            room_type (str): the room type to count, every room type if empty
+            number (int): how many hosts to return
+        Returns:
+            list[tuple[str, int]]: (host id, number of listings), most listings first
+        """
+        listing_counts = self.listings_per_host_with_type(room_type)
+        return sorted(listing_counts.items(), key=lambda item: item[1], reverse=True)[:number]
+
+    def data_date(self) -> str:
+        """Date of the data, from the most recent review
+
+        Returns:
+            str: latest_review written like DATA_DATE (e.g. "December 17, 2024"), "an unknown date" without reviews
+        """
+        try:
+            date = datetime.date.fromisoformat(self.latest_review)
+        except ValueError:
+            return "an unknown date"
+        return f"{date:%B} {date.day}, {date.year}"
+
+    def write(self, f, file_name: str, data_date: str = DATA_DATE) -> None:
+        """Write the report, in the same format as run_test_code in lab3.py
+
+        Args:
+            f: the open text file to write to
+            file_name (str): name of the listings file, for the title
+            data_date (str): date of the snapshot, for the title (the date of chicago_listings.csv by default)
+        """
+        n = self.total
+        f.write("*" * 31)
+        f.write(f"\nREPORT FOR {file_name}\n")
+        f.write(f"(Data as of {data_date})\n")
+        f.write("*" * 31)
+        f.write(f"\n\nTotal listings: {n:,}\n")
+
+        strs = self.short_term
+        f.write("\nListings that are:")
+        f.write(
+            f"\nShort-term rentals : {strs:,} ({percent(strs, n)}%)"
+            f"\nLonger-term rentals: {n-strs:,} ({percent(n-strs, n)}%)\n\n"
+        )
+
+        f.write("Listings with room type:\n")
+        for listing, count in sorted(self.room_types.items(), key=lambda item: -item[1]):
+            f.write(f"{listing:<15}: {count:,} ({percent(count, n)}%)\n")
+
+        license_status = self.license_status
+        unlicensed = license_status["unlicensed"] + license_status["pending"]
+        f.write(
+            f"\nNumber of unlicensed current listings, at least {unlicensed:,} ({percent(unlicensed, n)}%); "
+            f"including {license_status['unlicensed']:,} with missing license and {license_status['pending']:,} pending\n"
+        )
+        for status, count in sorted(license_status.items(), key=lambda item: -item[1]):
+            f.write(f"{status:<10}: {count:,}\n")
+
+        multihosts = self.count_multi_listings()
+        f.write(
+            f"\nNumber of listings by hosts with multiple listings: {multihosts:,} out of {n:,} total listings "
+            f"({percent(multihosts, n)}%)\n\n"
+        )
+
+        counts = self.count_listings_by_host_count()
+        f.write(f"Listings by hosts with 1 listing   : {counts[1]:,}\n")
+        for i in range(2, len(counts) - 1):
+            f.write(f"Listings by hosts with {i} listings  : {counts[i]:,}\n")
+        f.write(f"Listings by hosts with 10+ listings: {counts[10]:,}\n")
+
+        f.write("\n-----Analyzing prices-----\n")
+        f.write(f"{self.price_count():,} prices in the list\n")
+        if self.price_count() > 0:  # Avoiding division by 0
+            f.write(f"Average listing price ${self.average_price():.02f}\n")
+            f.write(f"Median listing price  ${self.median_price():.02f}\n")
+
+        f.write("\n")
+        home_count = self.price_count("Entire home/apt")
+        f.write(f"{home_count:,} prices for Entire home/apt\n")
+        if home_count > 0:  # Avoiding division by 0
+            f.write(f"Average entire apt price ${self.average_price('Entire home/apt'):.02f}\n")
+            f.write(f"Median entire apt price  ${self.median_price('Entire home/apt'):.02f}\n")
+
+        top_hosts = self.top_hosts()
+        f.write(f"\n-----Top {len(top_hosts)} hosts with the largest number of listings-----\n")
+        for host_id, count in top_hosts:
+            f.write(f"{self.get_host_name_by_id(host_id):<17} has {count}\n")
+
+        top_hosts = self.top_hosts("Entire home/apt")
+        f.write(f"\n-----Top {len(top_hosts)} hosts with largest number of entire home listings-----\n")
+        for host_id, count in top_hosts:
+            f.write(f"{self.get_host_name_by_id(host_id):<17} has {count}\n")
+
+
+def run_tests() -> None:
+    """Check ListingsReport against the lab3.py functions on chicago_listings.csv
+    (run from the Lab 3 folder)
+    """
+    import io
+    import os
+    import statistics
+    from contextlib import redirect_stdout
+
+    import lab3
+
+    file_name = "chicago_listings.csv"
+    listings = lab3.read_data(file_name)[1:]
+    report = ListingsReport.from_csv(file_name)
+
+    assert report.total == len(listings), "total should be the number of listings"
+    assert report.short_term == lab3.count_short_term_rentals(listings), "short_term should match count_short_term_rentals"
+    assert report.room_types == lab3.count_listings_by_type(listings), "room_types should match count_listings_by_type"
+    assert report.license_status == lab3.get_license_status(listings), "license_status should match get_license_status"
+    assert report.count_multi_listings() == lab3.count_multi_listings(listings), "count_multi_listings should match"
+    assert report.count_listings_by_host_count() == lab3.count_listings_by_host_count(listings), "count_listings_by_host_count should match"
+    for room_type in ["", "Entire home/apt", "Shared room", "Castle"]:
+        prices = lab3.get_prices(listings, room_type)
+        assert report.price_count(room_type) == len(prices), "price_count should match get_prices"
+        if prices:
+            assert report.median_price(room_type) == statistics.median(prices), "median_price should match statistics.median"
+            assert abs(report.average_price(room_type) - sum(prices) / len(prices)) < 1e-9, "average_price should match"
+            expected = statistics.quantiles(prices, n=4, method='inclusive') if len(prices) > 1 else prices * 3
+            assert all(abs(a - b) < 1e-9 for a, b in zip(report.price_percentiles(room_type, [25, 50, 75]), expected)), "price quartiles should match"
+        assert report.listings_per_host_with_type(room_type) == lab3.listings_per_host_with_type(listings, room_type), "listings per host should match"
+    for host_id in ["2613", "0000000000000000", " ", listings[-1][lab3.INDEX_HOST_ID]]:
+        assert report.get_host_name_by_id(host_id) == lab3.get_host_name_by_id(listings, host_id), "host names should match"
+    # Listings without a room type still count in the prices of every room type
+    untyped = ListingsReport()
+    blanked = [list(listing) for listing in listings]
+    for listing in blanked[::50]:
+        listing[INDEX_TYPE] = ""
+    for listing in blanked:
+        untyped.add(listing)
+    prices = lab3.get_prices(blanked)
+    assert untyped.price_count("") == len(prices), "price_count should match get_prices with empty room types"
+    assert untyped.median_price() == statistics.median(prices), "median_price should match with empty room types"
+    assert untyped.price_count("Entire home/apt") == len(lab3.get_prices(blanked, "Entire home/apt")), "room type prices should skip the empty ones"
+    print("ListingsReport metrics test passed!")
+
+    # Edge cases of the streaming versions
+    single = ListingsReport()
+    for price in ["5", "5", "5"]:
+        row = [""] * 16
+        row[INDEX_NIGHTS], row[INDEX_TYPE], row[INDEX_PRICE] = "1", "Hotel room", price
+        single.add(row)
+    assert single.median_price() == 5.0 and single.price_percentiles("Hotel room", [0, 90]) == [5.0, 5.0], "single value median"
+    stopped = ListingsReport()
+    for room_type in ["Private room", "", "Private room"]:
+        row = [""] * 16
+        row[INDEX_NIGHTS], row[INDEX_TYPE], row[INDEX_HOST_ID] = "1", room_type, "7"
+        stopped.add(row)
+    assert stopped.room_types == lab3.count_listings_by_type([[""] * 7 + [t] for t in ["Private room", "", "Private room"]]), "room types stop at the first empty one"
+    untyped = ListingsReport()
+    rows = []
+    for room_type, price in [("", "10"), ("Private room", "30")]:
+        row = [""] * 16
+        row[INDEX_NIGHTS], row[INDEX_TYPE], row[INDEX_PRICE] = "1", room_type, price
+        untyped.add(row)
+        rows.append(row)
+    assert untyped.price_count() == len(lab3.get_prices(rows)) == 2, "A price without a room type should be counted once"
+    assert untyped.average_price() == statistics.fmean(lab3.get_prices(rows)) == 20.0, "A price without a room type should be averaged once"
+    empty = io.StringIO()
+    ListingsReport().write(empty, "empty.csv", "an unknown date")
+    assert "Total listings: 0" in empty.getvalue() and "(0.0%)" in empty.getvalue(), "An empty file should get a report"
+    assert ListingsReport().data_date() == "an unknown date" and report.data_date() == "December 17, 2024", "Dates come from the reviews"
+    print("ListingsReport edge cases test passed!")
+
+    # Same report.txt as run_test_code
+    with redirect_stdout(io.StringIO()):
+        lab3.run_test_code()
+    with open("report.txt", "r") as file:
+        expected = file.read()
+    text = io.StringIO()
+    report.write(text, file_name)
+    assert text.getvalue() == expected, "ListingsReport should write the same report as run_test_code"
+    os.remove("report.txt")
+    print("ListingsReport report test passed!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        input_file = sys.argv[1]
+        output_file = sys.argv[2] if len(sys.argv) > 2 else "report.txt"
+        report = ListingsReport.from_csv(input_file)
+        with open(output_file, "w") as f:
+            report.write(f, input_file, report.data_date())
+        print("Report has been written to", output_file)
+    else:
+        run_tests()
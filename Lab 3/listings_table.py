@@ -0,0 +1,361 @@
+"""Load the listings CSV into typed columns instead of a list of lists of strings.
+
+read_data keeps every listing as a Python list of 16 strings, and every query parses the numbers again
+(int(rental[INDEX_NIGHTS]), float(listing[INDEX_PRICE]), ...). load_listings parses each value once:
+- ids, nights, review counts: int64 arrays
+- latitude, longitude, price, reviews per month: float64 arrays, with a null mask for the empty cells
+- host name, neighbourhood, room type, last review, license: dictionary-encoded (one code per row
+  and the list of distinct values)
+- listing name: one UTF-8 buffer and the offset of every string in it (no Python string per row)
+
+table[i] is a ListingRow that gives back the original strings with the INDEX_* constants, so the
+lab3.py functions run on a ListingsTable unchanged, e.g. count_short_term_rentals(load_listings(path)).
+A ListingRow formats the numbers back to text, so code that needs the numbers reads the typed columns
+instead (table.columns[INDEX_PRICE].data, or number_values for a table or a list of rows).
+"""
+
+import csv
+import math
+from array import array
+
+# How every column of the Inside Airbnb listings file is stored (unknown columns are kept as strings)
+COLUMN_TYPES = {
+    "listing_id": "int",
+    "listing_name": "str",
+    "host_id": "int",
+    "host_name": "category",
+    "neighbourhood": "category",
+    "latitude": "float",
+    "longitude": "float",
+    "room_type": "category",
+    "price": "float",
+    "minimum_nights": "int",
+    "number_of_reviews": "int",
+    "last_review": "category",
+    "reviews_per_month": "float",
+    "availability_365": "int",
+    "number_of_reviews_ltm": "int",
+    "license": "category",
+}
+
+
+class StringColumn:
+    """A column of strings stored back to back in one UTF-8 buffer
+
+    Attributes:
+        data (bytearray): every string, encoded, one after the other
+        offsets (array): row i is data[offsets[i]:offsets[i + 1]]
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('q', [0])
+
+    def append(self, text: str) -> None:
+        self.data += text.encode()
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        # str() instead of .decode() so data can also be a memoryview (see listings_cache.py)
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def text(self, index: int) -> str:
+        return self[index]
+
+
+class DictionaryColumn:
+    """A string column stored as one integer code per row and the list of distinct values
+
+    Attributes:
+        codes (array): the code of every row
+        values (list[str]): the distinct values, values[code] is the string of a code
+        lookup (dict[str, int]): string -> code
+    """
+
+    def __init__(self):
+        self.codes = array('I')
+        self.values = []
+        self.lookup = dict()
+
+    def append(self, text: str) -> None:
+        code = self.lookup.get(text)
+        if code is None:
+            code = len(self.values)
+            self.values.append(text)
+            self.lookup[text] = code
+        self.codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[self.codes[index]]
+
+    def text(self, index: int) -> str:
+        return self.values[self.codes[index]]
+
+    def code_of(self, text: str):
+        """Find the code of a string
+
+        Args:
+            text (str): the value to look for
+        Returns:
+            int | None: its code, None if no row has this value
+        """
+        return self.lookup.get(text)
+
+
+class NumberColumn:
+    """An int64 or float64 column with a null mask for the empty cells
+
+    The original text of every cell can be rebuilt: floats keep their number of decimals
+    (so "41.89600" stays "41.89600"), and the rare cells that don't print back the same are kept as text.
+    Cells that are not numbers at all (or ints too big for int64) are null, with their text kept.
+
+    Attributes:
+        data (array): the values ('q' for int64, 'd' for float64); nulls are 0 or nan
+        nulls (bytearray): 1 for an empty cell, 0 otherwise
+    """
+
+    def __init__(self, typecode: str):
+        self.data = array(typecode)
+        self.nulls = bytearray()
+        self.is_float = typecode == 'd'
+        # digits after the decimal point of every float cell (-1: no decimal point)
+        self.decimals = array('b')
+        self.raw = dict()
+
+    def append(self, text: str) -> None:
+        index = len(self.data)
+        try:
+            value = float(text) if self.is_float else int(text)
+            # OverflowError: an int that doesn't fit in int64
+            self.data.append(value)
+        except (ValueError, OverflowError):
+            # empty (or not a number): null
+            self.data.append(math.nan if self.is_float else 0)
+            self.nulls.append(1)
+            if self.is_float:
+                self.decimals.append(-1)
+            if text != "":
+                self.raw[index] = text
+            return
+        if self.is_float:
+            self.decimals.append(len(text) - text.index('.') - 1 if '.' in text else -1)
+        self.nulls.append(0)
+        if self._format(index) != text:
+            self.raw[index] = text
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int):
+        """The value of a row, None for an empty cell"""
+        return None if self.nulls[index] else self.data[index]
+
+    def _format(self, index: int) -> str:
+        if self.nulls[index]:
+            return ""
+        if not self.is_float:
+            return str(self.data[index])
+        decimals = self.decimals[index]
+        if decimals < 0:
+            return f"{self.data[index]:.0f}"
+        return f"{self.data[index]:.{decimals}f}"
+
+    def text(self, index: int) -> str:
+        """The original text of a row"""
+        if index in self.raw:
+            return self.raw[index]
+        return self._format(index)
+
+
+def _new_column(column_type: str):
+    if column_type == "int":
+        return NumberColumn('q')
+    if column_type == "float":
+        return NumberColumn('d')
+    if column_type == "category":
+        return DictionaryColumn()
+    return StringColumn()
+
+
+class ListingRow:
+    """One listing of a ListingsTable, read like a row of read_data: row[INDEX_PRICE] is the price string"""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "ListingsTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, column: int) -> str:
+        return self.table.columns[column].text(self.index)
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+    def __iter__(self):
+        return (column.text(self.index) for column in self.table.columns)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"ListingRow({list(self)!r})"
+
+
+class ListingsTable:
+    """The listings as typed columns (see COLUMN_TYPES)
+
+    Attributes:
+        column_names (list[str]): the header of the file
+        columns (list): one column per field, in file order (columns[INDEX_PRICE] is the price column)
+    """
+
+    def __init__(self, column_names: list[str]):
+        self.column_names = list(column_names)
+        self.columns = [_new_column(COLUMN_TYPES.get(name, "str")) for name in self.column_names]
+
+    def append(self, listing: list[str]) -> None:
+        """Parse one listing (a row of strings) into the columns
+
+        Short rows are padded with empty cells, so the next rows stay in their columns.
+
+        Args:
+            listing (list[str]): one row of the listings file
+        Raises:
+            ValueError: if the row has more fields than the header
+        """
+        if len(listing) > len(self.columns):
+            raise ValueError(f"row {len(self)} has {len(listing)} fields, the header has {len(self.columns)}")
+        for column, text in zip(self.columns, listing):
+            column.append(text)
+        for column in self.columns[len(listing):]:
+            column.append("")
+
+    def column(self, name: str):
+        """Find a column by name
+
+        Args:
+            name (str): the column name, e.g. "price"
+        Returns:
+            the column (NumberColumn, DictionaryColumn or StringColumn)
+        """
+        return self.columns[self.column_names.index(name)]
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index: int) -> ListingRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("listing index out of range")
+        return ListingRow(self, index)
+
+    def __iter__(self):
+        return (ListingRow(self, index) for index in range(len(self)))
+
+
+def number_values(data, column: int, rows=None) -> list:
+    """Read the numbers of a column, from its array when the data is a ListingsTable
+
+    Args:
+        data: the listings (a list of rows or a ListingsTable)
+        column (int): the column, e.g. INDEX_PRICE
+        rows: the row numbers to read, every row by default
+    Returns:
+        list: the number of every row (float for the rows of read_data), None for an empty cell
+    """
+    if rows is None:
+        rows = range(len(data))
+    if isinstance(data, ListingsTable) and isinstance(data.columns[column], NumberColumn):
+        values, nulls = data.columns[column].data, data.columns[column].nulls
+        return [None if nulls[row] else values[row] for row in rows]
+    texts = [data[row][column] for row in rows]
+    return [float(text) if text != '' else None for text in texts]
+
+
+def load_listings(path_to_csv: str) -> ListingsTable:
+    """Read the listings file into a ListingsTable, parsing every value once
+
+    Args:
+        path_to_csv (str): the path to the csv file (the first row is the column names)
+    Returns:
+        ListingsTable: the listings, without the header row
+    """
+    with open(path_to_csv, 'r') as file:
+        reader = csv.reader(file)
+        table = ListingsTable(next(reader))
+        for listing in reader:
+            table.append(listing)
+    return table
+
+
+def run_tests() -> None:
+    """Check the table against read_data on chicago_listings.csv (run from the Lab 3 folder)"""
+    import tracemalloc
+
+    import lab3
+
+    file_name = "chicago_listings.csv"
+    tracemalloc.start()
+    listings = lab3.read_data(file_name)[1:]
+    list_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    table = load_listings(file_name)
+    table_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(table) == len(listings), "The table should have every listing"
+    assert all(table[i] == listings[i] for i in range(len(listings))), "Rows should give back the original strings"
+    assert table[-1] == listings[-1], "Negative indexes should count from the end"
+    print("ListingsTable rows test passed!")
+
+    price = table.column("price")
+    assert sum(price.nulls) == sum(1 for listing in listings if listing[lab3.INDEX_PRICE] == ""), "Empty prices should be null"
+    assert price[0] == float(listings[0][lab3.INDEX_PRICE]) and isinstance(price[0], float), "Prices should be floats"
+    assert table.column("listing_id").data.typecode == 'q', "Ids should be int64"
+    room_type = table.column("room_type")
+    assert len(room_type.values) == 4 and room_type.code_of("Private room") is not None, "Room types should be dictionary-encoded"
+    assert table.column("latitude").text(0) == listings[0][lab3.INDEX_LATITUDE], "Latitudes should keep their text"
+    odd = NumberColumn('q')
+    for text in ["12", "", "n/a", "007"]:
+        odd.append(text)
+    assert [odd[i] for i in range(4)] == [12, None, None, 7], "Cells that aren't numbers should be null"
+    assert [odd.text(i) for i in range(4)] == ["12", "", "n/a", "007"], "Every cell should keep its text"
+    odd.append(str(2**63))
+    assert odd[4] is None and odd.text(4) == str(2**63) and len(odd.nulls) == 5, "Ints past int64 should be null with their text"
+    ragged = ListingsTable(["listing_id", "listing_name", "price"])
+    for row in [["1", "a", "10"], ["2", "b"], ["3", "c", "30"]]:
+        ragged.append(row)
+    assert list(ragged[1]) == ["2", "b", ""] and ragged[2][2] == "30", "Short rows should be padded, not shift the next rows"
+    try:
+        ragged.append(["4", "d", "40", "extra"])
+        assert False, "Rows longer than the header should be rejected"
+    except ValueError:
+        pass
+    assert len(ragged) == 3, "A rejected row should not be added"
+    expected = [float(listing[lab3.INDEX_PRICE]) if listing[lab3.INDEX_PRICE] != '' else None for listing in listings]
+    assert number_values(table, lab3.INDEX_PRICE) == number_values(listings, lab3.INDEX_PRICE) == expected, "number_values should read the prices"
+    assert number_values(table, lab3.INDEX_NIGHTS, [0, 2]) == [int(listings[0][lab3.INDEX_NIGHTS]), int(listings[2][lab3.INDEX_NIGHTS])], "number_values should read the chosen rows"
+    print("ListingsTable columns test passed!")
+
+    # The lab3.py functions work on the table unchanged
+    assert lab3.count_short_term_rentals(table) == lab3.count_short_term_rentals(listings), "count_short_term_rentals should match"
+    assert lab3.get_license_status(table) == lab3.get_license_status(listings), "get_license_status should match"
+    assert lab3.get_prices(table, "Entire home/apt") == lab3.get_prices(listings, "Entire home/apt"), "get_prices should match"
+    assert lab3.count_listings_by_host_count(table) == lab3.count_listings_by_host_count(listings), "count_listings_by_host_count should match"
+    print("ListingsTable compatibility test passed!")
+
+    assert table_memory * 3 < list_memory, "The table should use several times less memory than the list of lists"
+    print(f"ListingsTable memory test passed! ({list_memory / 1e6:.1f} MB -> {table_memory / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,223 @@
+"""Read many listings files at once, each split in chunks parsed by a pool of processes.
+
+read_data parses a file on one core. ingest_reports cuts every file into chunks of about
+chunk_size bytes, parses the chunks in a process pool (each one into a ListingsReport), then merges
+the chunk reports of every file in order. The merged report has the same counts as the lab3.py
+functions on the whole file.
+
+Chunks end on a record boundary: a newline that is not inside a quoted field. A newline is outside
+the quotes when the number of quote characters before it is even (an escaped quote "" counts twice),
+so the boundaries are found by counting quotes, without parsing the file.
+
+Usage:
+    python parallel_ingest.py listings1.csv listings2.csv ...
+"""
+
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from listings_report import ListingsReport
+
+# Bytes per chunk sent to a worker
+CHUNK_SIZE = 8 * 1024 * 1024
+# Bytes read at a time while looking for a record boundary
+SCAN_SIZE = 64 * 1024
+
+
+def find_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> list[tuple[int, int]]:
+    """Split a CSV file into chunks that start and end on record boundaries
+
+    Args:
+        path (str): the CSV file
+        chunk_size (int): about how many bytes per chunk
+    Returns:
+        list[tuple[int, int]]: (start, end) byte offsets of every chunk, covering the whole file
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    # number of quote characters before position: even means position is outside a quoted field
+    quotes = 0
+    position = 0
+    with open(path, 'rb') as file:
+        while start < size:
+            target = start + chunk_size
+            if target >= size:
+                chunks.append((start, size))
+                break
+            file.seek(position)
+            quotes += file.read(target - position).count(b'"')
+            position = target
+            end = size
+            # the first newline after target that is outside the quotes
+            while position < size:
+                block = file.read(SCAN_SIZE)
+                newline = block.find(b'\n')
+                while newline != -1 and (quotes + block.count(b'"', 0, newline)) % 2 == 1:
+                    newline = block.find(b'\n', newline + 1)
+                if newline != -1:
+                    quotes += block.count(b'"', 0, newline + 1)
+                    end = position = position + newline + 1
+                    break
+                quotes += block.count(b'"')
+                position += len(block)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def read_chunk(path: str, start: int, end: int) -> list[list[str]]:
+    """Parse the records of one chunk of a CSV file
+
+    Args:
+        path (str): the CSV file
+        start (int): byte offset of the first record
+        end (int): byte offset after the last record
+    Returns:
+        list[list[str]]: the records, like read_data (the header too if start is 0)
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode()
+    # newline=None turns \r\n into \n, like open(path, 'r') in read_data
+    return list(csv.reader(io.StringIO(text, newline=None)))
+
+
+def report_chunk(path: str, start: int, end: int) -> ListingsReport:
+    """Worker: build the report of one chunk (the header row of the file is skipped)
+
+    Args:
+        path (str): the CSV file
+        start (int): byte offset of the first record
+        end (int): byte offset after the last record
+    Returns:
+        ListingsReport: the report of the listings in the chunk
+    """
+    rows = read_chunk(path, start, end)
+    report = ListingsReport()
+    for listing in rows[1:] if start == 0 else rows:
+        report.add(listing)
+    return report
+
+
+def _timed_report_chunk(path: str, start: int, end: int) -> tuple[ListingsReport, float]:
+    started = time.perf_counter()
+    report = report_chunk(path, start, end)
+    return report, time.perf_counter() - started
+
+
+def iter_reports(paths: list[str], max_workers: int = None, chunk_size: int = CHUNK_SIZE):
+    """Build the report of every file in one process pool, yielding each file as soon as it's done
+
+    The chunks of the largest files are sent to the pool first, so a big file doesn't start last
+    and keep one worker busy at the end.
+
+    Args:
+        paths (list[str]): the listings files
+        max_workers (int): number of processes (every core by default, 1 parses in this process)
+        chunk_size (int): about how many bytes per chunk
+    Yields:
+        tuple[str, ListingsReport, float]: path, report of the whole file, seconds spent parsing it
+            (summed over its chunks)
+    """
+    paths = sorted(paths, key=os.path.getsize, reverse=True)
+    chunks = {path: find_chunks(path, chunk_size) for path in paths}
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            results = [_timed_report_chunk(path, start, end) for start, end in chunks[path]]
+            yield path, _merge([report for report, _ in results]), sum(seconds for _, seconds in results)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = dict()
+        for path in paths:
+            for number, (start, end) in enumerate(chunks[path]):
+                futures[executor.submit(_timed_report_chunk, path, start, end)] = (path, number)
+        results = {path: [None] * len(file_chunks) for path, file_chunks in chunks.items()}
+        remaining = {path: len(file_chunks) for path, file_chunks in chunks.items()}
+        for future in as_completed(futures):
+            path, number = futures[future]
+            results[path][number] = future.result()
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                # merged in chunk order, whatever finished first
+                file_results = results.pop(path)
+                yield path, _merge([report for report, _ in file_results]), sum(seconds for _, seconds in file_results)
+
+
+def ingest_reports(paths: list[str], max_workers: int = None, chunk_size: int = CHUNK_SIZE) -> dict[str, ListingsReport]:
+    """Build the report of every file, parsing all the chunks of all the files in one process pool
+
+    Args:
+        paths (list[str]): the listings files
+        max_workers (int): number of processes (every core by default, 1 parses in this process)
+        chunk_size (int): about how many bytes per chunk
+    Returns:
+        dict[str, ListingsReport]: path -> report of the whole file, in the order of paths
+    """
+    reports = {path: report for path, report, _ in iter_reports(paths, max_workers, chunk_size)}
+    return {path: reports[path] for path in paths}
+
+
+def _merge(chunk_reports: list[ListingsReport]) -> ListingsReport:
+    report = ListingsReport()
+    for chunk_report in chunk_reports:
+        report.merge(chunk_report)
+    return report
+
+
+def run_tests() -> None:
+    """Check the chunked, parallel reports against the lab3.py functions (run from the Lab 3 folder)"""
+    import shutil
+    import tempfile
+
+    import lab3
+
+    file_name = "chicago_listings.csv"
+    # the file has names with newlines and quotes inside quoted fields
+    chunks = find_chunks(file_name, 50000)
+    assert chunks[0][0] == 0 and chunks[-1][1] == os.path.getsize(file_name), "Chunks should cover the whole file"
+    assert all(chunks[i][1] == chunks[i + 1][0] for i in range(len(chunks) - 1)), "Chunks should follow each other"
+    rows = [row for start, end in chunks for row in read_chunk(file_name, start, end)]
+    assert rows == lab3.read_data(file_name), "Chunks should split the file on record boundaries"
+    print(f"find_chunks test passed! ({len(chunks)} chunks)")
+
+    listings = lab3.read_data(file_name)[1:]
+    with tempfile.TemporaryDirectory() as directory:
+        # a second, smaller city
+        small = os.path.join(directory, "small.csv")
+        with open(small, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(lab3.read_data(file_name)[0])
+            writer.writerows(listings[:500])
+        big = os.path.join(directory, "big.csv")
+        shutil.copy(file_name, big)
+
+        reports = ingest_reports([big, small], max_workers=2, chunk_size=100000)
+        for path, data in [(big, listings), (small, listings[:500])]:
+            report = reports[path]
+            assert report.total == len(data), "Every listing should be counted once"
+            assert report.room_types == lab3.count_listings_by_type(data), "Room types should match count_listings_by_type"
+            assert report.license_status == lab3.get_license_status(data), "License status should match get_license_status"
+            assert report.count_listings_by_host_count() == lab3.count_listings_by_host_count(data), "Host counts should match"
+            assert report.listings_per_host_with_type() == lab3.listings_per_host_with_type(data), "Listings per host should match"
+            assert report.median_price() == lab3.statistics.median(lab3.get_prices(data)), "Median price should match"
+        serial = ingest_reports([big], max_workers=1, chunk_size=100000)[big]
+        assert serial.host_listings == reports[big].host_listings, "Serial and parallel ingestion should agree"
+        assert list(reports) == [big, small], "Reports should be in the order of the paths"
+        assert [path for path, _, _ in iter_reports([small, big], max_workers=1)] == [big, small], "The largest file should go first"
+    print("ingest_reports test passed!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        start = time.perf_counter()
+        for path, report in ingest_reports(sys.argv[1:]).items():
+            print(f"{path}: {report.total:,} listings, {len(report.host_listings):,} hosts, {report.license_status}")
+        print(f"Ingested {len(sys.argv) - 1} files in {time.perf_counter() - start:.2f} s")
+    else:
+        run_tests()
@@ -0,0 +1,313 @@
+"""Price statistics (count, mean, median, any percentile) in one pass and bounded memory.
+
+statistics.median(get_prices(data)) needs every price in a list and sorts it. PriceStats only keeps
+how many times each distinct price was seen: listing prices repeat a lot (676 distinct prices
+for 8,264 listings in Chicago), so the median and percentiles are exact and memory grows with the
+number of distinct prices, not the number of listings.
+
+To stay bounded on any input, once there are more than max_values distinct prices the neighbouring
+prices are merged into centroids (their weighted mean and total count), small ones in the tails
+and big ones in the middle like a t-digest. From then on the percentiles are approximate (exact is False):
+a percentile is off by at most the spread of the prices merged into the centroid it falls in, and the
+extremes (minimum, maximum) and the mean stay exact.
+"""
+
+import math
+
+# Distinct prices kept before merging neighbours
+MAX_VALUES = 10000
+
+
+class PriceStats:
+    """Count, total, extremes and {price: count} of a stream of prices
+
+    Attributes:
+        count (int): number of prices
+        total (float): sum of the prices
+        minimum (float): smallest price (nan before the first one)
+        maximum (float): largest price (nan before the first one)
+        values (dict[float, int]): price (or centroid mean) -> number of prices
+        exact (bool): False once neighbouring prices have been merged
+    """
+
+    def __init__(self, max_values: int = MAX_VALUES):
+        """Start with no prices
+
+        Args:
+            max_values (int): how many distinct prices to keep before merging neighbours (at least 2)
+        """
+        if max_values < 2:
+            raise ValueError("max_values should be at least 2")
+        self.max_values = max_values
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.nan
+        self.maximum = math.nan
+        self.values = dict()
+        self.exact = True
+
+    def add(self, price: float) -> None:
+        """Add one price
+
+        Args:
+            price (float): the price of a listing
+        """
+        self.count += 1
+        self.total += price
+        if not price >= self.minimum:
+            self.minimum = price
+        if not price <= self.maximum:
+            self.maximum = price
+        self.values[price] = self.values.get(price, 0) + 1
+        if len(self.values) > self.max_values:
+            self._compact()
+
+    def remove(self, price: float) -> None:
+        """Take out one price that was added before
+
+        Exact stats forget the price exactly. Once prices have been merged, the price is taken out of
+        the closest centroid, and if it was an extreme, the new extreme is the closest remaining centroid.
+
+        Args:
+            price (float): the price to take out
+        """
+        if self.count == 0:
+            raise ValueError("no price to remove")
+        value = price
+        if value not in self.values:
+            if self.exact:
+                raise ValueError(f"{price} was not added")
+            value = min(self.values, key=lambda centroid: abs(centroid - price))
+        self.count -= 1
+        # the mean stays exact
+        self.total -= price
+        if self.values[value] == 1:
+            del self.values[value]
+        else:
+            self.values[value] -= 1
+        if self.count == 0:
+            self.total = 0.0
+            self.minimum = self.maximum = math.nan
+        elif price <= self.minimum or price >= self.maximum:
+            self.minimum, self.maximum = min(self.values), max(self.values)
+
+    def merge(self, other: "PriceStats") -> None:
+        """Add every price of another PriceStats
+
+        Args:
+            other (PriceStats): the prices to add
+        """
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.total += other.total
+        if not other.minimum >= self.minimum:
+            self.minimum = other.minimum
+        if not other.maximum <= self.maximum:
+            self.maximum = other.maximum
+        for price, count in other.values.items():
+            self.values[price] = self.values.get(price, 0) + count
+        self.exact = self.exact and other.exact
+        if len(self.values) > self.max_values:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Merge neighbouring prices into at most max_values // 2 centroids, small in the tails and big in the middle
+
+        Like a t-digest, a centroid at quantile q holds at most scale * count * sqrt(q * (1 - q)) prices:
+        the extreme percentiles come from a few prices each, and a price seen more often than the limit
+        stays on its own. The scale doubles until the centroids fit, so the next max_values // 2 new
+        prices can be added before compacting again.
+        """
+        target = self.max_values // 2
+        scale = 8 / self.max_values
+        compacted = self._centroids(scale)
+        while len(compacted) > target:
+            scale *= 2
+            compacted = self._centroids(scale)
+        self.values = compacted
+        self.exact = False
+
+    def _centroids(self, scale: float) -> dict[float, int]:
+        compacted = dict()
+        centroid_total, centroid_count = 0.0, 0
+        seen = 0
+        for price in sorted(self.values):
+            count = self.values[price]
+            # quantile in the middle of the centroid if this price were added to it
+            q = (seen + (centroid_count + count) / 2) / self.count
+            limit = scale * self.count * math.sqrt(q * (1 - q))
+            if centroid_count > 0 and centroid_count + count > limit:
+                seen += centroid_count
+                mean = centroid_total / centroid_count
+                compacted[mean] = compacted.get(mean, 0) + centroid_count
+                centroid_total, centroid_count = 0.0, 0
+            centroid_total += price * count
+            centroid_count += count
+        if centroid_count > 0:
+            mean = centroid_total / centroid_count
+            compacted[mean] = compacted.get(mean, 0) + centroid_count
+        return compacted
+
+    def mean(self) -> float:
+        """Average price
+
+        Returns:
+            float: total / count
+        """
+        if self.count == 0:
+            raise ValueError("no mean for empty data")
+        return self.total / self.count
+
+    def quantile(self, q: float) -> float:
+        """Find the value below which a fraction q of the prices fall
+
+        Interpolates between the two closest prices like statistics.quantiles(method='inclusive'),
+        so quantile(0.5) is statistics.median.
+
+        Args:
+            q (float): between 0 and 1
+        Returns:
+            float: the q-quantile of the prices (approximate if not exact)
+        """
+        if self.count == 0:
+            raise ValueError("no quantile for empty data")
+        if not 0 <= q <= 1:
+            raise ValueError("q should be between 0 and 1")
+        if q == 0:
+            return self.minimum
+        if q == 1:
+            return self.maximum
+        # 0-based position of the quantile in the sorted prices, between the prices at low and low + 1
+        position = q * (self.count - 1)
+        low = math.floor(position)
+        fraction = position - low
+        seen = 0
+        low_value = None
+        for price in sorted(self.values):
+            seen += self.values[price]
+            if low_value is None and seen > low:
+                low_value = price
+                if fraction == 0:
+                    return price
+            if seen > low + 1:
+                return low_value * (1 - fraction) + price * fraction
+        return self.maximum
+
+    def median(self) -> float:
+        """Median price
+
+        Returns:
+            float: same as statistics.median on the prices (when exact)
+        """
+        return self.quantile(0.5)
+
+    def percentiles(self, percents: list[float]) -> list[float]:
+        """Find several percentiles
+
+        Args:
+            percents (list[float]): between 0 and 100, e.g. [10, 50, 90]
+        Returns:
+            list[float]: the percentile of every percent
+        """
+        return [self.quantile(percent / 100) for percent in percents]
+
+
+def run_tests() -> None:
+    """Check PriceStats against statistics on chicago_listings.csv (run from the Lab 3 folder)"""
+    import random
+    import statistics
+    import tracemalloc
+
+    import lab3
+
+    listings = lab3.read_data("chicago_listings.csv")[1:]
+    for room_type in ["", "Entire home/apt", "Shared room"]:
+        prices = lab3.get_prices(listings, room_type)
+        stats = PriceStats()
+        for price in prices:
+            stats.add(price)
+        assert stats.exact and stats.count == len(prices), "Every price should be counted"
+        assert stats.mean() == sum(prices) / len(prices), "The mean should match"
+        assert stats.median() == statistics.median(prices), "The median should match statistics.median"
+        expected = statistics.quantiles(prices, n=100, method='inclusive')
+        assert all(math.isclose(a, b) for a, b in zip(stats.percentiles(range(1, 100)), expected)), "Percentiles should match statistics.quantiles"
+        assert stats.percentiles([0, 100]) == [min(prices), max(prices)], "0 and 100 should be the extremes"
+    small = PriceStats()
+    for price in [3.0, 1.0, 2.0, 2.0]:
+        small.add(price)
+    assert small.median() == statistics.median([3.0, 1.0, 2.0, 2.0]), "even count median"
+    assert PriceStats().count == 0, "No prices yet"
+    try:
+        PriceStats().median()
+        assert False, "An empty PriceStats has no median"
+    except ValueError:
+        pass
+    print("PriceStats exact test passed!")
+
+    # Merging the stats of two halves is the same as one pass
+    halves = [PriceStats(), PriceStats()]
+    prices = lab3.get_prices(listings)
+    for i, price in enumerate(prices):
+        halves[i * 2 // len(prices)].add(price)
+    halves[0].merge(halves[1])
+    assert halves[0].count == len(prices) and halves[0].median() == statistics.median(prices), "Merged stats should match"
+    assert halves[0].minimum == min(prices) and halves[0].maximum == max(prices), "Merged extremes should match"
+    print("PriceStats merge test passed!")
+
+    # Removing prices gives the stats of the remaining ones
+    stats = PriceStats()
+    for price in prices:
+        stats.add(price)
+    for price in prices[::2]:
+        stats.remove(price)
+    remaining = prices[1::2]
+    assert stats.count == len(remaining) and stats.median() == statistics.median(remaining), "Removed prices should be forgotten"
+    assert stats.minimum == min(remaining) and stats.maximum == max(remaining), "The extremes should follow the removals"
+    assert math.isclose(stats.mean(), statistics.fmean(remaining)), "The mean should follow the removals"
+    try:
+        stats.remove(-1.0)
+        assert False, "Only added prices can be removed"
+    except ValueError:
+        pass
+    for price in remaining:
+        stats.remove(price)
+    assert stats.count == 0 and stats.values == dict() and math.isnan(stats.minimum), "Removing every price should empty the stats"
+    print("PriceStats remove test passed!")
+
+    # 200,000 distinct prices stay within max_values, with percentiles close to the exact ones
+    random.seed(150)
+    prices = [round(random.lognormvariate(5, 0.8), 4) for _ in range(200000)]
+    tracemalloc.start()
+    stats = PriceStats(max_values=1000)
+    for price in prices:
+        stats.add(price)
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert not stats.exact and len(stats.values) <= 1000, "Distinct prices should stay bounded"
+    assert math.isclose(stats.mean(), statistics.fmean(prices)), "The mean should stay exact"
+    prices.sort()
+    for q in [0.01, 0.1, 0.5, 0.9, 0.99]:
+        exact = prices[round(q * (len(prices) - 1))]
+        assert abs(stats.quantile(q) - exact) < 0.01 * exact, f"The {q} quantile should be within 1%"
+    print(f"PriceStats bounded memory test passed! ({len(stats.values)} centroids, {memory / 1e6:.2f} MB peak)")
+
+    # Each compaction leaves room for max_values // 2 new prices
+    stats = PriceStats(max_values=1000)
+    compactions = 0
+    compact = stats._compact
+
+    def counted_compact():
+        nonlocal compactions
+        compactions += 1
+        compact()
+    stats._compact = counted_compact
+    for price in prices[:20000]:
+        stats.add(price)
+    assert 0 < compactions <= 20000 // 500, "Compacting should free half of max_values"
+    assert len(stats.values) <= 1000, "Distinct prices should stay bounded"
+    print(f"PriceStats compaction test passed! ({compactions} compactions for 20,000 prices)")
+
+
+if __name__ == "__main__":
+    run_tests()